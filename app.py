@@ -1,14 +1,29 @@
 # metarwarr - FUTURISTIC BRIGHT THEME
 import streamlit as st
 import pandas as pd
-import requests
-import re
 import os
 import base64
 import math
-from datetime import datetime
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
 import plotly.express as px
-from streamlit_autorefresh import st_autorefresh
+from metarwarr.alerts import AlertEngine, load_rules
+from metarwarr.api import make_server, serve_in_background
+from metarwarr.batch import derive_columns
+from metarwarr.bus import open_bus
+from metarwarr.climatology import BAND_LABELS, SECTOR_LABELS, counts_array, windrose_table
+from metarwarr.detectors import StreamDetectors
+from metarwarr.downsample import downsample, downsample_index
+from metarwarr.export import EXPORT_FORMATS, export_bytes
+from metarwarr.fetcher import MetarFetcher
+from metarwarr.history_store import open_store, to_epoch
+from metarwarr.ingest import IngestWorker
+from metarwarr.metar import parse_metar
+from metarwarr.notify import FonnteSender, NotificationDispatcher, notification_key
+from metarwarr.parse_cache import ReportCache
+from metarwarr.rollups import ROLLUP_METRICS, pick_resolution
+from metarwarr.ring import LiveHistory
+from metarwarr.telemetry import span, stopwatch, telemetry, timed
 
 # =========================
 # PAGE CONFIG
@@ -20,6 +35,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Page sections are timed into the process-wide telemetry (/metrics, diagnostics panel)
+render_timer = stopwatch("render")
+
 # =========================
 # CUSTOM CSS - FUTURISTIC BRIGHT THEME
 # =========================
@@ -346,114 +364,18 @@ st.markdown("""
 # CONSTANTS
 # =========================
 STATION = "WARR"
-RUNWAY_HEADING = 280
 CSV_FILE = "metar_history.csv"
+DB_FILE = "metar_history.db"
+CHART_WINDOWS = {
+    "24 Jam": pd.Timedelta(hours=24),
+    "7 Hari": pd.Timedelta(days=7),
+    "30 Hari": pd.Timedelta(days=30),
+    "1 Tahun": pd.Timedelta(days=365),
+    "Semua": None,
+}
 
-# =========================
-# AUTO REFRESH (60 seconds)
-# =========================
-count = st_autorefresh(interval=60000, limit=None, key="metar_refresh")
-
-# =========================
-# GET METAR NOAA
-# =========================
-def get_metar():
-    url = f"https://tgftp.nws.noaa.gov/data/observations/metar/stations/{STATION}.TXT"
-    try:
-        r = requests.get(url, timeout=10)
-        if r.status_code == 200:
-            text = r.text.strip().split("\n")
-            return text[-1]
-    except:
-        return None
-
-# =========================
-# METAR PARSER (UPGRADED)
-# =========================
-def parse_metar(metar):
-    data = {}
-    data["station"] = metar.split()[0]
-    
-    t = re.search(r"(\d{2})(\d{2})(\d{2})Z", metar)
-    if t:
-        data["day"] = t.group(1)
-        data["hour"] = t.group(2)
-        data["minute"] = t.group(3)
-    
-    wind = re.search(r"(\d{3}|VRB)(\d{2})(G\d{2})?KT", metar)
-    if wind:
-        data["wind_dir"] = wind.group(1)
-        data["wind_speed"] = int(wind.group(2))
-        if wind.group(3):
-            data["gust"] = int(wind.group(3).replace("G",""))
-        else:
-            data["gust"] = None
-    
-    vis = re.search(r" (\d{4}) ", metar)
-    if vis:
-        data["vis"] = int(vis.group(1))
-    if "9999" in metar:
-        data["vis"] = 10000
-    
-    wx = re.findall(r"(\+TSRA|-TSRA|TSRA|\+RA|-RA|RA|BR|FG|HZ|TS)", metar)
-    data["weather"] = " ".join(wx) if wx else "NIL"
-    
-    cloud = re.findall(r"(FEW|SCT|BKN|OVC)(\d{3})(CB|TCU)?", metar)
-    if cloud:
-        c = cloud[0]
-        height = int(c[1]) * 100
-        data["cloud"] = f"{c[0]} {height}FT {c[2] if c[2] else ''}"
-    
-    temp = re.search(r" (\d{2})/(\d{2}) ", metar)
-    if temp:
-        data["temp"] = int(temp.group(1))
-        data["dew"] = int(temp.group(2))
-    
-    qnh = re.search(r"Q(\d{4})", metar)
-    if qnh:
-        data["qnh"] = int(qnh.group(1))
-    
-    trend = re.search(r"(NOSIG|TEMPO.*)", metar)
-    data["trend"] = trend.group(1) if trend else "NIL"
-    
-    return data
-
-# =========================
-# CROSSWIND CALC
-# =========================
-def calculate_crosswind(wind_dir, wind_speed):
-    try:
-        angle = abs(int(wind_dir) - RUNWAY_HEADING)
-        angle_rad = math.radians(angle)
-        cross = wind_speed * math.sin(angle_rad)
-        return round(cross, 1)
-    except:
-        return None
-
-# =========================
-# WEATHER ALERT
-# =========================
-def get_alert(parsed):
-    alerts = []
-    if "TS" in parsed.get("weather",""):
-        alerts.append("⛈ THUNDERSTORM ALERT - Aktivitas badai petir terdeteksi!")
-    if parsed.get("vis",10000) < 2000:
-        alerts.append("⚠ LOW VISIBILITY - Visibilitas rendah!")
-    if parsed.get("gust"):
-        alerts.append("🌬 WIND GUST - Angin kencang terdeteksi!")
-    return alerts
-
-# =========================
-# HOLDING RISK
-# =========================
-def holding_risk(parsed):
-    vis = parsed.get("vis",10000)
-    wx = parsed.get("weather","")
-    if vis < 1000 or "TS" in wx:
-        return "HIGH"
-    if vis < 3000:
-        return "MEDIUM"
-    return "LOW"
+# Long-poll slice: how long one idle watcher run blocks on the bus (benchmarks shorten it)
+WATCH_SECONDS = float(os.environ.get("METARWARR_WATCH_SECONDS", "1.0"))
 
 # =========================
 # FORMAT QAM
@@ -485,11 +407,11 @@ def format_qam(parsed):
 # =========================
 # INTERPRETASI METAR
 # =========================
-def interpret_metar(parsed):
+def interpret_metar(parsed, ceiling=None):
+    # ceiling: lowest BKN/OVC/VV base in feet from the derived columns, None/NaN when there is none
     text = []
     vis = parsed.get("vis",10000)
     weather = parsed.get("weather","NIL")
-    cloud = parsed.get("cloud","NIL")
     wind_speed = parsed.get("wind_speed",0)
 
     if vis >= 8000:
@@ -508,10 +430,14 @@ def interpret_metar(parsed):
     else:
         text.append("☀️ Tidak ada fenomena cuaca signifikan.")
 
-    if "BKN" in cloud or "OVC" in cloud:
-        text.append("☁️ Tutupan awan signifikan - perhatikan ceiling.")
+    if ceiling is None or ceiling != ceiling:
+        text.append("🌤️ Tidak ada ceiling (tanpa lapisan BKN/OVC).")
+    elif ceiling < 1000:
+        text.append(f"❌ Ceiling rendah ({int(ceiling)} ft) - kondisi IFR.")
+    elif ceiling <= 3000:
+        text.append(f"☁️ Ceiling {int(ceiling)} ft - perhatikan ceiling.")
     else:
-        text.append("🌤️ Tutupan awan relatif ringan.")
+        text.append(f"🌤️ Ceiling tinggi ({int(ceiling)} ft).")
 
     if wind_speed > 20:
         text.append("💨 Kecepatan angin tinggi (>20kt) - perhatikan saat takeoff/landing.")
@@ -520,60 +446,157 @@ def interpret_metar(parsed):
 
     return " ".join(text)
 
+# =========================
+# HISTORY STORE
+# =========================
+@st.cache_resource
+def get_store():
+    # Legacy CSV is migrated once when the database is first created
+    return open_store(DB_FILE, legacy_csv=CSV_FILE)
+
+store = get_store()
+
+@st.cache_resource
+def get_history():
+    # Bounded per-station ring buffer shared by every session; only new rows are read
+    return LiveHistory(store, STATION, capacity=8192)
+
+def fmt_value(v):
+    # Ring values are float32; NaN means not reported
+    if v != v:
+        return "-"
+    v = round(float(v), 1)
+    return str(int(v)) if v.is_integer() else str(v)
+
 # =========================
 # WHATSAPP ALERT
 # =========================
-def send_whatsapp(message):
-    try:
-        token = st.secrets["FONNTE_TOKEN"]
-        target = st.secrets["TARGET_WA"]
-        url = "https://api.fonnte.com/send"
-        payload = {"target": target, "message": message}
-        headers = {"Authorization": token}
-        requests.post(url, data=payload, headers=headers)
-    except:
-        pass  # Silent fail if no WhatsApp config
+@st.cache_resource
+def get_notifier():
+    # Sends happen on the dispatcher's own threads, never during a rerun;
+    # METARWARR_NOTIFY=0 keeps WhatsApp silent even with secrets present (benchmarks, replays)
+    sender = None
+    if os.environ.get("METARWARR_NOTIFY") != "0":
+        try:
+            sender = FonnteSender(st.secrets["FONNTE_TOKEN"], st.secrets["TARGET_WA"])
+        except Exception:
+            sender = None  # Silent if no WhatsApp config
+    return NotificationDispatcher(sender, store=store).start()
+
+notifier = get_notifier()
 
 # =========================
-# LOAD HISTORY
+# CHANGE NOTIFICATION BUS
 # =========================
-if os.path.exists(CSV_FILE):
-    df = pd.read_csv(CSV_FILE)
-else:
-    df = pd.DataFrame(columns=["time","metar","temp","qnh"])
+@st.cache_resource
+def get_bus():
+    # In-process by default; METARWARR_BUS=redis://... (or unix://) shares versions between replicas
+    return open_bus(os.environ.get("METARWARR_BUS"))
+
+bus = get_bus()
+
+# =========================
+# ALERT RULES
+# =========================
+@st.cache_resource
+def get_alerts():
+    # Thresholds live in metarwarr.alerts; METARWARR_ALERT_RULES=rules.json replaces them
+    path = os.environ.get("METARWARR_ALERT_RULES")
+    rules, overrides = load_rules(path) if path else (None, None)
+    return AlertEngine(rules, overrides, store=store)
+
+alert_engine = get_alerts()
+
+@st.cache_resource
+def get_detectors():
+    # Online tendency/anomaly state per station, updated by the ingest worker only
+    return StreamDetectors(store=store)
+
+detectors = get_detectors()
 
 # =========================
-# UPDATE METAR
+# LOCAL API & METRICS
 # =========================
-def update_metar():
-    global df
-    metar = get_metar()
-    if metar is None:
+@st.cache_resource
+def get_api_server():
+    # METARWARR_API_PORT=8765 serves the JSON API and /metrics from the dashboard process
+    port = os.environ.get("METARWARR_API_PORT")
+    if not port:
         return None
-    if len(df)==0 or metar != df.iloc[-1]["metar"]:
-        parsed = parse_metar(metar)
-        qam = format_qam(parsed)
-        msg = f"{qam}\n\nSent via METAR Bot"
-        send_whatsapp(msg)
-        new = {
-            "time": datetime.utcnow(),
-            "metar": metar,
-            "temp": parsed.get("temp"),
-            "qnh": parsed.get("qnh")
-        }
-        df.loc[len(df)] = new
-        df.to_csv(CSV_FILE, index=False)
-    return metar
+    server = make_server(store, port=int(port), alerts=alert_engine, detectors=detectors)
+    serve_in_background(server)
+    return server
 
-@st.cache_data(ttl=60)
-def get_latest():
-    return update_metar()
+get_api_server()
+
+# =========================
+# INGEST WORKER
+# =========================
+def notify_new_metar(metar, parsed):
+    qam = format_qam(parsed)
+    msg = f"{qam}\n\nSent via METAR Bot"
+    notifier.submit(notification_key(parsed), msg)
+
+def notify_alert(station, fired, cleared, obs_time):
+    # Only transitions are sent; an alert that stays active is not repeated
+    lines = [rule.message for rule in fired if rule.message]
+    if lines:
+        names = ",".join(rule.name for rule in fired)
+        notifier.submit(f"{station} {names} {obs_time:%d%H%M}Z", f"{station}\n" + "\n".join(lines))
+
+@st.cache_resource
+def get_worker():
+    # One worker per process owns fetch, parse and persistence;
+    # page reruns only read its latest snapshot.
+    # METARWARR_NOAA_URL (station file template) polls another server, e.g. the replay stand-in
+    noaa_url = os.environ.get("METARWARR_NOAA_URL")
+    worker = IngestWorker(store, STATION, interval=60, on_new=notify_new_metar, bus=bus,
+                          fetcher=MetarFetcher(url_template=noaa_url) if noaa_url else None,
+                          alerts=alert_engine, on_alert=notify_alert, detectors=detectors)
+    return worker.start()
+
+# =========================
+# REPORT CACHE
+# =========================
+def build_report(metar):
+    # Everything the page derives from one raw report, computed once per distinct METAR
+    parsed = parse_metar(metar)
+    derived = derive_columns([metar]).iloc[0]
+    return {
+        "parsed": parsed,
+        "qam": format_qam(parsed),
+        "interpretation": interpret_metar(parsed, derived["ceiling"]),
+    }
+
+@st.cache_resource
+def get_report_cache():
+    return ReportCache(build_report, maxsize=256)
 
 # =========================
 # RUN APP
 # =========================
-metar = get_latest()
-parsed = parse_metar(metar)
+# Read the bus version first: a bump racing the snapshot only costs one extra rerun
+rendered_version = bus.version(STATION)
+snapshot = get_worker().snapshot()
+
+@st.fragment(run_every=WATCH_SECONDS)
+def watch_updates(rendered_version):
+    # Blocks on the bus and draws nothing; the page reruns the moment a newer
+    # observation is published. Slices stay short so widgets remain responsive
+    if bus.wait(STATION, rendered_version, timeout=WATCH_SECONDS * 0.9) > rendered_version:
+        st.rerun(scope="app")
+
+watch_updates(rendered_version)
+
+if snapshot.metar is None:
+    st.info("Menunggu data METAR pertama dari NOAA...")
+    st.stop()
+metar = snapshot.metar
+report = get_report_cache().get(metar)
+parsed = report["parsed"]
+history = get_history()
+history.refresh()
+render_timer.lap("setup")
 
 # =========================
 # HEADER SECTION
@@ -602,11 +625,13 @@ st.markdown(f"""
 # =========================
 st.markdown('<div class="section-header"><span class="section-icon">📡</span> RAW METAR DATA</div>', unsafe_allow_html=True)
 st.code(metar, language="text")
+render_timer.lap("header")
 
 # =========================
 # ALERTS
 # =========================
-alerts = get_alert(parsed)
+# Alerts are evaluated on ingest; the page only reads the active set
+alerts = alert_engine.messages(STATION)
 if alerts:
     for a in alerts:
         st.markdown(f'<div class="alert-box alert-warning">{a}</div>', unsafe_allow_html=True)
@@ -617,12 +642,14 @@ if alerts:
 st.markdown('<div class="section-header"><span class="section-icon">📊</span> WEATHER METRICS</div>', unsafe_allow_html=True)
 
 col1, col2, col3, col4 = st.columns(4)
+# Cards read the newest ring record in place (a zero-copy view, not a parsed dict)
+obs = history.latest(STATION)
 
 with col1:
     st.markdown(f"""
     <div class="metric-card">
         <div class="metric-label">🌡️ Temperature</div>
-        <div class="metric-value">{parsed.get("temp")}°C</div>
+        <div class="metric-value">{fmt_value(obs["temp"])}°C</div>
     </div>
     """, unsafe_allow_html=True)
 
@@ -630,14 +657,15 @@ with col2:
     st.markdown(f"""
     <div class="metric-card">
         <div class="metric-label">🔵 Pressure (QNH)</div>
-        <div class="metric-value">{parsed.get("qnh")} hPa</div>
+        <div class="metric-value">{fmt_value(obs["qnh"])} hPa</div>
     </div>
     """, unsafe_allow_html=True)
 
 with col3:
-    wind_text = f"{parsed.get('wind_dir')}° / {parsed.get('wind_speed')}KT"
-    if parsed.get("gust"):
-        wind_text += f" G{parsed.get('gust')}"
+    wind_dir = "VRB" if obs["wind_dir"] != obs["wind_dir"] else f"{int(obs['wind_dir']):03d}°"
+    wind_text = f"{wind_dir} / {fmt_value(obs['wind_speed'])}KT"
+    if obs["gust"] == obs["gust"]:
+        wind_text += f" G{fmt_value(obs['gust'])}"
     st.markdown(f"""
     <div class="metric-card">
         <div class="metric-label">💨 Wind</div>
@@ -646,20 +674,72 @@ with col3:
     """, unsafe_allow_html=True)
 
 with col4:
-    cross = calculate_crosswind(int(parsed.get("wind_dir",0)), parsed.get("wind_speed",0))
+    cross = fmt_value(obs["crosswind"])
+    if obs["gust_crosswind"] == obs["gust_crosswind"]:
+        cross += f" G{fmt_value(obs['gust_crosswind'])}"
+    along = f"TW {fmt_value(obs['tailwind'])} KT" if obs["tailwind"] > 0 else f"HW {fmt_value(obs['headwind'])} KT"
     st.markdown(f"""
     <div class="metric-card">
-        <div class="metric-label">🛫 Crosswind RWY28</div>
-        <div class="metric-value">{cross} KT</div>
+        <div class="metric-label">🛫 Crosswind RWY{history.label("runway", obs["runway"]) or "-"}</div>
+        <div class="metric-value" style="font-size: 20px;">{cross} KT</div>
+        <div class="metric-label">{along}</div>
     </div>
     """, unsafe_allow_html=True)
 
+# Derived quantities are stored with each observation, so the cards only format them
+col5, col6, col7, col8 = st.columns(4)
+ceiling = "Tidak ada" if obs["ceiling"] != obs["ceiling"] else f"{fmt_value(obs['ceiling'])} ft"
+category = history.label("category", obs["category"]) or "-"
+derived_cards = [
+    (col5, "💧 Relative Humidity", f"{fmt_value(obs['rh'])}%", f"T-Td {fmt_value(obs['dewpoint_depression'])}°C"),
+    (col6, "⛰️ Density Altitude", f"{fmt_value(obs['density_altitude'])} ft", "120 ft / °C di atas ISA"),
+    (col7, "☁️ Ceiling", ceiling, "BKN/OVC/VV terendah"),
+    (col8, "🛩️ Flight Category", category, "VFR / MVFR / IFR / LIFR"),
+]
+for col, label, value, note in derived_cards:
+    with col:
+        st.markdown(f"""
+        <div class="metric-card">
+            <div class="metric-label">{label}</div>
+            <div class="metric-value" style="font-size: 20px;">{value}</div>
+            <div class="metric-label">{note}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+# =========================
+# TREND & ANOMALY
+# =========================
+def fmt_change(v, unit):
+    if v is None:
+        return "-"
+    return f"{v:+.1f} {unit}"
+
+st.markdown('<div class="section-header"><span class="section-icon">📈</span> TREND & ANOMALY</div>', unsafe_allow_html=True)
+
+# Signals come from the online detectors updated at ingest; nothing is recomputed here
+signals = detectors.signals(STATION)
+trend_cards = [
+    ("📉 QNH 3 jam", fmt_change(signals.get("qnh_change_3h"), "hPa")),
+    ("🌡️ Suhu 1 jam", fmt_change(signals.get("temp_change_1h"), "°C")),
+    ("💧 Dew Point 1 jam", fmt_change(signals.get("dew_change_1h"), "°C")),
+    ("💨 Angin vs rata-rata", fmt_change(signals.get("wind_speed_dev"), "KT")
+     + (" | GUST ONSET" if signals.get("gust_onset") else "")),
+]
+for col, (label, value) in zip(st.columns(4), trend_cards):
+    with col:
+        st.markdown(f"""
+        <div class="metric-card">
+            <div class="metric-label">{label}</div>
+            <div class="metric-value" style="font-size: 20px;">{value}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
 # =========================
 # HOLDING RISK
 # =========================
 st.markdown('<div class="section-header"><span class="section-icon">⚠️</span> HOLDING RISK ASSESSMENT</div>', unsafe_allow_html=True)
 
-risk = holding_risk(parsed)
+risk = alert_engine.risk(STATION)
 if risk == "HIGH":
     st.markdown('<div class="alert-box alert-error">🛑 HOLDING RISK: HIGH - Kondisi tidak menguntungkan untuk holding!</div>', unsafe_allow_html=True)
 elif risk == "MEDIUM":
@@ -667,27 +747,27 @@ elif risk == "MEDIUM":
 else:
     st.markdown('<div class="alert-box alert-success">✅ HOLDING RISK: LOW - Kondisi normal untuk operasi.</div>', unsafe_allow_html=True)
 
+render_timer.lap("cards")
+
 # =========================
 # QAM FORMAT
 # =========================
 st.markdown('<div class="section-header"><span class="section-icon">📋</span> METAR QAM FORMAT</div>', unsafe_allow_html=True)
-st.code(format_qam(parsed), language="text")
+st.code(report["qam"], language="text")
 
 # =========================
 # INTERPRETASI CUACA
 # =========================
 st.markdown('<div class="section-header"><span class="section-icon">🔍</span> INTERPRETASI KONDISI CUACA</div>', unsafe_allow_html=True)
-interpretasi = interpret_metar(parsed)
+interpretasi = report["interpretation"]
 st.markdown(f'<div class="info-box">{interpretasi}</div>', unsafe_allow_html=True)
+render_timer.lap("report")
 
 # =========================
 # CHARTS - FUTURISTIC STYLE
 # =========================
 st.markdown('<div class="section-header"><span class="section-icon">📈</span> WEATHER TRENDS</div>', unsafe_allow_html=True)
 
-df["time"] = pd.to_datetime(df["time"], errors="coerce")
-df = df.dropna(subset=["time"])
-
 # Custom Plotly template
 futuristic_template = {
     "layout": {
@@ -708,37 +788,241 @@ futuristic_template = {
     }
 }
 
-if len(df) > 0:
-    # Temperature Chart
-    fig = px.line(df, x="time", y="temp", title="🌡️ Temperature Trend", markers=True)
-    fig.update_traces(line=dict(color="#00B4D4"), marker=dict(size=8, color="#00F5D4", line=dict(color="#0077B6", width=2)))
+def show_chart(fig):
+    # Figure -> JSON serialization is timed on its own, apart from data loading
+    with span("render.plotly"):
+        st.plotly_chart(fig, use_container_width=True)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def chart_points(station, window, width, column, method, version):
+    # Keyed on (station, window, resolution, data version)
+    bounds = store.time_range(station)
+    if bounds is None:
+        return pd.DataFrame({"obs_time": pd.Series(dtype="datetime64[s]"), column: pd.Series(dtype="float64")})
+    window_span = CHART_WINDOWS[window]
+    end = pd.Timestamp(bounds[1])
+    start = end - window_span if window_span is not None else pd.Timestamp(bounds[0])
+    resolution = pick_resolution(end - start, width) if column in ROLLUP_METRICS else None
+    if resolution is not None:
+        # Long ranges read hourly/daily buckets instead of every observation
+        cells = store.read_rollup(station, start, None, resolution)
+        if method == "minmax":
+            # Spikes must survive: each bucket's min then max, not its mean
+            lows = cells[["bucket", f"{column}_min"]].set_axis(["obs_time", column], axis=1)
+            highs = cells[["bucket", f"{column}_max"]].set_axis(["obs_time", column], axis=1)
+            data = pd.concat([lows, highs]).sort_index(kind="stable").reset_index(drop=True)
+        else:
+            data = cells[["bucket", f"{column}_mean"]].set_axis(["obs_time", column], axis=1)
+    elif history.covers(station, to_epoch(start)):
+        # Recent ranges come straight from the ring buffer; only kept points are copied
+        v = history.view(station, to_epoch(start))
+        keep = downsample_index(v["obs_time"], v[column], width, method)
+        return pd.DataFrame({"obs_time": v["obs_time"][keep].astype("datetime64[s]"), column: v[column][keep]})
+    else:
+        data = store.read_range(station, start)[["obs_time", column]]
+    return downsample(data, "obs_time", column, width, method)
+
+DERIVED_CHARTS = {
+    "Relative Humidity (%)": "rh",
+    "Dew Point Depression (°C)": "dewpoint_depression",
+    "Density Altitude (ft)": "density_altitude",
+    "Ceiling (ft)": "ceiling",
+}
+
+@st.fragment
+@timed("render.trends")
+def render_trends():
+    # Changing the window or resolution reruns only this section
+    c1, c2 = st.columns([1, 2])
+    with c1:
+        chart_window = st.selectbox("📈 Rentang grafik", list(CHART_WINDOWS), index=1)
+    with c2:
+        chart_width = st.select_slider("Resolusi grafik (px)", options=[400, 800, 1200, 1600, 2400], value=1200)
+
+    version = history.refresh()
+    if history.latest(STATION) is not None:
+        # Temperature Chart (LTTB keeps the curve shape)
+        temp_pts = chart_points(STATION, chart_window, chart_width, "temp", "lttb", version)
+        fig = px.line(temp_pts, x="obs_time", y="temp", title="🌡️ Temperature Trend",
+                      labels={"obs_time": "time"}, markers=len(temp_pts) <= 300)
+        fig.update_traces(line=dict(color="#00B4D4"), marker=dict(size=8, color="#00F5D4", line=dict(color="#0077B6", width=2)))
+        fig.update_layout(**futuristic_template["layout"])
+        show_chart(fig)
+
+        # Pressure Chart (min/max buckets keep sudden QNH drops visible)
+        qnh_pts = chart_points(STATION, chart_window, chart_width, "qnh", "minmax", version)
+        fig2 = px.line(qnh_pts, x="obs_time", y="qnh", title="🔵 Pressure (QNH) Trend",
+                       labels={"obs_time": "time"}, markers=len(qnh_pts) <= 300)
+        fig2.update_traces(line=dict(color="#0077B6"), marker=dict(size=8, color="#00B4D8", line=dict(color="#00F5D4", width=2)))
+        fig2.update_layout(**futuristic_template["layout"])
+        show_chart(fig2)
+
+        # Crosswind on the favoured runway end, straight from the stored columns
+        xw_pts = chart_points(STATION, chart_window, chart_width, "crosswind", "minmax", version)
+        fig3 = px.line(xw_pts, x="obs_time", y="crosswind", title="🛫 Crosswind Trend",
+                       labels={"obs_time": "time"}, markers=len(xw_pts) <= 300)
+        fig3.update_traces(line=dict(color="#00F5D4"), marker=dict(size=8, color="#00B4D8", line=dict(color="#0077B6", width=2)))
+        fig3.update_layout(**futuristic_template["layout"])
+        show_chart(fig3)
+
+        # Stored derived quantities chart like any other column
+        derived_label = st.selectbox("Parameter turunan", list(DERIVED_CHARTS))
+        derived_column = DERIVED_CHARTS[derived_label]
+        derived_pts = chart_points(STATION, chart_window, chart_width, derived_column, "minmax", version)
+        fig4 = px.line(derived_pts, x="obs_time", y=derived_column, title=f"📐 {derived_label}",
+                       labels={"obs_time": "time", derived_column: derived_label}, markers=len(derived_pts) <= 300)
+        fig4.update_traces(line=dict(color="#0077B6"), marker=dict(size=8, color="#00F5D4", line=dict(color="#00B4D8", width=2)))
+        fig4.update_layout(**futuristic_template["layout"])
+        show_chart(fig4)
+
+render_trends()
+render_timer.lap()  # the fragment times itself
+
+# =========================
+# WIND CLIMATOLOGY
+# =========================
+st.markdown('<div class="section-header"><span class="section-icon">🧭</span> WIND CLIMATOLOGY</div>', unsafe_allow_html=True)
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "Mei", "Jun", "Jul", "Agu", "Sep", "Okt", "Nov", "Des"]
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def wind_counts(station, version):
+    # A few thousand precomputed cells, never the raw reports
+    return counts_array(store.read_aggregate("wind_counts", station))
+
+@st.fragment
+@timed("render.windrose")
+def render_windrose():
+    counts = wind_counts(STATION, history.refresh())
+    w1, w2 = st.columns([2, 1])
+    with w1:
+        months = st.multiselect("Bulan", MONTHS, placeholder="Semua bulan")
+    with w2:
+        hours = st.slider("Jam (UTC)", 0, 23, (0, 23))
+    table, calm = windrose_table(
+        counts,
+        months=[MONTHS.index(m) + 1 for m in months] or None,
+        hours=range(hours[0], hours[1] + 1),
+    )
+    if len(table) == 0:
+        st.info("Belum ada data angin untuk pilihan ini.")
+        return
+    fig = px.bar_polar(table, r="frequency", theta="sector", color="band", title="🧭 Windrose (%)",
+                       category_orders={"sector": SECTOR_LABELS, "band": BAND_LABELS[1:]},
+                       color_discrete_sequence=px.colors.sequential.Tealgrn)
     fig.update_layout(**futuristic_template["layout"])
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
+    st.caption(f"Calm / VRB: {calm:.1f}%")
 
-    # Pressure Chart
-    fig2 = px.line(df, x="time", y="qnh", title="🔵 Pressure (QNH) Trend", markers=True)
-    fig2.update_traces(line=dict(color="#0077B6"), marker=dict(size=8, color="#00B4D8", line=dict(color="#00F5D4", width=2)))
-    fig2.update_layout(**futuristic_template["layout"])
-    st.plotly_chart(fig2, use_container_width=True)
+render_windrose()
+render_timer.lap()
 
 # =========================
 # HISTORY TABLE
 # =========================
 st.markdown('<div class="section-header"><span class="section-icon">📜</span> METAR HISTORY</div>', unsafe_allow_html=True)
 
-if len(df) > 0:
-    st.dataframe(df, use_container_width=True)
-else:
-    st.info("Belum ada data history.")
+WEATHER_CODES = ["Semua", "TS", "RA", "SH", "DZ", "BR", "FG", "HZ", "SQ"]
+CATEGORIES = ["VFR", "MVFR", "IFR", "LIFR"]
+CEILING_FILTERS = {"Semua": None, "< 500 ft": 500, "< 1000 ft": 1000, "< 3000 ft": 3000}
+
+# Same filters and data version -> same answer, without touching the store
+@st.cache_data(max_entries=32, show_spinner=False)
+def history_count(version, filters):
+    return store.count(**filters)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def history_rows(version, filters, page_size, page):
+    return store.query(**filters, limit=page_size, offset=(page - 1) * page_size)
+
+@st.fragment
+@timed("render.history")
+def render_history():
+    # Filters and paging rerun only this section
+    version = history.refresh()
+    f1, f2, f3, f4, f5, f6 = st.columns(6)
+    with f1:
+        stations = store.stations() or [STATION]
+        hist_station = st.selectbox("Station", stations, index=stations.index(STATION) if STATION in stations else 0)
+    with f2:
+        date_from = st.date_input("Dari", value=None)
+    with f3:
+        date_to = st.date_input("Sampai", value=None)
+    with f4:
+        hist_weather = st.selectbox("Cuaca", WEATHER_CODES)
+    with f5:
+        hist_category = st.multiselect("Flight category", CATEGORIES)
+    with f6:
+        hist_ceiling = st.selectbox("Ceiling", list(CEILING_FILTERS))
+
+    # Filters go to the store; only the visible page is ever loaded
+    filters = {
+        "station": hist_station,
+        "start": datetime.combine(date_from, datetime.min.time()) if date_from else None,
+        "end": datetime.combine(date_to, datetime.min.time()) + timedelta(days=1, seconds=-1) if date_to else None,
+        "weather": None if hist_weather == "Semua" else hist_weather,
+        "category": hist_category or None,
+        "ceiling_below": CEILING_FILTERS[hist_ceiling],
+    }
+    total_rows = history_count(version, filters)
+
+    p1, p2 = st.columns([1, 3])
+    with p1:
+        page_size = st.selectbox("Baris per halaman", [25, 50, 100, 250], index=1)
+    pages = max(math.ceil(total_rows / page_size), 1)
+    with p2:
+        page = st.number_input(f"Halaman (1-{pages})", min_value=1, max_value=pages, value=1, step=1)
+
+    if total_rows > 0:
+        page_df = history_rows(version, filters, page_size, page)
+        st.dataframe(page_df, use_container_width=True, hide_index=True)
+        st.caption(f"{total_rows} baris • halaman {page} dari {pages}")
+    else:
+        st.info("Tidak ada data history untuk filter ini.")
+
+    # Download button
+    d1, d2 = st.columns([1, 3])
+    with d1:
+        export_fmt = st.selectbox("Format", list(EXPORT_FORMATS), format_func=lambda f: f.upper())
+    with d2:
+        mime, ext = EXPORT_FORMATS[export_fmt]
+        # Built only when clicked, chunk by chunk from the store; the temp file is closed once read
+        st.download_button(
+            f"📥 Download {export_fmt.upper()}",
+            lambda: export_bytes(store, export_fmt, **filters),
+            file_name=f"metar_history{ext}",
+            mime=mime,
+        )
+        api_server = get_api_server()
+        if api_server is not None:
+            # Streamlit holds downloads in memory; the local API streams them block by block
+            query = {k: v.isoformat() if isinstance(v, datetime) else ",".join(v) if isinstance(v, list) else v
+                     for k, v in filters.items() if v is not None}
+            query["format"] = export_fmt
+            host, port = api_server.server_address[:2]
+            st.caption(f"Arsip besar: [unduh bertahap lewat API lokal](http://{host}:{port}/api/export?{urlencode(query)})")
+
+render_history()
+render_timer.done("page")
 
 # =========================
-# DOWNLOAD BUTTON
+# DIAGNOSTICS
 # =========================
-st.download_button(
-    "📥 Download CSV",
-    df.to_csv(index=False),
-    file_name="metar_history.csv"
-)
+# Opt-in with ?diag=1 or METARWARR_DIAGNOSTICS=1; the same numbers are served on /metrics
+if st.query_params.get("diag") == "1" or os.environ.get("METARWARR_DIAGNOSTICS") == "1":
+    st.markdown('<div class="section-header"><span class="section-icon">🛠️</span> DIAGNOSTIK</div>', unsafe_allow_html=True)
+    spans, counters = telemetry.snapshot()
+    st.dataframe(pd.DataFrame([
+        {"Span": name, "n": row["count"], "p50 (ms)": round(row["p50"] * 1000, 2),
+         "p99 (ms)": round(row["p99"] * 1000, 2), "max (ms)": round(row["max"] * 1000, 2)}
+        for name, row in spans.items()
+    ]), use_container_width=True, hide_index=True)
+    if counters:
+        st.dataframe(pd.DataFrame([
+            {"Counter": name, "Label": ", ".join(f"{k}={v}" for k, v in labels), "Nilai": value}
+            for (name, labels), value in counters.items()
+        ]), use_container_width=True, hide_index=True)
+    st.caption(f"p50/p99 dari {telemetry.window} sampel terakhir per span • hanya proses ini")
 
 # =========================
 # FOOTER
@@ -748,6 +1032,6 @@ st.markdown("""
 <div style="text-align: center; padding: 20px; color: #4A5568; font-family: 'Rajdhani', sans-serif;">
     <p>🚀 <strong>METAR Real-Time Monitoring System</strong> | Generated by AI</p>
     <p>Data Source: NOAA | Airport: Juanda International (WARR)</p>
-    <p style="font-size: 12px;">Auto-refresh every 60 seconds | Theme: Futuristic Bright</p>
+    <p style="font-size: 12px;">Live: the page updates as soon as a new METAR is ingested | Theme: Futuristic Bright</p>
 </div>
 """, unsafe_allow_html=True)
@@ -0,0 +1,33 @@
+# metarwarr - core library (history, ingest, parsing)
+# Names are resolved on first use, so ``from metarwarr import parse_metar``
+# costs the parser only, not pandas, requests or Streamlit.
+import importlib
+
+_EXPORTS = {
+    "parse_metar": "metarwarr.metar",
+    "decode_metar": "metarwarr.metar",
+    "get_metar": "metarwarr.metar",
+    "parse_batch": "metarwarr.batch",
+    "derive_columns": "metarwarr.batch",
+    "open_store": "metarwarr.history_store",
+    "IngestWorker": "metarwarr.ingest",
+    "AlertEngine": "metarwarr.alerts",
+    "StreamDetectors": "metarwarr.detectors",
+    "open_bus": "metarwarr.bus",
+    "make_server": "metarwarr.api",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'metarwarr' has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
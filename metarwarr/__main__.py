@@ -0,0 +1,4 @@
+# metarwarr - python -m metarwarr
+from metarwarr.service import main
+
+main()
@@ -0,0 +1,172 @@
+# metarwarr - ALERT RULE ENGINE
+import json
+import operator
+import threading
+
+from metarwarr.history_store import to_epoch
+
+ALERT_STATE_KEY = "alert_state"
+RISK_LEVELS = ["LOW", "MEDIUM", "HIGH"]
+
+# Rules are plain data. field: key of the observation dict; op: < <= > >= contains present;
+# clear: where a numeric alert releases (hysteresis, defaults to value);
+# hold: minimum seconds an alert stays active once fired; risk: holding risk while active.
+ALERT_RULES = [
+    {"name": "thunderstorm", "field": "weather", "op": "contains", "value": "TS", "hold": 3600,
+     "risk": "HIGH", "message": "⛈ THUNDERSTORM ALERT - Aktivitas badai petir terdeteksi!"},
+    {"name": "low_visibility", "field": "vis", "op": "<", "value": 2000, "clear": 2500,
+     "message": "⚠ LOW VISIBILITY - Visibilitas rendah!"},
+    {"name": "wind_gust", "field": "gust", "op": "present",
+     "message": "🌬 WIND GUST - Angin kencang terdeteksi!"},
+    # Fed by metarwarr.detectors when the ingest worker runs them
+    {"name": "pressure_fall", "field": "qnh_change_3h", "op": "<=", "value": -3, "clear": -2, "risk": "MEDIUM",
+     "message": "📉 PRESSURE FALL - QNH turun cepat (≥3 hPa dalam 3 jam)!"},
+    {"name": "temperature_drop", "field": "temp_change_1h", "op": "<=", "value": -4, "clear": -2,
+     "message": "🌡 TEMPERATURE DROP - Suhu turun drastis, waspada konveksi!"},
+    {"name": "gust_onset", "field": "gust_onset", "op": "present",
+     "message": "💨 GUST ONSET - Hembusan angin mulai terjadi!"},
+    {"name": "holding_vis_high", "field": "vis", "op": "<", "value": 1000, "clear": 1200, "risk": "HIGH"},
+    {"name": "holding_vis_medium", "field": "vis", "op": "<", "value": 3000, "clear": 3500, "risk": "MEDIUM"},
+]
+# Per-station overrides: {"WARR": {"low_visibility": {"value": 1500, "clear": 2000}}};
+# {"enabled": False} switches a rule off for that station
+STATION_OVERRIDES = {}
+
+_COMPARE = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+# Numeric release test for each trigger op: the far side of ``clear``
+_RELEASE = {"<": operator.ge, "<=": operator.gt, ">": operator.le, ">=": operator.lt}
+
+
+def load_rules(path):
+    # JSON file {"rules": [...], "stations": {...}}; either key may be left out
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    return config.get("rules", ALERT_RULES), config.get("stations", STATION_OVERRIDES)
+
+
+def _missing(v):
+    return v is None or v != v
+
+
+class Rule:
+    """One rule compiled for one station: trigger and release tests fixed up front."""
+
+    __slots__ = ("name", "field", "message", "risk", "hold", "trigger", "release")
+
+    def __init__(self, spec):
+        op = spec["op"]
+        self.name = spec["name"]
+        self.field = spec["field"]
+        self.message = spec.get("message")
+        self.risk = spec.get("risk")
+        self.hold = int(spec.get("hold", 0))
+        if self.risk is not None and self.risk not in RISK_LEVELS:
+            raise ValueError(f"rule {self.name!r}: unknown risk {self.risk!r}")
+        if op in _COMPARE:
+            value = float(spec["value"])
+            clear = float(spec.get("clear", value))
+            test, release = _COMPARE[op], _RELEASE[op]
+            # A missing reading says nothing, so it neither fires nor releases
+            self.trigger = lambda v: not _missing(v) and test(float(v), value)
+            self.release = lambda v: not _missing(v) and release(float(v), clear)
+        elif op == "contains":
+            needle = spec["value"]
+            self.trigger = lambda v: not _missing(v) and needle in str(v)
+            self.release = lambda v: not self.trigger(v)
+        elif op == "present":
+            self.trigger = lambda v: not _missing(v) and v is not False
+            self.release = lambda v: not self.trigger(v)
+        else:
+            raise ValueError(f"rule {self.name!r}: unknown op {op!r}")
+
+
+class AlertEngine:
+    """Evaluates the configured rules once per ingested observation.
+
+    Rules are compiled per station on first use; evaluation touches each of
+    that station's rules once and keeps only the set of active alerts, so the
+    render path just reads ``active()``. State can be saved through the
+    history store and is reloaded on start, so a restart does not fire the
+    same alerts again.
+    """
+
+    def __init__(self, rules=None, overrides=None, store=None):
+        self.rules = list(ALERT_RULES if rules is None else rules)
+        self.overrides = STATION_OVERRIDES if overrides is None else overrides
+        self.store = store
+        self._compiled = {}
+        self._lock = threading.Lock()
+        # station -> {"obs_time": epoch, "active": {rule name: fired at epoch}}
+        self._state = {}
+        if store is not None:
+            self._state = json.loads(store.get_state(ALERT_STATE_KEY) or "{}")
+        for spec in self.rules:
+            Rule(spec)  # fail fast on bad config
+
+    def compiled(self, station):
+        rules = self._compiled.get(station)
+        if rules is None:
+            # Stations without overrides share one compiled set
+            key = station if station in self.overrides else None
+            rules = self._compiled.get(key)
+        if rules is None:
+            station_overrides = self.overrides.get(station, {})
+            rules = []
+            for spec in self.rules:
+                spec = {**spec, **station_overrides.get(spec["name"], {})}
+                if spec.get("enabled", True):
+                    rules.append(Rule(spec))
+            rules = self._compiled[key] = tuple(rules)
+        self._compiled[station] = rules
+        return rules
+
+    def evaluate(self, station, obs, obs_time):
+        """Advance ``station`` by one observation; returns (fired, cleared) rules.
+
+        Observations older than the last one evaluated are ignored. The same
+        obs_time is evaluated again, which is how a correction takes effect.
+        """
+        t = to_epoch(obs_time)
+        fired, cleared = [], []
+        with self._lock:
+            state = self._state.setdefault(station, {"obs_time": None, "active": {}})
+            if state["obs_time"] is not None and t < state["obs_time"]:
+                return fired, cleared
+            active = state["active"]
+            for rule in self.compiled(station):
+                value = obs.get(rule.field)
+                since = active.get(rule.name)
+                if since is None:
+                    if rule.trigger(value):
+                        active[rule.name] = t
+                        fired.append(rule)
+                elif t - since >= rule.hold and rule.release(value):
+                    del active[rule.name]
+                    cleared.append(rule)
+            state["obs_time"] = t
+        return fired, cleared
+
+    def known(self, station):
+        with self._lock:
+            return station in self._state
+
+    def active(self, station):
+        # Active rules in config order
+        with self._lock:
+            names = set(self._state.get(station, {}).get("active", {}))
+        return [rule for rule in self.compiled(station) if rule.name in names]
+
+    def messages(self, station):
+        return [rule.message for rule in self.active(station) if rule.message]
+
+    def risk(self, station):
+        levels = [RISK_LEVELS.index(rule.risk) for rule in self.active(station) if rule.risk]
+        return RISK_LEVELS[max(levels, default=0)]
+
+    def state(self):
+        with self._lock:
+            return {ALERT_STATE_KEY: json.dumps(self._state)}
+
+    def save(self):
+        if self.store is not None:
+            self.store.append([], state=self.state())
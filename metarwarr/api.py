@@ -0,0 +1,205 @@
+# metarwarr - LOCAL HTTP JSON API
+import json
+import logging
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from metarwarr.export import EXPORT_FORMATS, export_file, iter_file
+from metarwarr.telemetry import count, telemetry
+
+log = logging.getLogger(__name__)
+
+MAX_ROWS = 10000
+
+
+def _jsonable(v):
+    if isinstance(v, datetime):
+        return v.isoformat()
+    if isinstance(v, float) and v != v:
+        return None
+    if hasattr(v, "item"):
+        return _jsonable(v.item())
+    return v
+
+
+def _records(df):
+    # pandas already maps NaN to null and timestamps to ISO strings
+    return json.loads(df.to_json(orient="records", date_format="iso", date_unit="s"))
+
+
+def _time(params, name):
+    value = params.get(name)
+    if value is None:
+        return None
+    try:
+        return pd.Timestamp(value).to_pydatetime()
+    except ValueError:
+        raise ValueError(f"{name}: not a timestamp: {value!r}")
+
+
+class FileBody:
+    """A route result streamed as a download instead of encoded as JSON."""
+
+    def __init__(self, fileobj, content_type, filename):
+        self.fileobj = fileobj
+        self.content_type = content_type
+        self.filename = filename
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """Read-only JSON views over the history store.
+
+    GET /healthz, /api/stations, /api/latest?station=,
+    /api/observations?station=&start=&end=&weather=&category=&limit=,
+    /api/rollup?station=&start=&end=&resolution=hour|day,
+    /api/export?format=csv|csv.gz|parquet plus the observation filters
+    (streamed, oldest first), and /metrics (Prometheus text). Times are
+    ISO 8601 UTC; observations come newest first.
+    """
+
+    server_version = "metarwarr"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        route = self.server.routes.get(url.path.rstrip("/") or "/")
+        if route is None:
+            return self._send(404, {"error": f"no such endpoint: {url.path}"})
+        try:
+            body = route(self.server, params)
+        except ValueError as e:
+            return self._send(400, {"error": str(e)})
+        except Exception:
+            log.exception("api request failed: %s", self.path)
+            return self._send(500, {"error": "internal error"})
+        if isinstance(body, FileBody):
+            return self._stream(body)
+        self._send(200, body)
+
+    def _stream(self, body):
+        # HTTP/1.0 without Content-Length: the body ends when the connection closes
+        count("api_requests", status=200)
+        self.send_response(200)
+        self.send_header("Content-Type", body.content_type)
+        self.send_header("Content-Disposition", f'attachment; filename="{body.filename}"')
+        self.end_headers()
+        blocks = iter_file(body.fileobj)
+        try:
+            for block in blocks:
+                self.wfile.write(block)
+        except (BrokenPipeError, ConnectionResetError):
+            log.debug("export download aborted by %s", self.address_string())
+        finally:
+            blocks.close()
+
+    def _send(self, status, body):
+        count("api_requests", status=status)
+        if isinstance(body, str):
+            data, content_type = body.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            data, content_type = json.dumps(body, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        log.debug("%s - %s", self.address_string(), fmt % args)
+
+
+def _health(server, params):
+    return {"status": "ok", "max_id": server.store.max_id()}
+
+
+def _stations(server, params):
+    return {"stations": server.store.stations()}
+
+
+def _latest(server, params):
+    station = params.get("station")
+    row = server.store.latest(station)
+    if row is None:
+        return {"station": station, "observation": None}
+    station = row["station"]
+    out = {"station": station, "observation": {k: _jsonable(v) for k, v in row.items()}}
+    if server.alerts is not None:
+        out["alerts"] = [{"name": r.name, "message": r.message, "risk": r.risk} for r in server.alerts.active(station)]
+        out["risk"] = server.alerts.risk(station)
+    if server.detectors is not None:
+        out["signals"] = {k: _jsonable(v) for k, v in server.detectors.signals(station).items()}
+    return out
+
+
+def _observations(server, params):
+    try:
+        limit = min(int(params.get("limit", 1000)), MAX_ROWS)
+    except ValueError:
+        raise ValueError("limit: not an integer")
+    category = params.get("category")
+    rows = server.store.query(
+        station=params.get("station"), start=_time(params, "start"), end=_time(params, "end"),
+        weather=params.get("weather"), category=category.split(",") if category else None, limit=limit,
+    )
+    return {"count": len(rows), "limit": limit, "rows": _records(rows)}
+
+
+def _rollup(server, params):
+    resolution = params.get("resolution", "hour")
+    cells = server.store.read_rollup(params.get("station"), _time(params, "start"), _time(params, "end"), resolution)
+    return {"resolution": resolution, "count": len(cells), "rows": _records(cells)}
+
+
+def _export(server, params):
+    fmt = params.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format: one of {', '.join(EXPORT_FORMATS)}")
+    ceiling = params.get("ceiling_below")
+    try:
+        ceiling = int(ceiling) if ceiling else None
+    except ValueError:
+        raise ValueError("ceiling_below: not an integer")
+    category = params.get("category")
+    out = export_file(
+        server.store, fmt, station=params.get("station"), start=_time(params, "start"), end=_time(params, "end"),
+        weather=params.get("weather"), category=category.split(",") if category else None, ceiling_below=ceiling,
+    )
+    content_type, ext = EXPORT_FORMATS[fmt]
+    return FileBody(out, content_type, f"metar_history{ext}")
+
+
+def _metrics(server, params):
+    # Spans and counters of this process: run the API inside the process you want to watch
+    return telemetry.prometheus_text()
+
+
+ROUTES = {
+    "/healthz": _health,
+    "/api/stations": _stations,
+    "/api/latest": _latest,
+    "/api/observations": _observations,
+    "/api/rollup": _rollup,
+    "/api/export": _export,
+    "/metrics": _metrics,
+}
+
+
+def make_server(store, host="127.0.0.1", port=8765, alerts=None, detectors=None):
+    # Bound to localhost by default: the API is for neighbouring systems, not the internet
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    server.store = store
+    server.alerts = alerts
+    server.detectors = detectors
+    server.routes = ROUTES
+    return server
+
+
+def serve_in_background(server):
+    thread = threading.Thread(target=server.serve_forever, name="metar-api", daemon=True)
+    thread.start()
+    return thread
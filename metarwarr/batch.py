@@ -0,0 +1,233 @@
+# metarwarr - VECTORIZED BATCH PARSER
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from metarwarr.metar import TEMP_GROUP, WX_GROUP
+
+# Same group set as metar.decode_metar, expressed as column-wide extractions
+# run by Arrow's RE2 kernels. Every pattern is anchored on token boundaries
+# so one group cannot bleed into another.
+_B = r"(?:^|\s)"
+_E = r"(?:\s|$)"
+_WX = rf"(?:[-+]|VC)?{WX_GROUP}"
+
+_PREFIX_RE = r"^(?:(?:METAR|SPECI|COR|AMD)\s+)+"
+_TAIL_RE = r"\s+(?:NOSIG|BECMG|TEMPO|RMK)(?:\s.*)?$"
+_STATION_RE = r"^(?P<station>\S+)"
+_TIME_RE = rf"{_B}(?P<day>\d{{2}})(?P<hour>\d{{2}})(?P<minute>\d{{2}})Z{_E}"
+_WIND_RE = rf"{_B}(?P<dir>\d{{3}}|VRB|///)(?P<speed>P?\d{{2,3}}|//)(?:G(?P<gust>P?\d{{2,3}}))?(?P<unit>KT|MPS|KMH){_E}"
+_WIND_VAR_RE = rf"{_B}(?P<vfrom>\d{{3}})V(?P<vto>\d{{3}}){_E}"
+_VIS_RE = rf"{_B}(?P<vis>\d{{4}})(?:NDV)?{_E}"
+_VIS_SM_RE = rf"{_B}(?P<plus>[PM]?)(?:(?P<whole>\d{{1,2}}) )?(?P<num>\d{{1,2}})(?:/(?P<den>\d{{1,2}}))?SM{_E}"
+_CAVOK_RE = rf"{_B}CAVOK{_E}"
+# Like the scalar parser, "//" (not observed) between groups is skipped
+_WEATHER_RE = rf"{_B}(?P<wx>{_WX}(?:\s(?://\s)*{_WX})*){_E}"
+_CLOUD_TYPE = r"(?:CB|TCU|///)?"
+_CEIL_RE = rf"{_B}(?:BKN|OVC)(?P<base>\d{{3}}){_CLOUD_TYPE}{_E}"
+_VV_RE = rf"{_B}VV(?P<vv>\d{{3}}){_E}"
+# Most significant cover first; the first pattern that matches wins
+_COVER_RES = [
+    ("VV", rf"{_B}VV\d{{3}}{_E}"),
+    ("OVC", rf"{_B}OVC(?:\d{{3}}|///){_CLOUD_TYPE}{_E}"),
+    ("BKN", rf"{_B}BKN(?:\d{{3}}|///){_CLOUD_TYPE}{_E}"),
+    ("SCT", rf"{_B}SCT(?:\d{{3}}|///){_CLOUD_TYPE}{_E}"),
+    ("FEW", rf"{_B}FEW(?:\d{{3}}|///){_CLOUD_TYPE}{_E}"),
+    ("NSC", rf"{_B}(?:NSC|NCD|SKC|CLR|CAVOK){_E}"),
+]
+_TEMP_RE = rf"{_B}{TEMP_GROUP}{_E}"
+_PRESS_RE = rf"{_B}(?P<unit>[QA])(?P<press>\d{{4}}){_E}"
+
+COLUMNS = [
+    "station", "day", "hour", "minute", "wind_dir", "wind_vrb", "wind_speed", "gust",
+    "wind_var_from", "wind_var_to", "vis", "cavok", "weather", "cover", "ceiling",
+    "temp", "dew", "qnh",
+]
+
+
+def _extract(arr, pattern):
+    s = pc.extract_regex(arr, pattern)
+    # struct_field (unlike .field) carries the struct's null mask for non-matching rows
+    return {f.name: pc.struct_field(s, [i]) for i, f in enumerate(s.type)}
+
+
+def _num(a):
+    # Unmatched optional groups come back as "" rather than null
+    a = pc.if_else(pc.equal(a, ""), pa.scalar(None, pa.string()), a)
+    return pc.cast(a, pa.float32()).to_numpy(zero_copy_only=False)
+
+
+def _value(a):
+    # "P" (more than) and "//" (not observed) prefixes as the scalar parser reads them
+    return _num(pc.replace_substring_regex(a, r"^P|^/+$", ""))
+
+
+def _is(a, value):
+    return pc.fill_null(pc.equal(a, value), False).to_numpy(zero_copy_only=False)
+
+
+def _knots(values, mps, kmh):
+    factor = np.where(mps, 1.943844, np.where(kmh, 1 / 1.852, 1.0))
+    return np.round(values * factor).astype("float32")
+
+
+def _parse_chunk(raw):
+    index = raw.index
+    arr = pa.array(raw.to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+    arr = pc.utf8_rtrim(pc.utf8_trim_whitespace(arr), characters="=")
+    text = pc.replace_substring_regex(arr, _PREFIX_RE, "")
+    # Trend and remarks describe the future / free text, never the observation itself
+    body = pc.replace_substring_regex(text, _TAIL_RE, "")
+    station = _extract(body, _STATION_RE)["station"]
+    body = pc.replace_substring_regex(body, r"^\S+", "")
+    out = {"station": station.to_numpy(zero_copy_only=False)}
+
+    t = _extract(body, _TIME_RE)
+    out["day"], out["hour"], out["minute"] = _num(t["day"]), _num(t["hour"]), _num(t["minute"])
+
+    w = _extract(body, _WIND_RE)
+    mps, kmh = _is(w["unit"], "MPS"), _is(w["unit"], "KMH")
+    out["wind_dir"] = _num(pc.replace_substring_regex(w["dir"], r"^\D+$", ""))
+    out["wind_vrb"] = _is(w["dir"], "VRB")
+    out["wind_speed"] = _knots(_value(w["speed"]), mps, kmh)
+    out["gust"] = _knots(_value(w["gust"]), mps, kmh)
+
+    wv = _extract(body, _WIND_VAR_RE)
+    out["wind_var_from"], out["wind_var_to"] = _num(wv["vfrom"]), _num(wv["vto"])
+
+    cavok = pc.fill_null(pc.match_substring_regex(body, _CAVOK_RE), False).to_numpy(zero_copy_only=False)
+    vis = _num(_extract(body, _VIS_RE)["vis"])
+    vis = np.where(vis == 9999, 10000, vis)
+    sm = _extract(body, _VIS_SM_RE)
+    whole, num, den = _num(sm["whole"]), _num(sm["num"]), _num(sm["den"])
+    miles = np.nan_to_num(whole) + np.where(np.isnan(den), num, num / den)
+    sm_vis = np.minimum(np.round(miles * 1609.344), 10000)
+    sm_vis[_is(sm["plus"], "P")] = 10000
+    vis = np.where(np.isnan(vis), sm_vis, vis)
+    vis[cavok] = 10000
+    out["vis"] = vis.astype("float32")
+    out["cavok"] = cavok
+
+    wx = pc.replace_substring(_extract(body, _WEATHER_RE)["wx"], " //", "")
+    wx = pc.fill_null(wx, "NIL")
+    out["weather"] = wx.to_numpy(zero_copy_only=False)
+
+    # Layers are reported lowest first, so the first BKN/OVC is the ceiling
+    ceil = _num(_extract(body, _CEIL_RE)["base"]) * 100
+    vv = _num(_extract(body, _VV_RE)["vv"]) * 100
+    out["ceiling"] = np.fmin(ceil, vv).astype("float32")
+    cover = np.full(len(index), None, dtype=object)
+    for name, pattern in reversed(_COVER_RES):
+        hit = pc.fill_null(pc.match_substring_regex(body, pattern), False).to_numpy(zero_copy_only=False)
+        cover[hit] = name
+    out["cover"] = cover
+
+    tt = _extract(body, _TEMP_RE)
+    out["temp"] = _num(pc.replace_substring(tt["tt"], "M", "-"))
+    out["dew"] = _value(pc.replace_substring(tt["td"], "M", "-"))
+
+    p = _extract(body, _PRESS_RE)
+    press = _num(p["press"])
+    out["qnh"] = np.where(_is(p["unit"], "A"), np.round(press / 100 * 33.8639), press).astype("float32")
+
+    frame = pd.DataFrame(out, index=index)
+    frame["station"] = frame["station"].astype("string")
+    frame["weather"] = frame["weather"].astype("string")
+    frame["cover"] = frame["cover"].astype("string")
+    return frame[COLUMNS]
+
+
+def _as_series(raw):
+    if isinstance(raw, pd.Series):
+        return raw
+    if isinstance(raw, (pa.Array, pa.ChunkedArray)):
+        return raw.to_pandas()
+    return pd.Series(raw, dtype=object)
+
+
+def parse_batch(raw, chunksize=250_000, processes=None):
+    """Parse many raw METARs into one typed columnar frame (index follows the input).
+
+    Accepts a pandas Series, a pyarrow array or any sequence of strings.
+    processes > 1 fans chunks out over a process pool for multi-million row archives.
+    """
+    raw = _as_series(raw)
+    if len(raw) == 0:
+        return _parse_chunk(raw)
+    chunks = [raw.iloc[i:i + chunksize] for i in range(0, len(raw), chunksize)]
+    if processes and processes > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            frames = list(pool.map(_parse_chunk, chunks))
+    else:
+        frames = [_parse_chunk(c) for c in chunks]
+    return pd.concat(frames) if len(frames) > 1 else frames[0]
+
+
+def parse_csv_archive(path, column="metar", chunksize=250_000, processes=None):
+    # Streams a large archive file so the raw column is never loaded whole
+    reader = pd.read_csv(path, usecols=[column], chunksize=chunksize)
+    chunks = (chunk[column] for chunk in reader)
+    if processes and processes > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            frames = list(pool.map(_parse_chunk, chunks))
+    else:
+        frames = [_parse_chunk(c) for c in chunks]
+    if not frames:
+        return _parse_chunk(pd.Series([], dtype=object))
+    return pd.concat(frames, ignore_index=True)
+
+
+# =========================
+# DERIVED STORE COLUMNS
+# =========================
+FLIGHT_CATEGORIES = ["VFR", "MVFR", "IFR", "LIFR"]
+
+
+def flight_category(vis, ceiling):
+    # FAA thresholds; a missing ceiling means no BKN/OVC/VV layer at all
+    vis = np.asarray(vis, dtype=np.float64)
+    ceiling = np.asarray(ceiling, dtype=np.float64)
+    v = np.where(np.isnan(vis), np.inf, vis)
+    c = np.where(np.isnan(ceiling), np.inf, ceiling)
+    out = np.select(
+        [(c < 500) | (v < 1609), (c < 1000) | (v < 4828), (c <= 3000) | (v <= 8047)],
+        ["LIFR", "IFR", "MVFR"],
+        "VFR",
+    ).astype(object)
+    out[np.isnan(vis) & np.isnan(ceiling)] = None
+    return out
+
+
+def derive_columns(raw):
+    """Columns the history store keeps next to each raw report, for filtering."""
+    from metarwarr.derived import derive_quantities
+    from metarwarr.runway import runway_components
+
+    parsed = parse_batch(raw)
+    weather = parsed["weather"].astype(object)
+    frame = pd.DataFrame({
+        "weather": weather.where(weather != "NIL", None),
+        "flight_category": flight_category(parsed["vis"], parsed["ceiling"]),
+        "temp": parsed["temp"].astype("float64"),
+        "qnh": parsed["qnh"].astype("float64"),
+    }, index=parsed.index)
+    wind = runway_components(
+        parsed["station"].to_numpy(dtype=object), parsed["wind_dir"].to_numpy(), parsed["wind_speed"].to_numpy(),
+        parsed["gust"].to_numpy(), parsed["wind_vrb"].to_numpy(),
+    )
+    wind.index = parsed.index
+    quantities = derive_quantities(
+        parsed["station"].to_numpy(dtype=object), parsed["temp"].to_numpy(), parsed["dew"].to_numpy(),
+        parsed["qnh"].to_numpy(),
+    )
+    quantities.index = parsed.index
+    raw = parsed[["wind_dir", "wind_vrb", "wind_speed", "gust", "dew", "vis", "ceiling"]].astype(
+        {"wind_dir": "float64", "wind_speed": "float64", "gust": "float64", "dew": "float64", "vis": "float64",
+         "ceiling": "float64"}
+    )
+    cover = parsed["cover"].astype(object)
+    frame["cover"] = cover.where(cover.notna(), None)
+    return pd.concat([frame, wind, raw, quantities], axis=1)
@@ -0,0 +1,552 @@
+# metarwarr - BENCHMARK SUITE
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+SCHEMA = 1
+SIZES = (1000, 100_000, 1_000_000)
+QUICK_SIZES = (1000, 10_000)
+STATIONS = ["WARR", "WIII", "WADD", "KJFK", "KORD", "EGLL", "UUEE"]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Hard ceilings in ms, checked on every run whatever the baseline: one live
+# report must stay cheap to store however long the history is
+BUDGETS = {
+    "store.append_one": 40.0,
+    "store.aggregates_one": 10.0,
+}
+
+# =========================
+# SYNTHETIC CORPUS
+# =========================
+_PRECIP = ["DZ", "RA", "SN", "SG", "IC", "PL", "GR", "GS", "UP"]
+_OBSCURATION = ["BR", "FG", "FU", "VA", "DU", "SA", "HZ", "PY"]
+_OTHER = ["PO", "SQ", "FC", "SS", "DS"]
+_SM = ["P6SM", "10SM", "6SM", "3SM", "1 1/2SM", "1SM", "3/4SM", "1/2SM", "1/4SM", "M1/4SM"]
+_TRENDS = ["NOSIG", "BECMG 3000 BR", "TEMPO FM1230 TL1400 -TSRA", "BECMG NSW", "TEMPO 4000 SHRA BKN015CB",
+           "BECMG FM0600 24015G25KT"]
+_REMARKS = ["RMK AO2 SLP132 T02830239", "RMK AO2 PK WND 28045/15 RAB05", "RMK CB TO SW", "RMK QFE755"]
+
+
+def _wind(rng, us):
+    unit = "KT" if us else rng.choice(["KT", "KT", "KT", "MPS", "KMH"])
+    kind = rng.random()
+    if kind < 0.08:
+        group = "00000" + unit
+    elif kind < 0.18:
+        group = f"VRB{rng.randint(1, 5):02d}{unit}"
+    elif kind < 0.21:
+        group = "/////" + unit
+    elif kind < 0.23:
+        # Three-digit speeds and gusts, P for beyond the scale
+        group = f"{rng.randrange(10, 370, 10):03d}{rng.randint(100, 130):03d}G{rng.choice(['140', 'P99'])}{unit}"
+    else:
+        speed = rng.randint(2, 35)
+        gust = f"G{speed + rng.randint(10, 25):02d}" if rng.random() < 0.2 else ""
+        group = f"{rng.randrange(10, 370, 10):03d}{speed:02d}{gust}{unit}"
+    if rng.random() < 0.12 and group[:3].isdigit():
+        lo = rng.randrange(0, 360, 10)
+        group += f" {lo:03d}V{(lo + rng.randrange(60, 180, 10)) % 360:03d}"
+    return group
+
+
+def _visibility(rng, us):
+    if us:
+        return rng.choice(_SM)
+    kind = rng.random()
+    if kind < 0.45:
+        return "9999"
+    if kind < 0.5:
+        return f"{rng.choice([1500, 3000, 5000])}NDV"
+    if kind < 0.55:
+        return f"{rng.choice([4000, 6000])} {rng.choice(['1500SW', '2000N', '0800NE'])}"
+    return f"{rng.choice([50, 200, 400, 800, 1200, 2000, 3500, 5000, 8000]):04d}"
+
+
+def _rvr(rng, us):
+    rwy = f"R{rng.randint(1, 36):02d}{rng.choice(['', 'L', 'R', 'C'])}"
+    unit = "FT" if us else ""
+    kind = rng.random()
+    if kind < 0.3:
+        return f"{rwy}/P{rng.choice([1500, 2000, 6000]):04d}{unit}"
+    if kind < 0.5:
+        return f"{rwy}/M{rng.choice([50, 150, 600]):04d}{unit}"
+    if kind < 0.7:
+        lo = rng.choice([300, 600, 1200])
+        return f"{rwy}/{lo:04d}V{lo * 2:04d}{unit}{rng.choice(['', 'U', 'D', 'N'])}"
+    return f"{rwy}/{rng.choice([350, 550, 900, 1400]):04d}{unit}{rng.choice(['', '/U', 'D', 'N'])}"
+
+
+def _weather(rng):
+    if rng.random() < 0.03:
+        return "//"
+    kind = rng.random()
+    intensity = rng.choice(["", "", "-", "+"])
+    if kind < 0.35:
+        return intensity + rng.choice(["", "SH", "TS", "FZ"]) + "".join(rng.sample(_PRECIP, rng.randint(1, 2)))
+    if kind < 0.55:
+        return rng.choice(_OBSCURATION) if rng.random() < 0.7 else rng.choice(["MIFG", "BCFG", "PRFG", "FZFG"])
+    if kind < 0.7:
+        return "VC" + rng.choice(["SH", "TS", "FG", "PO", "SS", "DS", "BLDU"])
+    if kind < 0.8:
+        return intensity + rng.choice(["TS", "TSRA", "TSGR", "TSRAGS"])
+    if kind < 0.9:
+        return rng.choice(["DR", "BL"]) + rng.choice(["SN", "SA", "DU"])
+    return intensity + rng.choice(_OTHER) if rng.random() < 0.5 else rng.choice(_OTHER)
+
+
+def _clouds(rng, us):
+    kind = rng.random()
+    if kind < 0.12:
+        return rng.choice(["CLR", "SKC"] if us else ["NSC", "NCD", "SKC"])
+    if kind < 0.16:
+        return f"VV{rng.choice(['001', '002', '005', '///'])}"
+    layers, base = [], rng.randint(2, 40)
+    for cover in sorted(rng.sample(["FEW", "SCT", "BKN", "OVC"], rng.randint(1, 3)),
+                        key=["FEW", "SCT", "BKN", "OVC"].index):
+        kind = rng.random()
+        suffix = "CB" if kind < 0.1 else "TCU" if kind < 0.18 else "///" if kind < 0.2 else ""
+        layers.append(f"{cover}{base:03d}{suffix}" if kind > 0.02 else f"{cover}///")
+        base += rng.randint(5, 80)
+    return " ".join(layers)
+
+
+def _temperature(rng):
+    if rng.random() < 0.03:
+        return f"{rng.randint(10, 30):02d}/"
+    temp = rng.randint(-35, 42)
+    dew = temp - rng.randint(0, 15)
+
+    def fmt(v):
+        return f"M{-v:02d}" if v < 0 else f"{v:02d}"
+
+    # M00 is a real report: just below zero, rounded
+    return f"{'M00' if temp == 0 and rng.random() < 0.3 else fmt(temp)}/{fmt(dew)}"
+
+
+def synthetic_body(rng, us=False):
+    """Everything after DDHHMMZ for one random but well-formed report (or an edge case)."""
+    kind = rng.random()
+    if kind < 0.01:
+        return "NIL"
+    if kind < 0.06:
+        return "AUTO /////KT //// // ////// ///// Q////"
+    groups = [_wind(rng, us)]
+    if not us and rng.random() < 0.12:
+        groups.append("CAVOK")
+    else:
+        groups.append(_visibility(rng, us))
+        if rng.random() < 0.08:
+            groups.extend(_rvr(rng, us) for _ in range(rng.randint(1, 2)))
+        if rng.random() < 0.35:
+            groups.extend(_weather(rng) for _ in range(rng.randint(1, 3)))
+        groups.append(_clouds(rng, us))
+    if rng.random() < 0.98:
+        groups.append(_temperature(rng))
+    if rng.random() < 0.98:
+        groups.append(f"A{rng.randint(2850, 3100)}" if us else f"Q{rng.randint(960, 1045):04d}")
+    if rng.random() < 0.06:
+        groups.append(f"RE{rng.choice(['TSRA', 'SHRA', 'RA', 'FZDZ', 'SN'])}")
+    if rng.random() < 0.03:
+        groups.append(rng.choice(["WS R10", "WS ALL RWY", "WS R28L"]))
+    if rng.random() < 0.03:
+        groups.append(rng.choice(["R10/290195", "R/SNOCLO", "R28L/CLRD70"]))
+    if not us:
+        groups.append(rng.choice(_TRENDS))
+    if us or rng.random() < 0.1:
+        groups.append(rng.choice(_REMARKS))
+    body = " ".join(groups)
+    if rng.random() < 0.02:
+        # Cut short on the wire, anywhere past the wind group
+        body = body[:rng.randint(len(groups[0]), len(body))]
+    return body
+
+
+def synthetic_metar(rng, station, obs_time, body=None):
+    """One report for ``station`` at ``obs_time``: prefix, modifiers and framing vary as they do on the feed."""
+    us = station.startswith("K")
+    if body is None:
+        body = synthetic_body(rng, us)
+    kind = rng.random()
+    prefix = "METAR " if kind < 0.2 else "SPECI " if kind < 0.25 else ""
+    mod = "COR " if rng.random() < 0.02 else "AMD " if rng.random() < 0.01 else ""
+    auto = "AUTO " if us and rng.random() < 0.3 and not body.startswith(("AUTO", "NIL")) else ""
+    metar = f"{prefix}{station} {mod}{obs_time:%d%H%M}Z {auto}{body}"
+    end = rng.random()
+    if end < 0.05:
+        metar += "="
+    elif end < 0.07:
+        metar = metar.replace(" ", "  ", 2)
+    return metar
+
+
+def synthetic_corpus(n, stations=STATIONS, seed=0, end=None, step=timedelta(minutes=30), pool=5000):
+    """``n`` store rows (station, obs_time, time, metar), oldest first, one per station per ``step``.
+
+    Bodies are drawn from a pool of ``pool`` per style (metric / US) so
+    million-row histories build in seconds; station, time and framing are
+    still unique per row, so no two rows share a store key.
+    """
+    rng = random.Random(seed)
+    stations = list(stations)
+    bodies = {us: [synthetic_body(rng, us) for _ in range(min(n, pool))] for us in (False, True)}
+    end = end or datetime.utcnow().replace(second=0, microsecond=0)
+    end -= timedelta(minutes=end.minute % 10)
+    per_station = -(-n // len(stations))
+    rows = []
+    for k in range(per_station):
+        obs_time = end - step * (per_station - 1 - k)
+        received = str(obs_time + timedelta(minutes=2))
+        for station in stations:
+            if len(rows) == n:
+                break
+            body = rng.choice(bodies[station.startswith("K")])
+            rows.append({"station": station, "obs_time": obs_time, "time": received,
+                         "metar": synthetic_metar(rng, station, obs_time, body)})
+    return rows
+
+
+# =========================
+# TIMING
+# =========================
+def _timed(fn, repeat, warmup=1):
+    for _ in range(warmup):
+        fn()
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return runs
+
+
+def _record(results, name, value, unit, better, runs=None, **extra):
+    results[name] = dict(value=round(float(value), 4), unit=unit, better=better, **extra)
+    if runs is not None:
+        results[name]["runs_s"] = [round(r, 6) for r in runs]
+    print(f"  {name:<40} {value:>14,.2f} {unit}", file=sys.stderr)
+
+
+def _throughput(results, name, n, runs, **extra):
+    _record(results, name, n / statistics.median(runs), "reports/s", "higher", runs, n=n, **extra)
+
+
+def _latency(results, name, runs, **extra):
+    _record(results, name, statistics.median(runs) * 1000, "ms", "lower", runs, **extra)
+
+
+# =========================
+# PARSERS
+# =========================
+def bench_parsers(results, n=20000, repeat=5, seed=0):
+    from metarwarr.batch import derive_columns, parse_batch
+    from metarwarr.metar import parse_metar
+
+    reports = [r["metar"] for r in synthetic_corpus(n, seed=seed, pool=n)]
+    series = pd.Series(reports, dtype=object)
+    _throughput(results, "parse.parse_metar", n, _timed(lambda: [parse_metar(m) for m in reports], repeat))
+    _throughput(results, "parse.parse_batch", n, _timed(lambda: parse_batch(series), repeat))
+    _throughput(results, "parse.derive_columns", n, _timed(lambda: derive_columns(series), repeat))
+
+
+# =========================
+# HISTORY STORE vs CSV REWRITE
+# =========================
+def _legacy_row(row):
+    return {"time": row["time"], "metar": row["metar"], "temp": None, "qnh": None}
+
+
+def build_history(workdir, size, station="WARR", seed=0, extra=50, chunksize=50000, results=None):
+    """Seed ``workdir`` with a ``size``-row metar_history.db and the same rows as a legacy CSV.
+
+    Returns ``extra`` newer rows, not yet stored, for the append benchmarks.
+    """
+    from metarwarr.history_store import SQLiteHistoryStore
+
+    rows = synthetic_corpus(size + extra, stations=[station], seed=seed, step=timedelta(minutes=10))
+    seeded, spare = rows[:size], rows[size:]
+    store = SQLiteHistoryStore(os.path.join(workdir, "metar_history.db"))
+    t0 = time.perf_counter()
+    for i in range(0, size, chunksize):
+        store.append(seeded[i:i + chunksize])
+    elapsed = time.perf_counter() - t0
+    store.close()
+    pd.DataFrame([_legacy_row(r) for r in seeded]).to_csv(os.path.join(workdir, "legacy.csv"), index=False)
+    if results is not None:
+        _throughput(results, f"store.append_batch@{size}", size, [elapsed])
+    return spare
+
+
+def bench_history(results, workdir, size, spare, station="WARR", repeat=5):
+    from metarwarr.history_store import SQLiteHistoryStore
+    from metarwarr.telemetry import telemetry
+
+    store = SQLiteHistoryStore(os.path.join(workdir, "metar_history.db"))
+    csv_path = os.path.join(workdir, "legacy.csv")
+    pending = iter(spare)
+    # One new report per poll: the live ingest path
+    telemetry.reset()
+    _latency(results, f"store.append_one@{size}", _timed(lambda: store.append([next(pending)]), repeat * 4))
+    # Rollup and climatology upkeep inside those appends, from the store's own span
+    aggregates = telemetry.snapshot()[0]["store.aggregates"]
+    _record(results, f"store.aggregates_one@{size}", aggregates["p50"] * 1000, "ms", "lower")
+
+    # What the dashboard did before the store: keep the frame, rewrite the whole file per report
+    df = pd.read_csv(csv_path)
+    csv_repeat = repeat if size < 1_000_000 else 2
+
+    def rewrite():
+        df.loc[len(df)] = _legacy_row(next(pending))
+        df.to_csv(csv_path, index=False)
+
+    _latency(results, f"csv.append_one@{size}", _timed(rewrite, csv_repeat))
+
+    end = store.time_range(station)[1]
+    start = end - timedelta(hours=24)
+    _latency(results, f"store.read_24h@{size}", _timed(lambda: store.read_range(station, start, end), repeat))
+
+    def csv_window():
+        frame = pd.read_csv(csv_path)
+        t = pd.to_datetime(frame["time"])
+        return frame[(t >= start) & (t <= end + timedelta(minutes=2))]
+
+    _latency(results, f"csv.read_24h@{size}", _timed(csv_window, csv_repeat))
+    full = store.count(station)
+    _throughput(results, f"store.read_all@{size}", full, _timed(lambda: store.read_range(station), csv_repeat))
+    _throughput(results, f"csv.read_all@{size}", len(df), _timed(lambda: pd.read_csv(csv_path), csv_repeat))
+    store.close()
+
+
+# =========================
+# DASHBOARD RERUN
+# =========================
+def _standin(seed=0):
+    # Local NOAA on a frozen clock: the worker's fetch never leaves the machine and always sees the same file
+    from metarwarr.replay import Corpus, SimClock, StandInServer
+
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(second=0, microsecond=0)
+    corpus = Corpus([synthetic_body(rng) for _ in range(48)], ["WARR"], now - timedelta(hours=24), timedelta(hours=24))
+    return StandInServer(corpus, SimClock(now, speed=0)).start()
+
+
+def _render(workdir, app_path, reruns):
+    # Runs in a fresh interpreter so st.cache_resource and the ingest worker start clean per size
+    import shutil
+
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    from metarwarr.replay import STATION_PATH
+
+    server = _standin()
+    # Time the script, not the update watcher's idle long-poll; poll the stand-in and send nothing
+    os.environ["METARWARR_WATCH_SECONDS"] = "0.01"
+    os.environ["METARWARR_NOAA_URL"] = server.base_url + STATION_PATH
+    os.environ["METARWARR_NOTIFY"] = "0"
+    from streamlit import config
+    from streamlit.logger import set_log_level
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(workdir)
+    try:
+        at = AppTest.from_file(shutil.copy(app_path, os.path.join(workdir, "app.py")), default_timeout=1800)
+        # Deprecation chatter would otherwise be logged on every run
+        config.set_option("logger.level", "error")
+        set_log_level("error")
+        t0 = time.perf_counter()
+        at.run()
+        cold = time.perf_counter() - t0
+        if at.exception:
+            return {"error": at.exception[0].message}
+        warm = []
+        for _ in range(reruns):
+            t0 = time.perf_counter()
+            at.run()
+            warm.append(time.perf_counter() - t0)
+        return {"cold": cold, "warm": warm}
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def bench_dashboard(results, workdir, size, app_path, reruns=5):
+    import multiprocessing
+
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        out = pool.apply(_render, (workdir, app_path, reruns))
+    if "error" in out:
+        results[f"dashboard.error@{size}"] = {"error": out["error"]}
+        print(f"  dashboard@{size} failed: {out['error']}", file=sys.stderr)
+        return
+    _latency(results, f"dashboard.first_run@{size}", [out["cold"]])
+    _latency(results, f"dashboard.rerun@{size}", out["warm"])
+
+
+# =========================
+# RESULTS
+# =========================
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def environment():
+    import importlib.metadata as md
+
+    versions = {}
+    for name in ("numpy", "pandas", "pyarrow", "streamlit"):
+        try:
+            versions[name] = md.version(name)
+        except md.PackageNotFoundError:
+            versions[name] = None
+    return {
+        "commit": _git("rev-parse", "HEAD") or None,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "sqlite": __import__("sqlite3").sqlite_version,
+        "packages": versions,
+    }
+
+
+def run_benchmarks(sizes=SIZES, parse_n=20000, repeat=5, reruns=5, dashboard=True, app_path=None, seed=0):
+    """Run every benchmark and return a JSON-able dict: ``{"schema", "env", "config", "results", "over_budget"}``.
+
+    Each result is keyed ``group.metric[@history_rows]`` and carries its
+    ``value``, ``unit``, which direction is ``better`` and the raw runs, so
+    two files from different commits can be compared name by name.
+    """
+    app_path = app_path or os.path.join(ROOT, "app.py")
+    results = {}
+    print("parsers", file=sys.stderr)
+    bench_parsers(results, parse_n, repeat, seed)
+    for size in sizes:
+        print(f"history {size:,} rows", file=sys.stderr)
+        with tempfile.TemporaryDirectory(prefix="metarwarr-bench-") as workdir:
+            spare = build_history(workdir, size, seed=seed, extra=repeat * 6 + 2, results=results)
+            if dashboard:
+                bench_dashboard(results, workdir, size, app_path, reruns)
+            bench_history(results, workdir, size, spare, repeat=repeat)
+    return {
+        "schema": SCHEMA,
+        "env": environment(),
+        "config": {"sizes": list(sizes), "parse_n": parse_n, "repeat": repeat, "reruns": reruns,
+                   "dashboard": dashboard, "seed": seed},
+        "results": results,
+        "over_budget": [{"name": n, "value": v, "budget": b} for n, v, b in over_budget(results)],
+    }
+
+
+def over_budget(results):
+    """(name, value, budget) for every result above its BUDGETS ceiling."""
+    over = []
+    for name, row in results.items():
+        budget = BUDGETS.get(name.split("@")[0])
+        if budget is not None and row.get("value", 0) > budget:
+            over.append((name, row["value"], budget))
+    return over
+
+
+def compare(old, new, threshold=0.1):
+    """Rows of (name, old, new, change, regressed) for every metric both result sets have.
+
+    ``change`` is the relative improvement (positive is better whichever
+    way the metric points); a drop beyond ``threshold`` counts as a regression
+    unless the two sets of runs overlap.
+    """
+    rows = []
+    for name, cur in new["results"].items():
+        prev = old["results"].get(name)
+        if not prev or "value" not in prev or "value" not in cur or not prev["value"]:
+            continue
+        ratio = cur["value"] / prev["value"]
+        change = ratio - 1 if cur["better"] == "higher" else 1 / ratio - 1 if ratio else float("inf")
+        # Same workload and overlapping run times: within noise, whatever the medians say
+        a, b = prev.get("runs_s") or [], cur.get("runs_s") or []
+        noise = len(a) > 1 and len(b) > 1 and prev.get("n") == cur.get("n") and min(b) <= max(a)
+        rows.append((name, prev["value"], cur["value"], change, change < -threshold and not noise))
+    return rows
+
+
+def print_comparison(rows, old, new, out=sys.stderr):
+    def label(run):
+        env = run["env"]
+        return (env.get("commit") or "?")[:10] + ("+" if env.get("dirty") else "")
+
+    if old.get("config") != new.get("config"):
+        print(f"note: configs differ, {old.get('config')} vs {new.get('config')}", file=out)
+    if (old["env"].get("platform"), old["env"].get("cpus")) != (new["env"].get("platform"), new["env"].get("cpus")):
+        print("note: results come from different machines", file=out)
+    print(f"{'benchmark':<40} {label(old):>14} {label(new):>14} {'change':>8}", file=out)
+    for name, prev, cur, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<40} {prev:>14,.2f} {cur:>14,.2f} {change:>+8.1%}{flag}", file=out)
+
+
+# =========================
+# CLI
+# =========================
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Benchmark parsing, the history store against the legacy CSV rewrite, "
+                                             "and dashboard reruns; writes JSON results comparable between commits")
+    ap.add_argument("--sizes", type=lambda s: [int(x) for x in s.split(",")],
+                    help=f"history rows per store/dashboard run (default {','.join(map(str, SIZES))})")
+    ap.add_argument("--quick", action="store_true",
+                    help=f"small run for a quick check: sizes {','.join(map(str, QUICK_SIZES))}, fewer reports")
+    ap.add_argument("--parse-n", type=int, help="synthetic reports per parser run (default 20000)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--reruns", type=int, default=5, help="warm dashboard reruns per size")
+    ap.add_argument("--no-dashboard", action="store_true", help="skip the Streamlit rerun benchmark")
+    ap.add_argument("--app", help="dashboard script (default app.py next to the package)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--output", "-o", help="write results JSON here instead of stdout")
+    ap.add_argument("--compare", metavar="BASELINE", help="results JSON from another commit to compare against")
+    ap.add_argument("--threshold", type=float, default=0.1,
+                    help="relative drop that counts as a regression (default 0.1)")
+    ap.add_argument("--corpus", type=int, metavar="N", help="only print N synthetic METARs and exit")
+    args = ap.parse_args(argv)
+
+    if args.corpus:
+        for row in synthetic_corpus(args.corpus, seed=args.seed, pool=args.corpus):
+            print(row["metar"])
+        return 0
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else SIZES)
+    parse_n = args.parse_n or (2000 if args.quick else 20000)
+    result = run_benchmarks(sizes, parse_n, args.repeat, args.reruns, not args.no_dashboard, args.app, args.seed)
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    failed = False
+    for row in result["over_budget"]:
+        print(f"OVER BUDGET {row['name']}: {row['value']:,.2f} ms > {row['budget']:,.2f} ms", file=sys.stderr)
+        failed = True
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(baseline, result, args.threshold)
+        print_comparison(rows, baseline, result)
+        failed = failed or any(r[-1] for r in rows)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
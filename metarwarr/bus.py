@@ -0,0 +1,110 @@
+# metarwarr - CHANGE NOTIFICATION BUS
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+
+class VersionBus:
+    """Monotonic observation version per station that readers can block on.
+
+    The ingest worker publishes once per new report; sessions remember the
+    version they rendered and ``wait`` until it moves instead of polling NOAA
+    or the store on a timer.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._versions = {}
+
+    def version(self, station):
+        with self._cond:
+            return self._versions.get(station, 0)
+
+    def publish(self, station, version=None):
+        # version is given by shared backends; a local publish just increments
+        with self._cond:
+            current = self._versions.get(station, 0)
+            new = current + 1 if version is None else max(current, int(version))
+            if new != current:
+                self._versions[station] = new
+                self._cond.notify_all()
+            return new
+
+    def wait(self, station, since, timeout=None):
+        # Returns as soon as the version passes ``since``, or at the timeout
+        with self._cond:
+            self._cond.wait_for(lambda: self._versions.get(station, 0) > since, timeout)
+            return self._versions.get(station, 0)
+
+    def close(self):
+        pass
+
+
+class RedisBus(VersionBus):
+    """Versions shared between replicas through a Redis-compatible server.
+
+    Counters live in ``{prefix}{station}`` (INCR keeps them monotonic across
+    processes) and every bump is announced on ``channel``; a listener thread
+    feeds announcements into the local condition so ``wait`` stays in-process.
+    ``url`` accepts redis://, rediss:// and unix:// (local socket) forms.
+    """
+
+    def __init__(self, url, channel="metarwarr:versions", prefix="metarwarr:version:"):
+        import redis
+
+        super().__init__()
+        self.channel = channel
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(channel)
+        self._stop = threading.Event()
+        self._sync()
+        self._thread = threading.Thread(target=self._listen, name="metar-bus", daemon=True)
+        self._thread.start()
+
+    def publish(self, station, version=None):
+        if version is None:
+            version = self._redis.incr(self.prefix + station)
+            self._redis.publish(self.channel, f"{station} {version}")
+        return super().publish(station, version)
+
+    def _sync(self):
+        # Catch up on counters bumped while we were not subscribed
+        for key in self._redis.scan_iter(match=self.prefix + "*"):
+            value = self._redis.get(key)
+            if value is not None:
+                super().publish(key.decode()[len(self.prefix):], int(value))
+
+    def _listen(self):
+        while not self._stop.is_set():
+            try:
+                msg = self._pubsub.get_message(timeout=1.0)
+                if msg is None:
+                    continue
+                station, version = msg["data"].decode().split()
+                super().publish(station, int(version))
+            except Exception:
+                log.exception("bus listener error, resyncing")
+                if self._stop.wait(1.0):
+                    break
+                try:
+                    self._sync()
+                except Exception:
+                    pass
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(2)
+        self._pubsub.close()
+        self._redis.close()
+
+
+def open_bus(url=None):
+    # No URL: in-process only, which is all a single dashboard process needs
+    if not url:
+        return VersionBus()
+    if url.split("://", 1)[0] in ("redis", "rediss", "unix"):
+        return RedisBus(url)
+    raise ValueError(f"unsupported bus url: {url}")
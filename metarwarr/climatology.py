@@ -0,0 +1,104 @@
+# metarwarr - WIND CLIMATOLOGY
+import numpy as np
+import pandas as pd
+
+SECTORS = 16
+SECTOR_LABELS = ["N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE",
+                 "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"]
+# Lower edges in knots; anything below the first edge is calm
+SPEED_BANDS = [1, 6, 11, 16, 22, 28, 34]
+BAND_LABELS = ["Calm", "1-5", "6-10", "11-15", "16-21", "22-27", "28-33", "34+"]
+# Extra sector slot for calm and VRB wind, which have no direction
+NO_DIRECTION = SECTORS
+SHAPE = (12, 24, SECTORS + 1, len(SPEED_BANDS) + 1)
+
+
+def wind_bins(obs_time, wind_dir, speed, vrb):
+    """(month, hour, sector, band) indices for each observation, plus a validity mask."""
+    t = pd.to_datetime(np.asarray(obs_time, dtype=np.int64), unit="s")
+    wind_dir = np.asarray(wind_dir, dtype=np.float64)
+    speed = np.asarray(speed, dtype=np.float64)
+    vrb = np.asarray(vrb, dtype=bool)
+    band = np.searchsorted(SPEED_BANDS, np.nan_to_num(speed), side="right")
+    sector = np.floor(((np.nan_to_num(wind_dir) + 360 / SECTORS / 2) % 360) / (360 / SECTORS)).astype(np.int64)
+    sector = np.where(vrb | (band == 0) | np.isnan(wind_dir), NO_DIRECTION, sector)
+    valid = ~np.isnan(speed)
+    return np.asarray(t.month) - 1, np.asarray(t.hour), sector, band, valid
+
+
+class WindCounts:
+    """Sector x speed-band counts per station, month and hour, kept in SQLite.
+
+    Each observation bumps exactly one cell, so ingest cost does not grow
+    with history; the climatology view loads the cells instead of rescanning
+    raw reports.
+    """
+
+    table = "wind_counts"
+    columns = ["station", "month", "hour", "sector", "band", "n"]
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS wind_counts (
+        station TEXT NOT NULL,
+        month INTEGER NOT NULL,
+        hour INTEGER NOT NULL,
+        sector INTEGER NOT NULL,
+        band INTEGER NOT NULL,
+        n INTEGER NOT NULL,
+        PRIMARY KEY (station, month, hour, sector, band)
+    ) WITHOUT ROWID;
+    """
+
+    def apply(self, conn, obs, sign=1):
+        # obs: station, obs_time (epoch s), wind_dir, wind_speed and optionally wind_vrb;
+        # stored rows have no wind_vrb, but VRB already lands in NO_DIRECTION via its NaN direction
+        if not len(obs):
+            return
+        vrb = obs["wind_vrb"] if "wind_vrb" in obs else np.zeros(len(obs), dtype=bool)
+        month, hour, sector, band, valid = wind_bins(obs["obs_time"], obs["wind_dir"], obs["wind_speed"], vrb)
+        cells = pd.DataFrame({
+            "station": np.asarray(obs["station"], dtype=object), "month": month + 1, "hour": hour,
+            "sector": sector, "band": band,
+        })[valid]
+        grouped = cells.groupby(list(cells.columns), sort=False).size()
+        conn.executemany(
+            "INSERT INTO wind_counts (station, month, hour, sector, band, n) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (station, month, hour, sector, band) DO UPDATE SET n = n + excluded.n",
+            [(s, int(m), int(h), int(sec), int(b), sign * int(n)) for (s, m, h, sec, b), n in grouped.items()],
+        )
+
+    def replace(self, conn, old, new):
+        # A corrected report moves its count from the old cell to the new one
+        self.apply(conn, old, sign=-1)
+        self.apply(conn, new)
+        conn.execute("DELETE FROM wind_counts WHERE n <= 0")
+
+
+def counts_array(cells):
+    """Rows of wind_counts -> int64 array shaped (month, hour, sector, band)."""
+    out = np.zeros(SHAPE, dtype=np.int64)
+    if len(cells):
+        np.add.at(out, (cells["month"].to_numpy() - 1, cells["hour"].to_numpy(),
+                        cells["sector"].to_numpy(), cells["band"].to_numpy()), cells["n"].to_numpy())
+    return out
+
+
+def windrose_table(counts, months=None, hours=None):
+    """Frequency (%) per direction sector and speed band, ready for a polar bar chart.
+
+    ``months`` are 1-12 and ``hours`` 0-23; None keeps all. Calm and VRB
+    counts are left out of the sectors and reported separately as ``calm``.
+    """
+    sub = counts
+    if months is not None:
+        sub = sub[np.asarray(months, dtype=np.int64) - 1]
+    if hours is not None:
+        sub = sub[:, np.asarray(hours, dtype=np.int64)]
+    grid = sub.sum(axis=(0, 1))
+    total = grid.sum()
+    if total == 0:
+        return pd.DataFrame(columns=["sector", "band", "frequency"]), 0.0
+    freq = grid[:SECTORS, 1:] * 100.0 / total
+    table = pd.DataFrame(freq, index=SECTOR_LABELS, columns=BAND_LABELS[1:])
+    table = table.rename_axis(index="sector", columns="band").stack().rename("frequency").reset_index()
+    calm = grid[NO_DIRECTION].sum() * 100.0 / total
+    return table, calm
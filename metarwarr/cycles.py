@@ -0,0 +1,102 @@
+# metarwarr - NOAA CYCLE FILE INGEST
+import json
+import re
+from datetime import datetime, timedelta
+
+import requests
+
+from metarwarr.telemetry import count, span
+
+NOAA_CYCLE_URL = "https://tgftp.nws.noaa.gov/data/observations/metar/cycles/{hour:02d}Z.TXT"
+STATE_KEY = "cycles"
+
+_STAMP_RE = re.compile(r"^\d{4}/\d{2}/\d{2} \d{2}:\d{2}$")
+
+
+def cycle_hours(now):
+    # Late reports keep landing in the previous hour's file
+    prev = now - timedelta(hours=1)
+    return [(prev.hour, prev.date().isoformat()), (now.hour, now.date().isoformat())]
+
+
+def parse_record(record):
+    lines = [l.strip() for l in record.decode("ascii", "replace").split("\n") if l.strip()]
+    if not lines:
+        return None
+    stamp = None
+    if _STAMP_RE.match(lines[0]):
+        stamp = datetime.strptime(lines[0], "%Y/%m/%d %H:%M")
+        lines = lines[1:]
+    report = " ".join(lines).rstrip("=").strip()
+    tokens = report.split()
+    if tokens and tokens[0] in ("METAR", "SPECI"):
+        tokens = tokens[1:]
+        report = " ".join(tokens)
+    # "METAR COR WARR ..." puts the correction flag ahead of the station; the report keeps it
+    station = next((t for t in tokens if t not in ("COR", "AMD")), None)
+    if station is None:
+        return None
+    return station, report, stamp
+
+
+class CycleFileReader:
+    """Incremental reader for hourly cycle files; only the appended tail is downloaded."""
+
+    def __init__(self, url_template=NOAA_CYCLE_URL, timeout=(3.05, 30), chunk_size=65536, session=None):
+        self.url_template = url_template
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.session = session or requests.Session()
+
+    def read_tail(self, hour, offset, allow=None):
+        # Returns (reports, new_offset); a partial last record stays unconsumed
+        url = self.url_template.format(hour=hour)
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        with span("fetch.cycle"), self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as r:
+            count("fetch_responses", status=r.status_code)
+            if r.status_code == 416:
+                # File was rotated and is now shorter than what we consumed
+                count("cycle_rotations")
+                return [], 0
+            if r.status_code not in (200, 206):
+                return [], offset
+            skip = offset if (offset and r.status_code == 200) else 0
+            consumed = offset
+            reports, buf = [], b""
+            for chunk in r.iter_content(self.chunk_size):
+                if skip:
+                    if len(chunk) <= skip:
+                        skip -= len(chunk)
+                        continue
+                    chunk, skip = chunk[skip:], 0
+                buf += chunk
+                start = 0
+                while True:
+                    end = buf.find(b"\n\n", start)
+                    if end < 0:
+                        break
+                    rec = parse_record(buf[start:end])
+                    if rec is not None and (allow is None or rec[0] in allow):
+                        reports.append(rec)
+                    start = end + 2
+                consumed += start
+                buf = buf[start:]
+        return reports, consumed
+
+    def read_new(self, state_text=None, allow=None, now=None):
+        # state_text is the JSON blob persisted by the store: {"HH": {"date": ..., "offset": ...}}
+        state = json.loads(state_text) if state_text else {}
+        allow = set(allow) if allow else None
+        reports = []
+        for hour, day in cycle_hours(now or datetime.utcnow()):
+            key = f"{hour:02d}"
+            entry = state.get(key)
+            offset = entry["offset"] if entry and entry.get("date") == day else 0
+            try:
+                got, offset = self.read_tail(hour, offset, allow)
+            except requests.RequestException:
+                count("fetch_responses", status="error")
+                continue
+            reports.extend(got)
+            state[key] = {"date": day, "offset": offset}
+        return reports, json.dumps(state, sort_keys=True)
@@ -0,0 +1,55 @@
+# metarwarr - DERIVED METEOROLOGICAL QUANTITIES
+import numpy as np
+import pandas as pd
+
+# Aerodrome elevation in feet, for pressure and density altitude
+ELEVATIONS = {
+    "WARR": 9,
+}
+
+DERIVED_QUANTITIES = ["rh", "dewpoint_depression", "pressure_altitude", "density_altitude"]
+
+
+def relative_humidity(temp, dew):
+    """RH in percent from temperature and dew point (°C), Magnus formula over water."""
+    temp = np.asarray(temp, dtype=np.float64)
+    dew = np.asarray(dew, dtype=np.float64)
+    a, b = 17.625, 243.04
+    rh = 100.0 * np.exp(a * dew / (b + dew) - a * temp / (b + temp))
+    return np.round(np.minimum(rh, 100.0), 1)
+
+
+def pressure_altitude(qnh, elevation):
+    """Pressure altitude (ft): elevation plus the ISA height between QNH and 1013.25 hPa."""
+    qnh = np.asarray(qnh, dtype=np.float64)
+    elevation = np.asarray(elevation, dtype=np.float64)
+    return np.round(elevation + 145366.45 * (1.0 - (qnh / 1013.25) ** 0.190284))
+
+
+def density_altitude(pressure_alt, temp):
+    """Density altitude (ft): 120 ft per °C above the ISA temperature at that pressure altitude."""
+    pressure_alt = np.asarray(pressure_alt, dtype=np.float64)
+    temp = np.asarray(temp, dtype=np.float64)
+    isa = 15.0 - 1.98 * pressure_alt / 1000.0
+    return np.round(pressure_alt + 120.0 * (temp - isa))
+
+
+def derive_quantities(station, temp, dew, qnh, elevations=None):
+    """All DERIVED_QUANTITIES for whole columns at once; NaN wherever an input is missing.
+
+    ``station`` may be one code or an array aligned with the other columns.
+    Stations without a known elevation get no pressure or density altitude.
+    """
+    elevations = ELEVATIONS if elevations is None else elevations
+    temp = np.asarray(temp, dtype=np.float64)
+    dew = np.asarray(dew, dtype=np.float64)
+    n = len(temp)
+    stations = np.broadcast_to(np.asarray(station, dtype=object), (n,))
+    elevation = np.fromiter((elevations.get(s, np.nan) for s in stations), dtype=np.float64, count=n)
+    pa = pressure_altitude(qnh, elevation)
+    return pd.DataFrame({
+        "rh": relative_humidity(temp, dew),
+        "dewpoint_depression": np.round(temp - dew, 1),
+        "pressure_altitude": pa,
+        "density_altitude": density_altitude(pa, temp),
+    })
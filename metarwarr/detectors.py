@@ -0,0 +1,190 @@
+# metarwarr - STREAMING TREND & ANOMALY DETECTORS
+import json
+import math
+import threading
+from collections import deque
+
+from metarwarr.history_store import to_epoch
+
+DETECTOR_STATE_KEY = "detector_state"
+# metric -> tendency window in seconds
+METRICS = {"qnh": 3 * 3600, "temp": 3600, "dew": 3600, "wind_speed": 3600}
+# Half-hourly reports plus SPECIs: bounded, however long the stream runs
+MAX_POINTS = 16
+
+
+def _num(v):
+    if v is None:
+        return None
+    try:
+        v = float(v)
+    except (TypeError, ValueError):
+        return None
+    return None if v != v else v
+
+
+class Welford:
+    """Running mean and variance in one pass (Welford's algorithm)."""
+
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self, n=0, mean=0.0, m2=0.0):
+        self.n, self.mean, self.m2 = n, mean, m2
+
+    def update(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else None
+
+    def z(self, x):
+        std = self.std
+        return (x - self.mean) / std if std else None
+
+
+class Ewma:
+    """Exponentially weighted mean and variance; ``alpha`` is the weight of the newest value."""
+
+    __slots__ = ("alpha", "value", "var")
+
+    def __init__(self, alpha=0.3, value=None, var=0.0):
+        self.alpha, self.value, self.var = alpha, value, var
+
+    def update(self, x):
+        if self.value is None:
+            self.value = x
+            return
+        delta = x - self.value
+        self.value += self.alpha * delta
+        self.var = (1 - self.alpha) * (self.var + self.alpha * delta * delta)
+
+
+class Tendency:
+    """Change over a trailing time window, e.g. the 3-hour pressure tendency.
+
+    Keeps at most ``MAX_POINTS`` (time, value) pairs and drops anything
+    older than the window, so state stays constant per metric.
+    """
+
+    __slots__ = ("window", "points")
+
+    def __init__(self, window, points=()):
+        self.window = window
+        self.points = deque(points, maxlen=MAX_POINTS)
+
+    def update(self, t, x):
+        self.points.append((t, x))
+        while t - self.points[0][0] > self.window:
+            self.points.popleft()
+
+    def change(self):
+        # None until the points span at least half the window
+        if len(self.points) < 2:
+            return None
+        (t0, v0), (t1, v1) = self.points[0], self.points[-1]
+        return round(v1 - v0, 2) if t1 - t0 >= self.window / 2 else None
+
+
+class StationDetectors:
+    __slots__ = ("last_time", "stats", "smooth", "trend", "gust", "signals")
+
+    def __init__(self):
+        self.last_time = None
+        self.stats = {m: Welford() for m in METRICS}
+        self.smooth = {m: Ewma() for m in METRICS}
+        self.trend = {m: Tendency(w) for m, w in METRICS.items()}
+        self.gust = False
+        self.signals = {}
+
+    def update(self, t, obs):
+        signals = {}
+        for m, window in METRICS.items():
+            x = _num(obs.get(m))
+            if x is None:
+                continue
+            # Scores are taken against the state before this value joins it
+            z = self.stats[m].z(x)
+            ewma = self.smooth[m].value
+            self.stats[m].update(x)
+            self.smooth[m].update(x)
+            self.trend[m].update(t, x)
+            signals[f"{m}_z"] = None if z is None else round(z, 2)
+            signals[f"{m}_dev"] = None if ewma is None else round(x - ewma, 2)
+            hours = window // 3600
+            signals[f"{m}_change_{hours}h"] = self.trend[m].change()
+        gust = _num(obs.get("gust")) is not None
+        signals["gust_onset"] = gust and not self.gust
+        self.gust = gust
+        self.last_time = t
+        self.signals = signals
+        return signals
+
+    def to_json(self):
+        return {
+            "t": self.last_time, "gust": self.gust, "signals": self.signals,
+            "metrics": {m: [self.stats[m].n, self.stats[m].mean, self.stats[m].m2,
+                            self.smooth[m].value, self.smooth[m].var, list(self.trend[m].points)]
+                        for m in METRICS},
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        det = cls()
+        det.last_time, det.gust, det.signals = data["t"], data["gust"], data.get("signals", {})
+        for m, (n, mean, m2, value, var, points) in data["metrics"].items():
+            if m in METRICS:
+                det.stats[m] = Welford(n, mean, m2)
+                det.smooth[m] = Ewma(value=value, var=var)
+                det.trend[m] = Tendency(METRICS[m], [tuple(p) for p in points])
+        return det
+
+
+class StreamDetectors:
+    """Online trend and anomaly signals per station, fed one observation at a time.
+
+    Each station keeps a Welford accumulator, an EWMA and a bounded
+    tendency window per metric; nothing ever reads back through history.
+    ``update`` returns the signals (``qnh_change_3h``, ``temp_change_1h``,
+    ``*_z``, ``*_dev``, ``gust_onset``) which the ingest worker merges into
+    the observation the alert rules see. Corrections for an observation
+    time already consumed are not applied twice.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self._lock = threading.Lock()
+        self._stations = {}
+        if store is not None:
+            data = json.loads(store.get_state(DETECTOR_STATE_KEY) or "{}")
+            self._stations = {s: StationDetectors.from_json(d) for s, d in data.items()}
+
+    def known(self, station):
+        with self._lock:
+            return station in self._stations
+
+    def update(self, station, obs, obs_time):
+        t = to_epoch(obs_time)
+        with self._lock:
+            det = self._stations.get(station)
+            if det is None:
+                det = self._stations[station] = StationDetectors()
+            if det.last_time is not None and t <= det.last_time:
+                return {}
+            return det.update(t, obs)
+
+    def signals(self, station):
+        with self._lock:
+            det = self._stations.get(station)
+            return dict(det.signals) if det is not None else {}
+
+    def state(self):
+        with self._lock:
+            return {DETECTOR_STATE_KEY: json.dumps({s: d.to_json() for s, d in self._stations.items()})}
+
+    def save(self):
+        if self.store is not None:
+            self.store.append([], state=self.state())
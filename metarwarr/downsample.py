@@ -0,0 +1,72 @@
+# metarwarr - CHART DOWNSAMPLING
+import numpy as np
+
+
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[s]").astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets; returns the indices of the kept points."""
+    x, y = _as_float(x), _as_float(y)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    every = (n - 2) / (n_out - 2)
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        nxt_end = min(int((i + 2) * every) + 1, n)
+        if end >= nxt_end:
+            avg_x, avg_y = x[-1], y[-1]
+        else:
+            avg_x, avg_y = x[end:nxt_end].mean(), y[end:nxt_end].mean()
+        xs, ys = x[start:end], y[start:end]
+        area = np.abs((x[a] - avg_x) * (ys - y[a]) - (x[a] - xs) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+
+def minmax(y, n_out):
+    """Keep each bucket's minimum and maximum so spikes (e.g. QNH drops) survive."""
+    y = _as_float(y)
+    n = len(y)
+    buckets = max(n_out // 2, 1)
+    if n <= n_out:
+        return np.arange(n)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    keep = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        seg = y[start:end]
+        keep.append(start + int(np.argmin(seg)))
+        keep.append(start + int(np.argmax(seg)))
+    keep.extend((0, n - 1))
+    return np.unique(np.asarray(keep, dtype=np.int64))
+
+
+def downsample_index(x, y, n_out, method="lttb"):
+    # Positions to keep from plain arrays (e.g. ring buffer views); missing y is skipped
+    y = _as_float(y)
+    valid = np.flatnonzero(~np.isnan(y))
+    if len(valid) <= n_out:
+        return valid
+    if method == "minmax":
+        return valid[minmax(y[valid], n_out)]
+    return valid[lttb(np.asarray(x)[valid], y[valid], n_out)]
+
+
+def downsample(frame, x, y, n_out, method="lttb"):
+    # Rows with a missing value are dropped first; the result keeps every column
+    frame = frame.dropna(subset=[x, y])
+    if len(frame) <= n_out:
+        return frame
+    return frame.iloc[downsample_index(frame[x].to_numpy(), frame[y].to_numpy(), n_out, method)]
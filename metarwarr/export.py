@@ -0,0 +1,81 @@
+# metarwarr - HISTORY EXPORT
+import gzip
+import tempfile
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "csv.gz": ("application/gzip", ".csv.gz"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+
+def iter_csv(frames):
+    # Header once, then one encoded block per chunk
+    header = True
+    for df in frames:
+        yield df.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+
+
+def export_file(store, fmt="csv", chunksize=50000, spool=16 * 1024 * 1024, **filters):
+    """Write the filtered history into a temporary file, chunk by chunk.
+
+    The file stays in memory up to ``spool`` bytes and spills to disk after
+    that, so a full archive is never held as one string. Returned rewound,
+    ready to be streamed or handed to ``st.download_button``.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format: {fmt}")
+    out = tempfile.SpooledTemporaryFile(max_size=spool)
+    frames = store.iter_query(chunksize=chunksize, **filters)
+    if fmt == "parquet":
+        _write_parquet(frames, out)
+    elif fmt == "csv.gz":
+        with gzip.GzipFile(fileobj=out, mode="wb") as gz:
+            for block in iter_csv(frames):
+                gz.write(block)
+    else:
+        for block in iter_csv(frames):
+            out.write(block)
+    out.seek(0)
+    return out
+
+
+def export_bytes(store, fmt="csv", **filters):
+    # For st.download_button, which keeps every download in memory anyway: read once, drop the spool
+    with export_file(store, fmt, **filters) as out:
+        return out.read()
+
+
+def _write_parquet(frames, out):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    for df in frames:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if writer is None:
+            # An all-empty text column in the first chunk would pin the schema to null
+            table = table.cast(pa.schema([
+                f.with_type(pa.string()) if pa.types.is_null(f.type) else f for f in table.schema
+            ]))
+            writer = pq.ParquetWriter(out, table.schema)
+        writer.write_table(table.cast(writer.schema))
+    if writer is None:
+        # Empty result: still a valid file with no rows
+        pq.write_table(pa.table({}), out)
+    else:
+        writer.close()
+
+
+def iter_file(fileobj, block_size=64 * 1024):
+    # Blocks of an export file, closing it once drained or abandoned
+    try:
+        while True:
+            block = fileobj.read(block_size)
+            if not block:
+                return
+            yield block
+    finally:
+        fileobj.close()
+
@@ -0,0 +1,110 @@
+# metarwarr - MULTI-STATION FETCHER
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metarwarr.telemetry import count, span
+
+NOAA_STATION_URL = "https://tgftp.nws.noaa.gov/data/observations/metar/stations/{station}.TXT"
+
+# status is the HTTP code (304 = unchanged) or None when the request failed
+FetchResult = namedtuple("FetchResult", ["station", "status", "metar", "changed", "error"])
+
+
+def last_report(text):
+    lines = [l.strip() for l in text.strip().split("\n") if l.strip()]
+    return lines[-1] if lines else None
+
+
+class MetarFetcher:
+    """Concurrent station fetcher over keep-alive sessions with conditional GETs."""
+
+    def __init__(self, url_template=NOAA_STATION_URL, max_workers=16, per_host=6, timeout=(3.05, 10)):
+        self.url_template = url_template
+        self.per_host = per_host
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="metar-fetch")
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+        self._host_slots = {}
+        # url -> (etag, last_modified, metar)
+        self._validators = {}
+
+    # =========================
+    # CONNECTIONS
+    # =========================
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.per_host)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def _host_slot(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+        return slot
+
+    # =========================
+    # FETCH
+    # =========================
+    def fetch_one(self, station):
+        url = self.url_template.format(station=station)
+        etag, modified, cached = self._validators.get(url, (None, None, None))
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if modified:
+            headers["If-Modified-Since"] = modified
+        try:
+            with self._host_slot(url), span("fetch.station"):
+                r = self._session().get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            count("fetch_responses", status="error")
+            return FetchResult(station, None, cached, False, e)
+        count("fetch_responses", status=r.status_code)
+        if r.status_code == 304:
+            return FetchResult(station, 304, cached, False, None)
+        if r.status_code != 200:
+            return FetchResult(station, r.status_code, cached, False, None)
+        metar = last_report(r.text)
+        self._validators[url] = (r.headers.get("ETag"), r.headers.get("Last-Modified"), metar)
+        return FetchResult(station, 200, metar, metar is not None and metar != cached, None)
+
+    def fetch_many(self, stations):
+        return {res.station: res for res in self._pool.map(self.fetch_one, stations)}
+
+    def fetch(self, station):
+        return self.fetch_one(station).metar
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        with self._lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_fetcher():
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = MetarFetcher()
+        return _default
@@ -0,0 +1,641 @@
+# metarwarr - HISTORY STORE
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from metarwarr.batch import derive_columns
+from metarwarr.climatology import WindCounts
+from metarwarr.rollups import Rollup, rollup_frame
+from metarwarr.telemetry import span
+
+EPOCH = datetime(1970, 1, 1)
+# Filled from the raw report on append; older databases get them added and backfilled
+DERIVED_COLUMNS = [
+    ("dew", "REAL"), ("wind_dir", "REAL"), ("wind_speed", "REAL"), ("gust", "REAL"), ("vis", "REAL"),
+    ("weather", "TEXT"), ("cover", "TEXT"), ("flight_category", "TEXT"),
+    ("runway", "TEXT"), ("crosswind", "REAL"), ("headwind", "REAL"), ("tailwind", "REAL"),
+    ("gust_crosswind", "REAL"), ("gust_headwind", "REAL"), ("gust_tailwind", "REAL"),
+    ("ceiling", "REAL"), ("rh", "REAL"), ("dewpoint_depression", "REAL"),
+    ("pressure_altitude", "REAL"), ("density_altitude", "REAL"),
+]
+COLUMNS = ["station", "obs_time", "time", "metar", "temp", "qnh"] + [name for name, _ in DERIVED_COLUMNS]
+LEGACY_COLUMNS = ["time", "metar", "temp", "qnh"]
+NUMERIC_COLUMNS = ["temp", "qnh"] + [name for name, kind in DERIVED_COLUMNS if kind == "REAL"]
+
+# Dedup key columns, written with every row but not part of the returned frames
+KEY_COLUMNS = ["content_hash", "cor"]
+# How long a connection waits on another process's write lock before "database is locked"
+BUSY_TIMEOUT_MS = 10000
+INSERTED, SUPERSEDED, DUPLICATE = "inserted", "superseded", "duplicate"
+_INSERT_SQL = (
+    f"INSERT INTO observations ({', '.join(COLUMNS + KEY_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(COLUMNS + KEY_COLUMNS))})"
+)
+
+_OBS_TIME_RE = re.compile(r"\b(\d{2})(\d{2})(\d{2})Z\b")
+_COR_RE = re.compile(r"(?:^|\s)(?:COR|AMD|CC[A-Z])(?:\s|$)")
+_PREFIX_RE = re.compile(r"^(?:(?:METAR|SPECI)\s+)+")
+
+# =========================
+# OBSERVATION TIME
+# =========================
+def to_epoch(dt):
+    if dt is None:
+        return None
+    if isinstance(dt, (int, float)):
+        return int(dt)
+    if isinstance(dt, str):
+        dt = pd.Timestamp(dt).to_pydatetime()
+    if dt.tzinfo is not None:
+        dt = dt.replace(tzinfo=None) - dt.utcoffset()
+    return int((dt - EPOCH).total_seconds())
+
+
+def from_epoch(seconds):
+    return EPOCH + timedelta(seconds=int(seconds))
+
+
+def resolve_obs_time(day, hour, minute, ref):
+    # METAR only carries DDHHMM; month and year come from the receive time.
+    # A day ahead of the reference belongs to the previous month.
+    day, hour, minute = int(day), int(hour), int(minute)
+    year, month = ref.year, ref.month
+    if day > ref.day + 1:
+        month -= 1
+        if month == 0:
+            year, month = year - 1, 12
+    try:
+        return datetime(year, month, day, hour, minute)
+    except ValueError:
+        return None
+
+
+def obs_time_from_metar(metar, ref):
+    t = _OBS_TIME_RE.search(metar or "")
+    if not t:
+        return ref
+    return resolve_obs_time(t.group(1), t.group(2), t.group(3), ref) or ref
+
+
+# =========================
+# DEDUP KEY
+# =========================
+def normalize_report(metar):
+    # Whitespace, the trailing "=" and the METAR/SPECI prefix never change the content
+    return _PREFIX_RE.sub("", " ".join(metar.split()).rstrip("= "))
+
+
+def content_hash(metar):
+    return hashlib.blake2b(normalize_report(metar).encode(), digest_size=8).hexdigest()
+
+
+def station_from_metar(metar):
+    return next((t for t in metar.split() if t not in ("METAR", "SPECI", "COR", "AMD")), None)
+
+
+def is_correction(metar):
+    body = normalize_report(metar).split(" RMK ", 1)[0]
+    return bool(_COR_RE.search(body))
+
+
+# =========================
+# STORE INTERFACE
+# =========================
+class HistoryStore(ABC):
+    """Observation history keyed on (station, obs_time).
+
+    A report whose key is already stored is dropped unless it is a
+    correction (COR), which supersedes the stored row in place.
+    """
+
+    def append(self, rows, state=None):
+        # state: optional {key: text} committed atomically with the rows;
+        # returns how many rows were inserted or superseded
+        return sum(1 for outcome in self.ingest(rows, state) if outcome != DUPLICATE)
+
+    @abstractmethod
+    def ingest(self, rows, state=None):
+        """Like append, but returns INSERTED / SUPERSEDED / DUPLICATE per row."""
+
+    @abstractmethod
+    def read_range(self, station=None, start=None, end=None):
+        """Rows with obs_time in [start, end], oldest first."""
+
+    @abstractmethod
+    def read_since(self, last_id, station=None):
+        """Rows appended after ``last_id`` in insertion order, with their id."""
+
+    @abstractmethod
+    def change_token(self):
+        """Cheap value that changes whenever rows were written, by any writer."""
+
+    @abstractmethod
+    def max_id(self):
+        """Id of the newest written row, 0 when empty."""
+
+    @abstractmethod
+    def time_range(self, station=None):
+        """(first, last) obs_time as datetimes, or None when there are no rows."""
+
+    @abstractmethod
+    def read_latest(self, station, n, max_id=None):
+        """Newest ``n`` rows of a station (ids up to ``max_id``), oldest first."""
+
+    @abstractmethod
+    def latest(self, station=None):
+        """Newest row as a dict, or None."""
+
+    @abstractmethod
+    def query(self, station=None, start=None, end=None, weather=None, category=None, ceiling_below=None,
+              limit=None, offset=0):
+        """Filtered rows, newest first.
+
+        ``weather`` is a code such as "TS", ``category`` one or more of
+        VFR/MVFR/IFR/LIFR, ``ceiling_below`` a height in feet (no ceiling
+        never matches).
+        """
+
+    @abstractmethod
+    def iter_query(self, station=None, start=None, end=None, weather=None, category=None, ceiling_below=None,
+                   chunksize=50000):
+        """Same filters as query(), oldest first, yielded as frames of at most ``chunksize`` rows."""
+
+    @abstractmethod
+    def stations(self):
+        """Stations with at least one stored row, sorted."""
+
+    @abstractmethod
+    def count(self, station=None, start=None, end=None, weather=None, category=None, ceiling_below=None):
+        """Number of rows matching the query() filters."""
+
+    @abstractmethod
+    def read_aggregate(self, table, station=None):
+        """Cells of an incrementally maintained aggregate table (e.g. wind_counts)."""
+
+    @abstractmethod
+    def read_rollup(self, station=None, start=None, end=None, resolution="hour"):
+        """Hourly or daily buckets overlapping [start, end], oldest first."""
+
+    @abstractmethod
+    def get_state(self, key, default=None):
+        """Text saved through append(state=...), or ``default``."""
+
+    def close(self):
+        pass
+
+
+# =========================
+# SQLITE BACKEND (WAL)
+# =========================
+class SQLiteHistoryStore(HistoryStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS observations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        station TEXT NOT NULL,
+        obs_time INTEGER NOT NULL,
+        time TEXT NOT NULL,
+        metar TEXT NOT NULL,
+        temp REAL,
+        qnh REAL
+    );
+    CREATE INDEX IF NOT EXISTS idx_obs_time ON observations (obs_time);
+    CREATE TABLE IF NOT EXISTS ingest_state (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        deduped = self._upgrade()
+        # Aggregates are updated inside every append transaction
+        self.aggregates = [WindCounts(), Rollup("hour"), Rollup("day")]
+        for agg in self.aggregates:
+            have = {r[1] for r in self._conn.execute(f"PRAGMA table_info({agg.table})")}
+            if have and not set(agg.columns) <= have:
+                # Written by an older layout: recount from the observations
+                self._conn.execute(f"DROP TABLE {agg.table}")
+                have = set()
+            self._conn.executescript(agg.SCHEMA)
+            if not have or deduped:
+                self.rebuild(agg)
+
+    def _upgrade(self):
+        have = {r[1] for r in self._conn.execute("PRAGMA table_info(observations)")}
+        missing = [(name, kind) for name, kind in DERIVED_COLUMNS if name not in have]
+        for name, kind in missing:
+            self._conn.execute(f"ALTER TABLE observations ADD COLUMN {name} {kind}")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_obs_station_category ON observations (station, flight_category, obs_time)"
+        )
+        if missing:
+            self.backfill([name for name, _ in missing])
+        if "content_hash" not in have:
+            self._conn.execute("ALTER TABLE observations ADD COLUMN content_hash TEXT")
+            self._conn.execute("ALTER TABLE observations ADD COLUMN cor INTEGER NOT NULL DEFAULT 0")
+            self._backfill_keys()
+        has_key = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_obs_key'"
+        ).fetchone()
+        if has_key:
+            return False
+        # Older histories may hold duplicates; keep the latest correction, else the first copy
+        removed = self._conn.execute("""
+            DELETE FROM observations WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (
+                        PARTITION BY station, obs_time
+                        ORDER BY cor DESC, CASE WHEN cor THEN -id ELSE id END
+                    ) AS rank
+                    FROM observations
+                ) WHERE rank > 1
+            )""").rowcount
+        self._conn.execute("CREATE UNIQUE INDEX idx_obs_key ON observations (station, obs_time)")
+        self._conn.execute("DROP INDEX IF EXISTS idx_obs_station_time")
+        return removed > 0
+
+    def _backfill_keys(self, chunksize=50000):
+        last_id = 0
+        while True:
+            rows = self._conn.execute(
+                "SELECT id, metar FROM observations WHERE id > ? ORDER BY id LIMIT ?", (last_id, chunksize)
+            ).fetchall()
+            if not rows:
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "UPDATE observations SET content_hash = ?, cor = ? WHERE id = ?",
+                    [(content_hash(m), int(is_correction(m)), i) for i, m in rows],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            last_id = rows[-1][0]
+
+    def backfill(self, columns, chunksize=50000):
+        # Recompute derived columns for existing rows, one vectorized parse per chunk
+        last_id = 0
+        assign = ", ".join(f"{c} = ?" for c in columns)
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, metar FROM observations WHERE id > ? ORDER BY id LIMIT ?", (last_id, chunksize)
+                ).fetchall()
+            if not rows:
+                return
+            ids = [r[0] for r in rows]
+            derived = derive_columns([r[1] for r in rows])
+            values = [
+                tuple(_value(v) for v in vals) + (i,)
+                for vals, i in zip(derived[columns].itertuples(index=False), ids)
+            ]
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._conn.executemany(f"UPDATE observations SET {assign} WHERE id = ?", values)
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._writes += 1
+            last_id = ids[-1]
+
+    def rebuild(self, agg, chunksize=50000):
+        # Recount an aggregate from the stored reports, one vectorized parse per chunk
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {agg.table}")
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, station, obs_time, metar FROM observations WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, chunksize),
+                ).fetchall()
+            if not rows:
+                return
+            obs = derive_columns([r[3] for r in rows])
+            obs["station"] = [r[1] for r in rows]
+            obs["obs_time"] = [r[2] for r in rows]
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    agg.apply(self._conn, obs)
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._writes += 1
+            last_id = rows[-1][0]
+
+    def _row_values(self, rows):
+        derived = derive_columns([r["metar"] for r in rows])
+        values = []
+        for row, d in zip(rows, derived.itertuples(index=False)):
+            received = row.get("time") or datetime.utcnow()
+            if not isinstance(received, str):
+                received = str(received)
+            obs_time = row.get("obs_time")
+            if obs_time is None:
+                obs_time = obs_time_from_metar(row["metar"], pd.Timestamp(received).to_pydatetime())
+            station = row.get("station") or station_from_metar(row["metar"])
+            temp, qnh = _num(row.get("temp")), _num(row.get("qnh"))
+            values.append((
+                station,
+                to_epoch(obs_time),
+                received,
+                row["metar"],
+                _num(d.temp) if temp is None else temp,
+                _num(d.qnh) if qnh is None else qnh,
+            ) + tuple(_value(getattr(d, name)) for name, _ in DERIVED_COLUMNS)
+              + (content_hash(row["metar"]), int(is_correction(row["metar"]))))
+        derived["station"] = [v[0] for v in values]
+        derived["obs_time"] = [v[1] for v in values]
+        return values, derived
+
+    def _place(self, v):
+        # One indexed lookup on (station, obs_time) decides the row's fate
+        found = self._conn.execute(
+            "SELECT id, content_hash, cor FROM observations WHERE station = ? AND obs_time = ?", (v[0], v[1])
+        ).fetchone()
+        if found is None:
+            self._conn.execute(_INSERT_SQL, v)
+            return INSERTED, None
+        old_id, old_hash, _ = found
+        if old_hash == v[-2] or not v[-1]:
+            # Same content, or an original arriving after what we already hold
+            return DUPLICATE, None
+        old = pd.read_sql_query(
+            "SELECT station, obs_time, wind_dir, wind_speed FROM observations WHERE id = ?",
+            self._conn, params=[old_id],
+        )
+        # Superseded rows take a fresh id so incremental readers (read_since) pick them up
+        assign = ", ".join(f"{c} = ?" for c in COLUMNS + KEY_COLUMNS)
+        self._conn.execute(
+            f"UPDATE observations SET id = (SELECT max(id) + 1 FROM observations), {assign} WHERE id = ?",
+            v + (old_id,),
+        )
+        return SUPERSEDED, old
+
+    def ingest(self, rows, state=None):
+        with span("store.derive"):
+            values, obs = self._row_values(rows) if rows else ([], None)
+        if not values and not state:
+            return []
+        outcomes = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                inserted, superseded, old = [], [], []
+                with span("store.dedup"):
+                    for pos, v in enumerate(values):
+                        outcome, previous = self._place(v)
+                        outcomes.append(outcome)
+                        if outcome == INSERTED:
+                            inserted.append(pos)
+                        elif outcome == SUPERSEDED:
+                            superseded.append(pos)
+                            old.append(previous)
+                with span("store.aggregates"):
+                    for agg in self.aggregates:
+                        if inserted:
+                            agg.apply(self._conn, obs.iloc[inserted])
+                        if superseded:
+                            agg.replace(self._conn, pd.concat(old, ignore_index=True), obs.iloc[superseded])
+                if state:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO ingest_state (key, value) VALUES (?, ?)",
+                        list(state.items()),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._writes += 1
+        return outcomes
+
+    def _where(self, station, start, end, weather=None, category=None, ceiling_below=None):
+        clauses, params = [], []
+        if station:
+            clauses.append("station = ?")
+            params.append(station)
+        if start is not None:
+            clauses.append("obs_time >= ?")
+            params.append(to_epoch(start))
+        if end is not None:
+            clauses.append("obs_time <= ?")
+            params.append(to_epoch(end))
+        if weather:
+            clauses.append("weather LIKE ?")
+            params.append(f"%{weather}%")
+        if category:
+            category = [category] if isinstance(category, str) else list(category)
+            clauses.append(f"flight_category IN ({', '.join('?' * len(category))})")
+            params.extend(category)
+        if ceiling_below is not None:
+            clauses.append("ceiling < ?")
+            params.append(float(ceiling_below))
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        return where, params
+
+    def read_range(self, station=None, start=None, end=None):
+        where, params = self._where(station, start, end)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM observations{where} ORDER BY obs_time, id"
+        with self._lock:
+            df = pd.read_sql_query(sql, self._conn, params=params)
+        return _frame(df)
+
+    def read_since(self, last_id, station=None):
+        where, params = self._where(station, None, None)
+        where = (where + " AND" if where else " WHERE") + " id > ?"
+        sql = f"SELECT id, {', '.join(COLUMNS)} FROM observations{where} ORDER BY id"
+        with self._lock:
+            df = pd.read_sql_query(sql, self._conn, params=params + [int(last_id)])
+        return _frame(df)
+
+    def change_token(self):
+        # data_version only moves for commits made by other connections
+        with self._lock:
+            return self._writes, self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def max_id(self):
+        with self._lock:
+            return self._conn.execute("SELECT coalesce(max(id), 0) FROM observations").fetchone()[0]
+
+    def time_range(self, station=None):
+        where, params = self._where(station, None, None)
+        with self._lock:
+            first, last = self._conn.execute(
+                f"SELECT min(obs_time), max(obs_time) FROM observations{where}", params
+            ).fetchone()
+        return None if first is None else (from_epoch(first), from_epoch(last))
+
+    def read_latest(self, station, n, max_id=None):
+        where, params = self._where(station, None, None)
+        if max_id is not None:
+            where = (where + " AND" if where else " WHERE") + " id <= ?"
+            params.append(int(max_id))
+        sql = f"SELECT {', '.join(COLUMNS)} FROM observations{where} ORDER BY obs_time DESC, id DESC LIMIT ?"
+        with self._lock:
+            df = pd.read_sql_query(sql, self._conn, params=params + [int(n)])
+        return _frame(df.iloc[::-1].reset_index(drop=True))
+
+    def latest(self, station=None):
+        where, params = self._where(station, None, None)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM observations{where} ORDER BY obs_time DESC, id DESC LIMIT 1"
+        with self._lock:
+            cur = self._conn.execute(sql, params)
+            row = cur.fetchone()
+        if row is None:
+            return None
+        out = dict(zip(COLUMNS, row))
+        out["obs_time"] = from_epoch(out["obs_time"])
+        return out
+
+    def query(self, station=None, start=None, end=None, weather=None, category=None, ceiling_below=None,
+              limit=None, offset=0):
+        where, params = self._where(station, start, end, weather, category, ceiling_below)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM observations{where} ORDER BY obs_time DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [int(limit), int(offset)]
+        with self._lock:
+            df = pd.read_sql_query(sql, self._conn, params=params)
+        return _frame(df)
+
+    def iter_query(self, station=None, start=None, end=None, weather=None, category=None, ceiling_below=None,
+                   chunksize=50000):
+        # Own read-only connection: a long export must not hold the writer's lock
+        where, params = self._where(station, start, end, weather, category, ceiling_below)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM observations{where} ORDER BY obs_time, id"
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        try:
+            for df in pd.read_sql_query(sql, conn, params=params, chunksize=chunksize):
+                yield _frame(df)
+        finally:
+            conn.close()
+
+    def stations(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT station FROM observations ORDER BY station").fetchall()
+        return [r[0] for r in rows]
+
+    def count(self, station=None, start=None, end=None, weather=None, category=None, ceiling_below=None):
+        where, params = self._where(station, start, end, weather, category, ceiling_below)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM observations{where}", params).fetchone()[0]
+
+    def read_aggregate(self, table, station=None):
+        if table not in {agg.table for agg in self.aggregates}:
+            raise ValueError(f"unknown aggregate {table!r}")
+        where, params = self._where(station, None, None)
+        with self._lock:
+            return pd.read_sql_query(f"SELECT * FROM {table}{where}", self._conn, params=params)
+
+    def read_rollup(self, station=None, start=None, end=None, resolution="hour"):
+        agg = next((a for a in self.aggregates if getattr(a, "resolution", None) == resolution), None)
+        if agg is None:
+            raise ValueError(f"unknown rollup resolution {resolution!r}")
+        clauses, params = [], []
+        if station:
+            clauses.append("station = ?")
+            params.append(station)
+        if start is not None:
+            clauses.append("bucket >= ?")
+            params.append(to_epoch(start) // agg.seconds * agg.seconds)
+        if end is not None:
+            clauses.append("bucket <= ?")
+            params.append(to_epoch(end))
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        with self._lock:
+            df = pd.read_sql_query(f"SELECT * FROM {agg.table}{where} ORDER BY bucket, station", self._conn, params=params)
+        return rollup_frame(df)
+
+    def get_state(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM ingest_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _num(v):
+    if v is None:
+        return None
+    try:
+        v = float(v)
+    except (TypeError, ValueError):
+        return None
+    return None if v != v else v
+
+
+def _value(v):
+    # pandas hands back NaN/NA for missing text; sqlite wants None
+    return None if v is None or v is pd.NA or v != v else v
+
+
+def _frame(df):
+    df["obs_time"] = pd.to_datetime(df["obs_time"], unit="s")
+    for col in NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    df["time"] = pd.to_datetime(df["time"], errors="coerce", format="mixed")
+    return df
+
+
+# =========================
+# CSV MIGRATOR
+# =========================
+def migrate_csv(csv_path, store, station=None, chunksize=50000):
+    # One-shot import of the legacy time,metar,temp,qnh file
+    total = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        chunk = chunk.dropna(subset=["metar"])
+        rows = []
+        for rec in chunk[LEGACY_COLUMNS].to_dict("records"):
+            metar = str(rec["metar"]).strip()
+            if not metar:
+                continue
+            rows.append({
+                "station": station or station_from_metar(metar),
+                "time": rec["time"],
+                "metar": metar,
+                "temp": rec["temp"],
+                "qnh": rec["qnh"],
+            })
+        total += store.append(rows)
+    return total
+
+
+def open_store(path, legacy_csv=None):
+    fresh = not os.path.exists(path)
+    store = SQLiteHistoryStore(path)
+    if fresh and legacy_csv and os.path.exists(legacy_csv):
+        migrate_csv(legacy_csv, store)
+    return store
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 3:
+        print("usage: python -m metarwarr.history_store <legacy.csv> <history.db>")
+        sys.exit(1)
+    s = SQLiteHistoryStore(sys.argv[2])
+    print(f"migrated {migrate_csv(sys.argv[1], s)} rows into {sys.argv[2]}")
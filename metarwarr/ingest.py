@@ -0,0 +1,230 @@
+# metarwarr - INGEST WORKER
+import logging
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+from metarwarr.cycles import STATE_KEY as CYCLE_STATE_KEY, CycleFileReader
+from metarwarr.detectors import MAX_POINTS
+from metarwarr.fetcher import MetarFetcher
+from metarwarr.history_store import DUPLICATE, obs_time_from_metar
+from metarwarr.metar import parse_metar
+from metarwarr.runway import components_from_parsed
+from metarwarr.telemetry import count, span, timed
+
+log = logging.getLogger(__name__)
+
+# Immutable view handed to page sessions; version bumps on every new report
+Snapshot = namedtuple("Snapshot", ["version", "station", "metar", "parsed", "obs_time", "fetched_at"])
+
+
+class IngestWorker:
+    """Single owner of polling, parsing and persistence for a set of stations.
+
+    mode="station" polls one stations/{ICAO}.TXT per station; mode="cycle"
+    tails the hourly cycle files and keeps only allowlisted stations
+    (all stations when ``stations`` is empty). Each new report is announced
+    on ``bus`` (see metarwarr.bus) so readers can wait instead of polling,
+    fed to ``detectors`` (StreamDetectors) and run through ``alerts`` (an
+    AlertEngine, which also sees the detector signals); alert transitions
+    go to ``on_alert(station, fired, cleared, obs_time)``. ``clock`` supplies
+    "now" (naive UTC) and lets a replay run the worker on simulated time.
+    """
+
+    def __init__(self, store, stations, interval=60, on_new=None, fetcher=None, parse=parse_metar,
+                 mode="station", cycles=None, bus=None, alerts=None, on_alert=None, detectors=None,
+                 clock=datetime.utcnow):
+        if isinstance(stations, str):
+            stations = [stations]
+        if mode not in ("station", "cycle"):
+            raise ValueError(f"unknown ingest mode {mode!r}")
+        self.store = store
+        self.stations = list(stations or [])
+        self.interval = interval
+        self.on_new = on_new
+        self.mode = mode
+        self.fetcher = fetcher
+        self.cycles = cycles
+        self.bus = bus
+        self.alerts = alerts
+        self.on_alert = on_alert
+        self.detectors = detectors
+        self.clock = clock
+        if mode == "station" and self.fetcher is None:
+            self.fetcher = MetarFetcher()
+        if mode == "cycle" and self.cycles is None:
+            self.cycles = CycleFileReader()
+        self.parse = parse
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._snapshots = {}
+        seeded = False
+        for station in self.stations:
+            last = store.latest(station)
+            if last is not None:
+                parsed = self.parse(last["metar"])
+                self._publish(station, last["metar"], parsed, last["obs_time"])
+                seeded = self._seed(station, parsed, last["obs_time"]) or seeded
+        if seeded:
+            self._save_state()
+
+    def _seed(self, station, parsed, obs_time):
+        # First run with detectors or rules: prime them from a bounded tail of history, sending nothing
+        seeded = False
+        if self.detectors is not None and not self.detectors.known(station):
+            for rec in self.store.read_latest(station, MAX_POINTS).to_dict("records"):
+                self.detectors.update(station, rec, rec["obs_time"])
+            seeded = True
+        if self.alerts is not None and not self.alerts.known(station):
+            obs = self._observation(station, parsed)
+            if self.detectors is not None:
+                obs.update(self.detectors.signals(station))
+            self.alerts.evaluate(station, obs, obs_time)
+            seeded = True
+        return seeded
+
+    def _observation(self, station, parsed):
+        obs = dict(parsed)
+        obs.update(components_from_parsed(station, parsed))
+        return obs
+
+    def _evaluate(self, station, parsed, obs_time):
+        obs = self._observation(station, parsed)
+        if self.detectors is not None:
+            obs.update(self.detectors.update(station, obs, obs_time))
+        if self.alerts is None:
+            return [], []
+        return self.alerts.evaluate(station, obs, obs_time)
+
+    def _save_state(self):
+        # Detector and alert state go out in one write
+        state = {}
+        for part in (self.detectors, self.alerts):
+            if part is not None:
+                state.update(part.state())
+        if state:
+            self.store.append([], state=state)
+
+    # =========================
+    # SNAPSHOT
+    # =========================
+    def snapshot(self, station=None):
+        # Default: the first configured station; cycle mode without an allowlist has none
+        if station is None:
+            if not self.stations:
+                return Snapshot(0, None, None, None, None, None)
+            station = self.stations[0]
+        with self._lock:
+            return self._snapshots.get(station) or Snapshot(0, station, None, None, None, None)
+
+    def _publish(self, station, metar, parsed, obs_time):
+        with self._lock:
+            prev = self._snapshots.get(station)
+            if prev is not None and prev.obs_time is not None and obs_time < prev.obs_time:
+                # Late report from a cycle file; history keeps it, the live view does not
+                return False
+            version = prev.version + 1 if prev is not None else 1
+            self._snapshots[station] = Snapshot(version, station, metar, parsed, obs_time, datetime.utcnow())
+            return True
+
+    # =========================
+    # POLL CYCLE
+    # =========================
+    def _collect_stations(self, now):
+        results = self.fetcher.fetch_many(self.stations)
+        reports = []
+        for station in self.stations:
+            res = results.get(station)
+            # 304s and failures never reach the parser
+            if res is None or res.status != 200 or res.metar is None:
+                continue
+            reports.append((station, res.metar, now))
+        return reports, None
+
+    def _collect_cycles(self, now):
+        state = self.store.get_state(CYCLE_STATE_KEY)
+        reports, state = self.cycles.read_new(state, allow=self.stations, now=now)
+        return reports, {CYCLE_STATE_KEY: state}
+
+    @timed("ingest.poll")
+    def poll_once(self):
+        now = self.clock()
+        with span("ingest.fetch"):
+            if self.mode == "cycle":
+                reports, state = self._collect_cycles(now)
+            else:
+                reports, state = self._collect_stations(now)
+        count("reports_fetched", len(reports))
+        rows, fresh, seen = [], [], set()
+        for station, metar, ref in reports:
+            if (station, metar) in seen or metar == self.snapshot(station).metar:
+                continue
+            seen.add((station, metar))
+            with span("ingest.parse"):
+                parsed = self.parse(metar)
+            obs_time = obs_time_from_metar(metar, ref or now)
+            rows.append({
+                "station": station,
+                "obs_time": obs_time,
+                "time": now,
+                "metar": metar,
+                "temp": parsed.get("temp"),
+                "qnh": parsed.get("qnh"),
+            })
+            fresh.append((station, metar, parsed, obs_time))
+        # One transaction for the whole batch, cycle offsets included; the store drops
+        # reports it already holds (e.g. seen in both the station file and a cycle file)
+        with span("ingest.persist"):
+            outcomes = self.store.ingest(rows, state=state)
+        for outcome in outcomes:
+            count("rows_ingested", outcome=outcome)
+        fresh = [f for f, outcome in zip(fresh, outcomes) if outcome != DUPLICATE]
+        fresh.sort(key=lambda f: f[3])
+        for station, metar, parsed, obs_time in fresh:
+            if not self._publish(station, metar, parsed, obs_time):
+                continue
+            if self.alerts is not None or self.detectors is not None:
+                with span("ingest.evaluate"):
+                    fired, cleared = self._evaluate(station, parsed, obs_time)
+                if (fired or cleared) and self.on_alert is not None:
+                    try:
+                        with span("ingest.notify"):
+                            self.on_alert(station, fired, cleared, obs_time)
+                    except Exception:
+                        log.exception("on_alert callback failed for %s", station)
+            if self.bus is not None:
+                self.bus.publish(station)
+            if self.on_new is not None:
+                try:
+                    with span("ingest.notify"):
+                        self.on_new(metar, parsed)
+                except Exception:
+                    log.exception("on_new callback failed for %s", station)
+        if fresh:
+            self._save_state()
+        return len(fresh)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception:
+                log.exception("ingest cycle failed for %s", ",".join(self.stations))
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="metar-ingest", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
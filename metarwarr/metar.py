@@ -0,0 +1,325 @@
+# metarwarr - METAR FETCH & PARSE
+import re
+
+# =========================
+# GET METAR NOAA
+# =========================
+def get_metar(station):
+    # Shared keep-alive fetcher; an unchanged file comes back as a 304.
+    # Imported here so the parser alone does not pull in requests
+    from metarwarr.fetcher import default_fetcher
+
+    res = default_fetcher().fetch_one(station)
+    if res.status in (200, 304):
+        return res.metar
+    return None
+
+# =========================
+# OBSERVATION RECORD
+# =========================
+class Observation:
+    """Typed record for one decoded report; list fields hold repeating groups."""
+
+    # Scalar defaults live on the class so a fresh record only allocates its lists
+    station = None
+    report_type = "METAR"
+    day = hour = minute = None
+    wind_dir = None
+    wind_vrb = False
+    wind_speed = gust = None
+    wind_var_from = wind_var_to = None
+    cavok = False
+    vis = vis_min = vis_min_dir = None
+    vertical_vis = None
+    sky_clear = None
+    temp = dew = qnh = None
+    trend = remarks = None
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.modifiers = []
+        self.rvr = []
+        self.weather = []
+        self.recent_weather = []
+        self.clouds = []
+        self.wind_shear = []
+        self.unparsed = []
+
+    def __repr__(self):
+        return f"Observation({self.raw!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, Observation) and vars(self) == vars(other)
+
+    @property
+    def ceiling(self):
+        # Lowest BKN/OVC base, or vertical visibility in obscured sky
+        bases = [h for cover, h, _ in self.clouds if cover in ("BKN", "OVC") and h is not None]
+        if self.vertical_vis is not None:
+            bases.append(self.vertical_vis)
+        return min(bases) if bases else None
+
+    def cloud_text(self):
+        if self.clouds:
+            cover, height, ctype = self.clouds[0]
+            # BKN/// : layer reported, base not measured
+            base = "///" if height is None else f"{height}FT"
+            return f"{cover} {base} {ctype or ''}"
+        if self.vertical_vis is not None:
+            return f"VV {self.vertical_vis}FT "
+        if self.cavok:
+            return "CAVOK"
+        return self.sky_clear or "NIL"
+
+    def to_dict(self):
+        # Field names and formats the dashboard has always consumed
+        data = {"station": self.station}
+        if self.day is not None:
+            data["day"] = _TWO_DIGITS[self.day]
+            data["hour"] = _TWO_DIGITS[self.hour]
+            data["minute"] = _TWO_DIGITS[self.minute]
+        if self.wind_speed is not None:
+            data["wind_dir"] = "VRB" if self.wind_dir is None else "%03d" % self.wind_dir
+            data["wind_speed"] = self.wind_speed
+            data["gust"] = self.gust
+        if self.vis is not None:
+            data["vis"] = self.vis
+        data["weather"] = " ".join(self.weather) if self.weather else "NIL"
+        data["cloud"] = self.cloud_text()
+        if self.temp is not None:
+            data["temp"] = self.temp
+        if self.dew is not None:
+            data["dew"] = self.dew
+        if self.qnh is not None:
+            data["qnh"] = self.qnh
+        data["trend"] = self.trend or "NIL"
+        return data
+
+
+_TWO_DIGITS = ["%02d" % i for i in range(100)]
+
+# =========================
+# TOKEN GRAMMAR
+# =========================
+# Shared with the batch parser (metarwarr.batch), which runs them through RE2
+WX_DESCRIPTOR = r"(?:MI|PR|BC|DR|BL|SH|TS|FZ)"
+WX_PHENOMENON = r"(?:DZ|RA|SN|SG|IC|PL|GR|GS|UP|BR|FG|FU|VA|DU|SA|HZ|PY|PO|SQ|FC|SS|DS)"
+WX_GROUP = rf"(?:{WX_DESCRIPTOR}{WX_PHENOMENON}{{0,3}}|{WX_PHENOMENON}{{1,3}})"
+TEMP_GROUP = r"(?P<tt>M?\d{2})/(?P<td>M?\d{2}|//)?"
+
+_GRAMMAR = [
+    ("type", r"METAR|SPECI"),
+    ("mod", r"(?P<modv>COR|AMD|AUTO|NIL|RTD|CC[A-Z])"),
+    ("time", r"(?P<day>\d{2})(?P<hour>\d{2})(?P<minute>\d{2})Z"),
+    ("wind", r"(?P<wdir>\d{3}|VRB|///)(?P<wspd>P?\d{2,3}|//)(?:G(?P<gust>P?\d{2,3}))?(?P<wunit>KT|MPS|KMH)"),
+    ("wind_var", r"(?P<vfrom>\d{3})V(?P<vto>\d{3})"),
+    ("cavok", r"CAVOK"),
+    ("vis", r"(?P<vval>\d{4})(?P<vdir>NDV|[NS]?[EW]?)"),
+    ("vis_sm", r"(?P<smp>[PM])?(?:(?P<smn>\d{1,2})/(?P<smd>\d{1,2})|(?P<smw>\d{1,2}))SM"),
+    ("rvr", r"R(?P<rwy>\d{2}[LCR]?)/(?P<rval>[PM]?\d{4}(?:V[PM]?\d{4})?(?:FT)?)/?(?P<rtend>[UDN])?"),
+    ("recent", rf"RE(?P<re>{WX_GROUP})"),
+    ("weather", rf"(?P<wx>(?:[-+]|VC)?{WX_GROUP}|//)"),
+    ("rwy_state", r"R\d{2}[LCR]?/(?:\d{6}|CLRD\d{2}|SNOCLO|[\d/]{6})|R/SNOCLO"),
+    ("cloud", r"(?P<cover>FEW|SCT|BKN|OVC)(?P<base>\d{3}|///)(?P<ctype>CB|TCU|///)?"),
+    ("vv", r"VV(?P<vvh>\d{3}|///)"),
+    ("clear", r"NSC|NCD|SKC|CLR"),
+    ("temp", TEMP_GROUP),
+    ("pressure", r"(?P<punit>[QA])(?P<press>\d{4})"),
+    ("ws", r"WS"),
+    ("trend", r"NOSIG|BECMG|TEMPO"),
+    ("rmk", r"RMK"),
+]
+_TOKEN_RE = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in _GRAMMAR))
+_FRACTION_RE = re.compile(r"\d/\d{1,2}SM")
+_RUNWAY_RE = re.compile(r"R\d{2}[LCR]?")
+
+
+
+def _knots(value, unit):
+    if value is None or value.startswith("/"):
+        return None
+    v = int(value.lstrip("P"))
+    if unit == "MPS":
+        return round(v * 1.943844)
+    if unit == "KMH":
+        return round(v / 1.852)
+    return v
+
+
+def _temp(text):
+    if not text or text.startswith("/"):
+        return None
+    return -int(text[1:]) if text[0] == "M" else int(text)
+
+
+def _miles(miles):
+    return min(round(miles * 1609.344), 10000)
+
+# Each decoder turns a matched group into either a dict of fields to set
+# ("set" kinds) or one item for a repeating list ("append" kinds).
+def _dec_time(m):
+    return {"day": int(m.group("day")), "hour": int(m.group("hour")), "minute": int(m.group("minute"))}
+
+
+def _dec_wind(m):
+    wdir, unit = m.group("wdir"), m.group("wunit")
+    return {
+        "wind_vrb": wdir == "VRB",
+        "wind_dir": int(wdir) if wdir.isdigit() else None,
+        "wind_speed": _knots(m.group("wspd"), unit),
+        "gust": _knots(m.group("gust"), unit),
+    }
+
+
+def _dec_wind_var(m):
+    return {"wind_var_from": int(m.group("vfrom")), "wind_var_to": int(m.group("vto"))}
+
+
+def _dec_cavok(m):
+    return {"cavok": True, "vis": 10000}
+
+
+def _dec_vis(m):
+    vis = int(m.group("vval"))
+    return (10000 if vis == 9999 else vis), (m.group("vdir") or None)
+
+
+def _dec_vis_sm(m):
+    if m.group("smp") == "P":
+        return {"vis": 10000}
+    if m.group("smw"):
+        return {"vis": _miles(float(m.group("smw")))}
+    return {"vis": _miles(int(m.group("smn")) / int(m.group("smd")))}
+
+
+def _dec_rvr(m):
+    return (m.group("rwy"), m.group("rval"), m.group("rtend"))
+
+
+def _dec_cloud(m):
+    base, ctype = m.group("base"), m.group("ctype")
+    return (m.group("cover"), int(base) * 100 if base.isdigit() else None, ctype if ctype != "///" else None)
+
+
+def _dec_vv(m):
+    vv = m.group("vvh")
+    return {"vertical_vis": int(vv) * 100 if vv.isdigit() else None}
+
+
+def _dec_temp(m):
+    return {"temp": _temp(m.group("tt")), "dew": _temp(m.group("td"))}
+
+
+def _dec_pressure(m):
+    value = int(m.group("press"))
+    return {"qnh": value if m.group("punit") == "Q" else round(value / 100 * 33.8639)}
+
+
+_SET = {
+    "time": _dec_time,
+    "wind": _dec_wind,
+    "wind_var": _dec_wind_var,
+    "cavok": _dec_cavok,
+    "vis_sm": _dec_vis_sm,
+    "vv": _dec_vv,
+    "clear": lambda m: {"sky_clear": m.group("clear")},
+    "temp": _dec_temp,
+    "pressure": _dec_pressure,
+}
+_APPEND = {
+    "rvr": ("rvr", _dec_rvr),
+    "recent": ("recent_weather", lambda m: m.group("re")),
+    "weather": ("weather", lambda m: m.group("wx")),
+    "cloud": ("clouds", _dec_cloud),
+    "mod": ("modifiers", lambda m: m.group("modv")),
+}
+
+# Raw groups repeat constantly between reports ("9999", "NOSIG", "FEW020"),
+# so each distinct token is matched and decoded only once.
+_token_memo = {}
+_TOKEN_MEMO_MAX = 20000
+
+
+def _classify(tok):
+    hit = _token_memo.get(tok)
+    if hit is None:
+        m = _TOKEN_RE.fullmatch(tok)
+        kind = m.lastgroup if m else None
+        if kind in _SET:
+            hit = (kind, _SET[kind](m))
+        elif kind in _APPEND:
+            attr, dec = _APPEND[kind]
+            hit = (kind, (attr, dec(m)))
+        elif kind == "vis":
+            hit = (kind, _dec_vis(m))
+        else:
+            hit = (kind, None)
+        if kind == "weather" and tok == "//":
+            hit = ("skip", None)
+        if len(_token_memo) >= _TOKEN_MEMO_MAX:
+            _token_memo.clear()
+        _token_memo[tok] = hit
+    return hit
+
+# =========================
+# METAR PARSER (SINGLE PASS)
+# =========================
+def decode_metar(metar):
+    tokens = metar.split()
+    obs = Observation(raw=metar)
+    i, n = 0, len(tokens)
+    while i < n and tokens[i] in ("METAR", "SPECI", "COR", "AMD"):
+        # "METAR COR WARR ..." puts the correction flag ahead of the station
+        if tokens[i] in ("COR", "AMD"):
+            obs.modifiers.append(tokens[i])
+        else:
+            obs.report_type = tokens[i]
+        i += 1
+    if i < n:
+        obs.station = tokens[i]
+        i += 1
+    while i < n:
+        tok = tokens[i].rstrip("=")
+        kind, value = _classify(tok)
+        if kind == "trend" or kind == "rmk":
+            rest = tokens[i:]
+            if kind == "trend":
+                end = rest.index("RMK") if "RMK" in rest else len(rest)
+                obs.trend = " ".join(rest[:end]).rstrip("=")
+                rest = rest[end:]
+            if rest:
+                obs.remarks = " ".join(rest[1:]).rstrip("=")
+            break
+        if kind in _SET:
+            obs.__dict__.update(value)
+        elif kind in _APPEND:
+            getattr(obs, value[0]).append(value[1])
+        elif kind == "vis":
+            if obs.vis is None:
+                obs.vis = value[0]
+            elif value[1] and value[1] != "NDV":
+                obs.vis_min, obs.vis_min_dir = value
+        elif kind == "ws":
+            # WS R28 / WS ALL RWY
+            j = i + 1
+            while j < n and (tokens[j] in ("ALL", "RWY") or _RUNWAY_RE.fullmatch(tokens[j])):
+                obs.wind_shear.append(tokens[j])
+                j += 1
+            i = j
+            continue
+        elif tok.isdigit() and len(tok) <= 2 and i + 1 < n and _FRACTION_RE.fullmatch(tokens[i + 1]):
+            # 1 1/2SM split over two tokens
+            whole = int(tok)
+            num, den = tokens[i + 1][:-2].split("/")
+            obs.vis = _miles(whole + int(num) / int(den))
+            i += 2
+            continue
+        elif kind is None:
+            obs.unparsed.append(tok)
+        # "rwy_state" and "skip" tokens carry nothing the record keeps
+        i += 1
+    return obs
+
+
+def parse_metar(metar):
+    return decode_metar(metar).to_dict()
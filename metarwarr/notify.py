@@ -0,0 +1,207 @@
+# metarwarr - NOTIFICATION DISPATCHER
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from metarwarr.telemetry import count, span
+
+log = logging.getLogger(__name__)
+
+FONNTE_URL = "https://api.fonnte.com/send"
+SENT_STATE_KEY = "notify_sent"
+
+Notification = namedtuple("Notification", ["key", "message", "enqueued"])
+
+
+def notification_key(parsed):
+    # Idempotency key: one alert per (station, DDHHMMZ observation time)
+    return f"{parsed.get('station')} {parsed.get('day')}{parsed.get('hour')}{parsed.get('minute')}Z"
+
+
+# =========================
+# WHATSAPP (FONNTE) SENDER
+# =========================
+class FonnteSender:
+    def __init__(self, token, target, url=FONNTE_URL):
+        self.token = token
+        self.target = target
+        self.url = url
+        self.session = requests.Session()
+
+    def __call__(self, message, timeout):
+        r = self.session.post(
+            self.url,
+            data={"target": self.target, "message": message},
+            headers={"Authorization": self.token},
+            timeout=timeout,
+        )
+        r.raise_for_status()
+        try:
+            body = r.json()
+        except ValueError:
+            return
+        if isinstance(body, dict) and body.get("status") is False:
+            raise RuntimeError(f"fonnte rejected message: {body.get('reason')}")
+
+
+# =========================
+# DISPATCHER
+# =========================
+class NotificationDispatcher:
+    """Outbound queue drained by a background thread, off the render path.
+
+    Bursts arriving within ``coalesce_window`` seconds go out as one message.
+    Each batch is retried with exponential backoff, and keys already sent are
+    remembered (and persisted through ``store`` when given) so no observation
+    is announced twice.
+    """
+
+    def __init__(self, send, max_concurrency=2, timeout=10, max_attempts=5, backoff=1.0,
+                 backoff_max=60.0, coalesce_window=3.0, max_batch=10, store=None, remember=500):
+        self.send = send
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.coalesce_window = coalesce_window
+        self.max_batch = max_batch
+        self.store = store
+        self.remember = remember
+        self._queue = queue.Queue()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="notify")
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._sent = OrderedDict()
+        self._latencies = deque(maxlen=200)
+        self._counts = {"submitted": 0, "sent": 0, "failed": 0, "retries": 0, "duplicates": 0,
+                        "coalesced": 0, "in_flight": 0}
+        if store is not None:
+            for key in json.loads(store.get_state(SENT_STATE_KEY) or "[]"):
+                self._sent[key] = True
+
+    def submit(self, key, message):
+        with self._lock:
+            if key in self._sent or key in self._pending:
+                self._counts["duplicates"] += 1
+                count("notify_duplicates")
+                return False
+            self._pending.add(key)
+            self._counts["submitted"] += 1
+        self._queue.put(Notification(key, message, time.monotonic()))
+        return True
+
+    # =========================
+    # DRAIN LOOP
+    # =========================
+    def _next_batch(self):
+        try:
+            first = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.coalesce_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if batch is None:
+                continue
+            self._slots.acquire()
+            with self._lock:
+                self._counts["in_flight"] += 1
+            self._pool.submit(self._deliver, batch)
+
+    def _deliver(self, batch):
+        message = batch[0].message if len(batch) == 1 else "\n\n".join(n.message for n in batch)
+        keys = [n.key for n in batch]
+        ok = False
+        try:
+            if self.send is None:
+                # No WhatsApp config: drop quietly, same as before
+                return
+            for attempt in range(self.max_attempts):
+                try:
+                    with span("notify.send"):
+                        self.send(message, self.timeout)
+                    ok = True
+                    break
+                except Exception as e:
+                    log.warning("notification %s failed (attempt %d): %s", ",".join(keys), attempt + 1, e)
+                    if attempt + 1 == self.max_attempts:
+                        break
+                    with self._lock:
+                        self._counts["retries"] += 1
+                    count("notify_retries")
+                    delay = min(self.backoff * 2 ** attempt, self.backoff_max)
+                    if self._stop.wait(delay * (0.5 + random.random() / 2)):
+                        break
+        finally:
+            self._finish(batch, keys, ok)
+            self._slots.release()
+
+    def _finish(self, batch, keys, ok):
+        now = time.monotonic()
+        with self._lock:
+            self._counts["in_flight"] -= 1
+            self._pending.difference_update(keys)
+            if not ok:
+                if self.send is not None:
+                    self._counts["failed"] += len(batch)
+                    count("notify_failed", len(batch))
+                return
+            self._counts["sent"] += len(batch)
+            count("notify_sent", len(batch))
+            if len(batch) > 1:
+                self._counts["coalesced"] += len(batch) - 1
+            for n in batch:
+                self._latencies.append(now - n.enqueued)
+                self._sent[n.key] = True
+            while len(self._sent) > self.remember:
+                self._sent.popitem(last=False)
+            sent_keys = list(self._sent)
+        if self.store is not None:
+            self.store.append([], state={SENT_STATE_KEY: json.dumps(sent_keys)})
+
+    # =========================
+    # LIFECYCLE & METRICS
+    # =========================
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="notify-dispatch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._pool.shutdown(wait=True)
+
+    def stats(self):
+        with self._lock:
+            lat = sorted(self._latencies)
+            out = dict(self._counts)
+        out["queue_depth"] = self._queue.qsize()
+        out["latency_p50"] = lat[len(lat) // 2] if lat else None
+        out["latency_max"] = lat[-1] if lat else None
+        return out
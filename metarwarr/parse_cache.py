@@ -0,0 +1,50 @@
+# metarwarr - REPORT PARSE CACHE
+import threading
+from collections import OrderedDict
+
+from metarwarr.telemetry import count
+
+
+class ReportCache:
+    """Process-wide LRU memo: raw METAR text -> everything derived from it.
+
+    ``build`` receives the raw report and returns the bundle to keep
+    (parsed observation plus formatted products). Bundles are shared between
+    sessions, so callers must treat them as read-only.
+    """
+
+    def __init__(self, build, maxsize=256):
+        self.build = build
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, metar):
+        key = " ".join(metar.split())
+        with self._lock:
+            bundle = self._data.get(key)
+            if bundle is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                count("report_cache_hits")
+                return bundle
+            self.misses += 1
+        count("report_cache_misses")
+        # Build outside the lock; a racing duplicate build is harmless
+        bundle = self.build(metar)
+        with self._lock:
+            self._data[key] = bundle
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return bundle
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
@@ -0,0 +1,418 @@
+# metarwarr - REPLAY & LOAD-TEST HARNESS
+import bisect
+import hashlib
+import json
+import os
+import random
+import re
+import resource
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+STATION_PATH = "/data/observations/metar/stations/{station}.TXT"
+CYCLE_PATH = "/data/observations/metar/cycles/{hour:02d}Z.TXT"
+
+_STATION_RE = re.compile(r"^/data/observations/metar/stations/(?P<station>[A-Z0-9]+)\.TXT$")
+_CYCLE_RE = re.compile(r"^/data/observations/metar/cycles/(?P<hour>\d{2})Z\.TXT$")
+_TIME_TOKEN_RE = re.compile(r"^\d{6}Z$")
+
+
+# =========================
+# SIMULATED CLOCK
+# =========================
+class SimClock:
+    """Naive-UTC clock running ``speed`` times faster than real time from ``start``."""
+
+    def __init__(self, start, speed=1.0):
+        self.start = start
+        self.speed = float(speed)
+        self._t0 = time.monotonic()
+
+    def __call__(self):
+        return self.start + timedelta(seconds=(time.monotonic() - self._t0) * self.speed)
+
+    def real_time(self, sim):
+        # Monotonic instant at which the simulation reaches ``sim``
+        return self._t0 + (sim - self.start).total_seconds() / self.speed
+
+
+# =========================
+# RECORDED CORPUS
+# =========================
+def load_templates(csv_path):
+    # Recorded reports minus station and DDHHMMZ, reused as the body of synthetic ones
+    reports = pd.read_csv(csv_path, usecols=["metar"])["metar"].dropna().astype(str).str.strip()
+    templates = []
+    for report in reports:
+        tokens = report.split()
+        while tokens and tokens[0] in ("METAR", "SPECI"):
+            tokens = tokens[1:]
+        if len(tokens) > 2 and _TIME_TOKEN_RE.match(tokens[1]):
+            templates.append(" ".join(tokens[2:]))
+    if not templates:
+        raise ValueError(f"no usable METARs in {csv_path}")
+    return templates
+
+
+class Corpus:
+    """Time-ordered synthetic stream built from the recorded reports.
+
+    Every station reports each ``step``; the body cycles through the
+    recorded templates (offset per station) with station and time
+    rewritten. A report becomes visible on the stand-in server ``delay``
+    after its observation time, as it does at NOAA.
+    """
+
+    def __init__(self, templates, stations, start, span, step=timedelta(minutes=30), delay=timedelta(minutes=2)):
+        self.stations = list(stations)
+        self.delay = delay
+        self._by_station = {s: ([], []) for s in self.stations}
+        self._records = []
+        self.available = {}
+        n = int(span / step) + 1
+        for k in range(n):
+            obs_time = start + k * step
+            for i, station in enumerate(self.stations):
+                report = f"{station} {obs_time:%d%H%M}Z {templates[(k + i) % len(templates)]}"
+                avail = obs_time + delay
+                times, reports = self._by_station[station]
+                times.append(avail)
+                reports.append(report)
+                self._records.append((avail, report))
+                self.available[report] = avail
+        self._records.sort(key=lambda r: r[0])
+        self._record_times = [r[0] for r in self._records]
+
+    @classmethod
+    def from_csv(cls, csv_path, stations, start, span, **kwargs):
+        return cls(load_templates(csv_path), stations, start, span, **kwargs)
+
+    def latest(self, station, now):
+        entry = self._by_station.get(station)
+        if entry is None:
+            return None, None
+        times, reports = entry
+        i = bisect.bisect_right(times, now)
+        return (times[i - 1], reports[i - 1]) if i else (None, None)
+
+    def cycle(self, hour, now):
+        # Records received during ``hour`` of the last 24 h, up to ``now``
+        day = now.replace(minute=0, second=0, microsecond=0)
+        start = day.replace(hour=hour) if hour <= now.hour else day.replace(hour=hour) - timedelta(days=1)
+        end = min(start + timedelta(hours=1), now + timedelta(microseconds=1))
+        lo = bisect.bisect_left(self._record_times, start)
+        hi = bisect.bisect_left(self._record_times, end)
+        return self._records[lo:hi]
+
+    def count_available(self, start, end):
+        return bisect.bisect_right(self._record_times, end) - bisect.bisect_left(self._record_times, start)
+
+
+# =========================
+# STAND-IN NOAA SERVER
+# =========================
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "metarwarr-standin"
+
+    def do_GET(self):
+        server = self.server
+        server.count("requests")
+        low, high = server.latency
+        if high > 0:
+            time.sleep(server.uniform(low, high))
+        if server.chance(server.error_rate):
+            server.count("errors")
+            return self._send(503, b"simulated outage\n")
+        now = server.clock()
+        m = _STATION_RE.match(self.path)
+        if m:
+            avail, report = server.corpus.latest(m.group("station"), now)
+            if report is None:
+                server.count("not_found")
+                return self._send(404, b"not found\n")
+            body = f"{avail:%Y/%m/%d %H:%M}\n{report}\n".encode()
+            return self._conditional(body, avail)
+        m = _CYCLE_RE.match(self.path)
+        if m and int(m.group("hour")) < 24:
+            records = server.corpus.cycle(int(m.group("hour")), now)
+            body = "".join(f"{avail:%Y/%m/%d %H:%M}\n{report}\n\n" for avail, report in records).encode()
+            return self._ranged(body)
+        server.count("not_found")
+        self._send(404, b"not found\n")
+
+    def _conditional(self, body, modified):
+        etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        sent = self.headers.get("If-None-Match")
+        # A forced 304 mimics a stale cache in front of NOAA
+        if sent == etag or (sent and self.server.chance(self.server.not_modified_rate)):
+            self.server.count("not_modified")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        modified = format_datetime(modified.replace(tzinfo=timezone.utc), usegmt=True)
+        self._send(200, body, {"ETag": etag, "Last-Modified": modified})
+
+    def _ranged(self, body):
+        rng = self.headers.get("Range")
+        if rng and rng.startswith("bytes=") and rng.endswith("-"):
+            offset = int(rng[6:-1])
+            if offset > len(body):
+                self.server.count("range_not_satisfiable")
+                return self._send(416, b"")
+            return self._send(206, body[offset:], {"Content-Range": f"bytes {offset}-{len(body) - 1}/{len(body)}"})
+        self._send(200, body)
+
+    def _send(self, status, body, headers=None):
+        truncate = status in (200, 206) and len(body) > 1 and self.server.chance(self.server.truncate_rate)
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        if truncate:
+            # Promise the full length, deliver part of it and drop the connection
+            self.send_header("Connection", "close")
+            self.close_connection = True
+            self.server.count("truncated")
+            body = body[:len(body) // 2]
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count(f"status_{status}")
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Local NOAA look-alike serving station and cycle files from a Corpus on a SimClock.
+
+    ``latency`` is a (min, max) range in seconds added to every request;
+    ``error_rate``, ``not_modified_rate`` and ``truncate_rate`` are the
+    probabilities of a 503, a forced 304 on a conditional request and a
+    body cut short mid-transfer.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, corpus, clock, host="127.0.0.1", port=0, latency=(0.0, 0.0), error_rate=0.0,
+                 not_modified_rate=0.0, truncate_rate=0.0, seed=None):
+        super().__init__((host, port), StandInHandler)
+        self.corpus = corpus
+        self.clock = clock
+        self.latency = latency
+        self.error_rate = error_rate
+        self.not_modified_rate = not_modified_rate
+        self.truncate_rate = truncate_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counters = {}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def chance(self, p):
+        if p <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < p
+
+    def uniform(self, a, b):
+        with self._lock:
+            return self._rng.uniform(a, b)
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up mid-request are part of the load test, not a server bug
+        self.count("client_disconnects")
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="noaa-standin", daemon=True).start()
+        return self
+
+
+# =========================
+# REPLAY DRIVER
+# =========================
+def _rss_mb():
+    # Current resident set size; falls back to the peak where /proc is missing
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _percentiles(values):
+    if not values:
+        return None, None
+    p50, p99 = np.percentile(np.asarray(values, dtype=np.float64), [50, 99])
+    return round(float(p50), 4), round(float(p99), 4)
+
+
+def station_codes(n):
+    # WARR plus synthetic ICAO-like codes
+    return ["WARR"] + [f"X{i:03d}" for i in range(1, n)]
+
+
+def run_replay(csv_path, stations=1, speed=60.0, duration=30.0, mode="station", interval=60, latency=(0.0, 0.0),
+               error_rate=0.0, not_modified_rate=0.0, truncate_rate=0.0, seed=0, db=None):
+    """Drive fetch -> parse -> dedup -> store -> alert against the stand-in server.
+
+    Runs ``duration`` real seconds at ``speed`` x real time across
+    ``stations`` stations, polling every ``interval`` simulated seconds, and
+    returns throughput, ingest latency (report visible at the server ->
+    accepted by the worker) and poll-cycle percentiles, plus RSS growth.
+    """
+    from metarwarr.alerts import AlertEngine
+    from metarwarr.cycles import CycleFileReader
+    from metarwarr.detectors import StreamDetectors
+    from metarwarr.fetcher import MetarFetcher
+    from metarwarr.history_store import SQLiteHistoryStore
+    from metarwarr.ingest import IngestWorker
+
+    codes = station_codes(stations)
+    start = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(days=1)
+    span = timedelta(seconds=duration * speed) + timedelta(hours=1)
+    corpus = Corpus.from_csv(csv_path, codes, start, span)
+    # Begin as the first reports become visible
+    clock = SimClock(start + corpus.delay, speed)
+    server = StandInServer(corpus, clock, latency=latency, error_rate=error_rate,
+                           not_modified_rate=not_modified_rate, truncate_rate=truncate_rate, seed=seed).start()
+
+    tmp = None
+    if db is None:
+        tmp = tempfile.TemporaryDirectory(prefix="metarwarr-replay-")
+        db = os.path.join(tmp.name, "replay.db")
+    store = SQLiteHistoryStore(db)
+    alerts, detectors = AlertEngine(store=store), StreamDetectors(store=store)
+    latencies, fired = [], [0]
+
+    def on_new(metar, parsed):
+        avail = corpus.available.get(metar)
+        if avail is not None:
+            latencies.append(time.monotonic() - clock.real_time(avail))
+
+    def on_alert(station, new, cleared, obs_time):
+        fired[0] += len(new)
+
+    fetcher = MetarFetcher(url_template=server.base_url + STATION_PATH, timeout=(1, 5))
+    cycles = CycleFileReader(url_template=server.base_url + CYCLE_PATH, timeout=(1, 5))
+    worker = IngestWorker(store, codes, mode=mode, fetcher=fetcher, cycles=cycles, alerts=alerts,
+                          detectors=detectors, on_new=on_new, on_alert=on_alert, clock=clock)
+
+    polls, accepted = [], 0
+    rss = [_rss_mb()]
+    real_interval = interval / speed
+    sim_from = sim_to = clock()
+    t_start = time.monotonic()
+    t_end = t_start + duration
+    try:
+        while time.monotonic() < t_end:
+            t0 = time.monotonic()
+            accepted += worker.poll_once()
+            # Taken after the poll: whatever it fetched was visible by now
+            sim_to = clock()
+            polls.append(time.monotonic() - t0)
+            if len(polls) % 10 == 0:
+                rss.append(_rss_mb())
+            time.sleep(max(0.0, real_interval - (time.monotonic() - t0)))
+    finally:
+        elapsed = time.monotonic() - t_start
+        fetcher.close()
+        server.shutdown()
+        server.server_close()
+        stored = store.count()
+        store.close()
+        if tmp is not None:
+            tmp.cleanup()
+    rss.append(_rss_mb())
+
+    lat50, lat99 = _percentiles(latencies)
+    poll50, poll99 = _percentiles(polls)
+    # Growth after the first samples, once caches and pools have warmed up
+    warm = rss[min(len(rss) - 1, max(1, len(rss) // 10))]
+    return {
+        "mode": mode,
+        "stations": len(codes),
+        "speed": speed,
+        "duration_s": round(elapsed, 2),
+        "simulated_s": round((sim_to - sim_from).total_seconds()),
+        "polls": len(polls),
+        # Visible at the server by the end of the last poll, an upper bound for accepted
+        "reports_available": corpus.count_available(sim_from - corpus.delay, sim_to),
+        "reports_accepted": accepted,
+        "rows_stored": stored,
+        "alerts_fired": fired[0],
+        "throughput_per_s": round(accepted / elapsed, 2),
+        "ingest_latency_p50_s": lat50,
+        "ingest_latency_p99_s": lat99,
+        "poll_p50_s": poll50,
+        "poll_p99_s": poll99,
+        "rss_start_mb": round(rss[0], 1),
+        "rss_end_mb": round(rss[-1], 1),
+        "rss_growth_mb": round(rss[-1] - warm, 1),
+        "server": dict(sorted(server.counters.items())),
+    }
+
+
+# =========================
+# CLI
+# =========================
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Replay recorded METARs through the ingest pipeline against a local "
+                                             "NOAA stand-in and report throughput, latency and memory")
+    ap.add_argument("--csv", default="metar_history.csv", help="recorded corpus (time,metar,... CSV)")
+    ap.add_argument("--stations", type=int, default=10)
+    ap.add_argument("--speed", type=float, default=600, help="simulated seconds per real second")
+    ap.add_argument("--duration", type=float, default=30, help="real seconds to run")
+    ap.add_argument("--mode", choices=["station", "cycle"], default="station")
+    ap.add_argument("--interval", type=int, default=60, help="poll interval in simulated seconds")
+    ap.add_argument("--latency", type=float, nargs=2, default=[0.0, 0.0], metavar=("MIN", "MAX"))
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--not-modified-rate", type=float, default=0.0)
+    ap.add_argument("--truncate-rate", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--db", help="keep the replayed history in this file instead of a temporary one")
+    ap.add_argument("--serve", action="store_true",
+                    help="only run the stand-in server (port 8780) for manual testing, at --speed")
+    args = ap.parse_args(argv)
+
+    if args.serve:
+        codes = station_codes(args.stations)
+        start = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(days=1)
+        corpus = Corpus.from_csv(args.csv, codes, start, timedelta(days=30))
+        server = StandInServer(corpus, SimClock(start + corpus.delay, args.speed), port=8780,
+                               latency=tuple(args.latency), error_rate=args.error_rate,
+                               not_modified_rate=args.not_modified_rate, truncate_rate=args.truncate_rate,
+                               seed=args.seed)
+        print(f"stand-in NOAA at {server.base_url} ({', '.join(codes[:5])}{'...' if len(codes) > 5 else ''})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    result = run_replay(args.csv, args.stations, args.speed, args.duration, args.mode, args.interval,
+                        tuple(args.latency), args.error_rate, args.not_modified_rate, args.truncate_rate,
+                        args.seed, args.db)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
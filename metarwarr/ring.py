@@ -0,0 +1,269 @@
+# metarwarr - LIVE HISTORY RING BUFFER
+import threading
+
+import numpy as np
+import pandas as pd
+
+# One fixed-size record per observation; code 0 always means "missing"
+RING_DTYPE = np.dtype([
+    ("obs_time", "<i8"),
+    ("temp", "<f4"), ("dew", "<f4"), ("qnh", "<f4"),
+    ("wind_dir", "<f4"), ("wind_speed", "<f4"), ("gust", "<f4"), ("vis", "<f4"),
+    ("crosswind", "<f4"), ("headwind", "<f4"), ("tailwind", "<f4"), ("gust_crosswind", "<f4"),
+    ("ceiling", "<f4"), ("rh", "<f4"), ("dewpoint_depression", "<f4"), ("density_altitude", "<f4"),
+    ("weather", "<u2"), ("cover", "u1"), ("category", "u1"), ("runway", "u1"),
+    ("metar", "<u4"),
+])
+FLOAT_FIELDS = [n for n in RING_DTYPE.names if RING_DTYPE[n].kind == "f"]
+COVERS = [None, "NSC", "FEW", "SCT", "BKN", "OVC", "VV"]
+CATEGORIES = [None, "VFR", "MVFR", "IFR", "LIFR"]
+
+
+class CodeTable:
+    """Append-only text <-> small int mapping; 0 is reserved for missing."""
+
+    def __init__(self, labels=None, limit=65535):
+        self.limit = limit
+        self._labels = [None]
+        self._codes = {}
+        for label in labels or []:
+            if label is not None:
+                self.code(label)
+
+    def code(self, label):
+        if label is None or label != label:
+            return 0
+        code = self._codes.get(label)
+        if code is None:
+            if len(self._labels) > self.limit:
+                return 0
+            code = self._codes[label] = len(self._labels)
+            self._labels.append(label)
+        return code
+
+    def codes(self, labels):
+        return np.fromiter((self.code(v) for v in labels), dtype=np.int64, count=len(labels))
+
+    def label(self, code):
+        return self._labels[code]
+
+    def labels(self, codes):
+        return np.asarray(self._labels, dtype=object)[np.asarray(codes, dtype=np.int64)]
+
+
+class StringPool:
+    """Interned raw strings with reference counts, so evicted reports free their slot."""
+
+    def __init__(self):
+        self._strings = [None]
+        self._refs = [0]
+        self._ids = {}
+        self._free = []
+
+    def intern(self, s):
+        i = self._ids.get(s)
+        if i is None:
+            if self._free:
+                i = self._free.pop()
+                self._strings[i] = s
+                self._refs[i] = 0
+            else:
+                i = len(self._strings)
+                self._strings.append(s)
+                self._refs.append(0)
+            self._ids[s] = i
+        self._refs[i] += 1
+        return i
+
+    def release(self, ids):
+        for i in ids:
+            i = int(i)
+            if i == 0:
+                continue
+            self._refs[i] -= 1
+            if self._refs[i] == 0:
+                del self._ids[self._strings[i]]
+                self._strings[i] = None
+                self._free.append(i)
+
+    def get(self, i):
+        return self._strings[int(i)]
+
+    def __len__(self):
+        return len(self._ids)
+
+
+class StationRing:
+    """Last ``capacity`` observations of one station, ordered by obs_time.
+
+    Records live in a buffer twice the capacity: appends go at the end and,
+    when it fills, the newest ``capacity`` rows are copied to the front of a
+    fresh buffer. The live window is therefore always contiguous and
+    ``view()`` can hand out slices without copying; slices already handed
+    out keep pointing at rows that never change.
+    """
+
+    def __init__(self, capacity, codes):
+        self.capacity = capacity
+        self.codes = codes
+        self.pool = StringPool()
+        self._buf = np.zeros(2 * capacity, dtype=RING_DTYPE)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    def _records(self, frame):
+        rec = np.zeros(len(frame), dtype=RING_DTYPE)
+        rec["obs_time"] = (frame["obs_time"].to_numpy(dtype="datetime64[s]")).astype(np.int64)
+        for name in FLOAT_FIELDS:
+            rec[name] = frame[name].to_numpy(dtype=np.float32, na_value=np.nan)
+        rec["weather"] = self.codes["weather"].codes(frame["weather"].tolist())
+        rec["cover"] = self.codes["cover"].codes(frame["cover"].tolist())
+        rec["category"] = self.codes["category"].codes(frame["flight_category"].tolist())
+        rec["runway"] = self.codes["runway"].codes(frame["runway"].tolist())
+        rec["metar"] = [self.pool.intern(m) for m in frame["metar"].tolist()]
+        return rec
+
+    def extend(self, frame):
+        if not len(frame):
+            return
+        rec = self._records(frame)
+        rec = rec[np.argsort(rec["obs_time"], kind="stable")]
+        if len(self) and rec["obs_time"][0] <= self._buf["obs_time"][self._end - 1]:
+            # Late or corrected report: merge into a fresh buffer, then carry on appending
+            rec = np.concatenate([self._buf[self._start:self._end], rec])
+            rec = rec[np.argsort(rec["obs_time"], kind="stable")]
+            self._buf = np.zeros(2 * self.capacity, dtype=RING_DTYPE)
+            self._start = self._end = 0
+        # One record per obs_time; the later arrival (a correction) wins
+        keep = np.append(rec["obs_time"][1:] != rec["obs_time"][:-1], True)
+        if not keep.all():
+            self.pool.release(rec["metar"][~keep])
+            rec = rec[keep]
+        if len(rec) > self.capacity:
+            self.pool.release(rec["metar"][:-self.capacity])
+            rec = rec[-self.capacity:]
+        # Evict the oldest rows that no longer fit, then compact if the tail is full
+        self._drop(len(self) + len(rec) - self.capacity)
+        if self._end + len(rec) > len(self._buf):
+            buf = np.zeros(2 * self.capacity, dtype=RING_DTYPE)
+            n = len(self)
+            buf[:n] = self._buf[self._start:self._end]
+            self._buf, self._start, self._end = buf, 0, n
+        self._buf[self._end:self._end + len(rec)] = rec
+        self._end += len(rec)
+
+    def _drop(self, n):
+        if n > 0:
+            self.pool.release(self._buf["metar"][self._start:self._start + n])
+            self._start += n
+
+    def view(self, start=None):
+        # Zero-copy slice of the live window, optionally from epoch ``start`` on
+        live = self._buf[self._start:self._end]
+        if start is not None:
+            live = live[np.searchsorted(live["obs_time"], start, side="left"):]
+        return live
+
+    def covers(self, start):
+        return len(self) > 0 and (len(self) < self.capacity or self._buf["obs_time"][self._start] <= start)
+
+    def latest(self):
+        return self._buf[self._end - 1] if len(self) else None
+
+    def metar(self, record):
+        return self.pool.get(record["metar"])
+
+
+class LiveHistory:
+    """Per-station ring buffers fed incrementally from the history store.
+
+    Same refresh rule as the store's other readers: nothing is read unless
+    the change token moved, and then only rows appended since the last look.
+    Views are shared between sessions and must be treated as read-only.
+    """
+
+    def __init__(self, store, stations=None, capacity=8192, preload=True):
+        if isinstance(stations, str):
+            stations = [stations]
+        self.store = store
+        self.stations = list(stations or [])
+        self.capacity = capacity
+        self.codes = {
+            "weather": CodeTable(),
+            "cover": CodeTable(COVERS, limit=255),
+            "category": CodeTable(CATEGORIES, limit=255),
+            "runway": CodeTable(limit=255),
+        }
+        self._rings = {}
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._token = None
+        # Bumped whenever new rows land; a cheap cache key for derived views
+        self.version = 0
+        if preload:
+            self._preload()
+
+    def _preload(self):
+        # Start from the newest ``capacity`` rows per station, not the whole archive
+        self._token = self.store.change_token()
+        self._last_id = self.store.max_id()
+        for station in self.stations:
+            self._ring(station).extend(self.store.read_latest(station, self.capacity, self._last_id))
+        self.version += 1
+
+    def _ring(self, station):
+        ring = self._rings.get(station)
+        if ring is None:
+            ring = self._rings[station] = StationRing(self.capacity, self.codes)
+        return ring
+
+    def refresh(self):
+        token = self.store.change_token()
+        if token == self._token:
+            return self.version
+        with self._lock:
+            if token == self._token:
+                return self.version
+            new = self.store.read_since(self._last_id, self.stations[0] if len(self.stations) == 1 else None)
+            if len(new):
+                self._last_id = int(new["id"].max())
+                new = new.dropna(subset=["obs_time"])
+                for station, rows in new.groupby("station", sort=False):
+                    if self.stations and station not in self.stations:
+                        continue
+                    self._ring(station).extend(rows)
+                self.version += 1
+            self._token = token
+        return self.version
+
+    def view(self, station, start=None):
+        ring = self._rings.get(station)
+        return ring.view(start) if ring is not None else np.zeros(0, dtype=RING_DTYPE)
+
+    def covers(self, station, start):
+        ring = self._rings.get(station)
+        return ring is not None and ring.covers(start)
+
+    def latest(self, station):
+        ring = self._rings.get(station)
+        return ring.latest() if ring is not None else None
+
+    def metar(self, station, record):
+        return self._rings[station].metar(record)
+
+    def label(self, field, code):
+        return self.codes[field].label(int(code))
+
+    def frame(self, station, start=None):
+        # Convenience DataFrame (a copy) with codes decoded back to text
+        v = self.view(station, start)
+        out = pd.DataFrame({n: v[n] for n in FLOAT_FIELDS})
+        out.insert(0, "obs_time", v["obs_time"].astype("datetime64[s]"))
+        for field, column in (("weather", "weather"), ("cover", "cover"), ("category", "flight_category"),
+                              ("runway", "runway")):
+            out[column] = self.codes[field].labels(v[field])
+        out["metar"] = [self._rings[station].pool.get(i) for i in v["metar"]] if len(v) else []
+        return out
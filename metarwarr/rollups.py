@@ -0,0 +1,158 @@
+# metarwarr - HOURLY / DAILY ROLLUPS
+import numpy as np
+import pandas as pd
+
+ROLLUP_METRICS = ["temp", "dew", "qnh", "wind_speed", "gust", "vis"]
+RESOLUTIONS = {"hour": 3600, "day": 86400}
+# last_time is the obs_time of the report that supplied ``last``, per metric
+_STATS = ["n", "sum", "min", "max", "last", "last_time"]
+# Live ingest appends a report or two; below this, cells are folded in plain Python
+SMALL_BATCH = 64
+
+
+def _num(v):
+    try:
+        v = float(v)
+    except (TypeError, ValueError):
+        return None
+    return None if v != v else v
+
+
+class Rollup:
+    """min/max/mean/count/last per station and time bucket, one wide row per bucket.
+
+    Batches are pre-aggregated (one groupby for bulk loads, a plain loop for
+    the few rows of a live poll) and merged with one UPSERT per bucket, so
+    ingest cost stays constant however long the history gets. Batches may
+    arrive in any order (cycle files, late reports): ``last`` only moves to
+    a value observed no earlier than the one it holds.
+    """
+
+    def __init__(self, resolution):
+        self.resolution = resolution
+        self.seconds = RESOLUTIONS[resolution]
+        self.table = f"rollup_{resolution}"
+        kinds = {"n": "INTEGER NOT NULL", "last_time": "INTEGER"}
+        cols = ",\n        ".join(f"{m}_{s} {kinds.get(s, 'REAL')}" for m in ROLLUP_METRICS for s in _STATS)
+        self.SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS {self.table} (
+        station TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        last_time INTEGER NOT NULL,
+        {cols},
+        PRIMARY KEY (station, bucket)
+    ) WITHOUT ROWID;
+    """
+        self.columns = names = ["station", "bucket", "last_time"] + [f"{m}_{s}" for m in ROLLUP_METRICS for s in _STATS]
+        updates = ["last_time = max(last_time, excluded.last_time)"]
+        for m in ROLLUP_METRICS:
+            # SET expressions see the old row, so both CASEs compare against the stored time
+            newer = (f"excluded.{m}_last IS NOT NULL AND "
+                     f"({m}_last_time IS NULL OR excluded.{m}_last_time >= {m}_last_time)")
+            updates += [
+                f"{m}_n = {m}_n + excluded.{m}_n",
+                f"{m}_sum = CASE WHEN excluded.{m}_n = 0 THEN {m}_sum ELSE coalesce({m}_sum, 0) + excluded.{m}_sum END",
+                f"{m}_min = min(coalesce({m}_min, excluded.{m}_min), coalesce(excluded.{m}_min, {m}_min))",
+                f"{m}_max = max(coalesce({m}_max, excluded.{m}_max), coalesce(excluded.{m}_max, {m}_max))",
+                f"{m}_last = CASE WHEN {newer} THEN excluded.{m}_last ELSE {m}_last END",
+                f"{m}_last_time = CASE WHEN {newer} THEN excluded.{m}_last_time ELSE {m}_last_time END",
+            ]
+        self._upsert = (
+            f"INSERT INTO {self.table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))}) "
+            f"ON CONFLICT (station, bucket) DO UPDATE SET {', '.join(updates)}"
+        )
+
+    def apply(self, conn, obs):
+        # obs: station, obs_time (epoch s) and the ROLLUP_METRICS columns
+        if len(obs):
+            cells = self._fold(obs) if len(obs) <= SMALL_BATCH else self._cells(obs)
+            conn.executemany(self._upsert, cells)
+
+    def replace(self, conn, old, new):
+        # min/max cannot be taken back, so buckets touched by a correction are
+        # recomputed from the stored observations (already updated in this transaction)
+        keys = {(s, int(t) // self.seconds * self.seconds)
+                for s, t in zip(list(old["station"]) + list(new["station"]), list(old["obs_time"]) + list(new["obs_time"]))}
+        for station, bucket in keys:
+            conn.execute(f"DELETE FROM {self.table} WHERE station = ? AND bucket = ?", (station, bucket))
+            rows = pd.read_sql_query(
+                f"SELECT station, obs_time, {', '.join(ROLLUP_METRICS)} FROM observations "
+                "WHERE station = ? AND obs_time >= ? AND obs_time < ?",
+                conn, params=[station, bucket, bucket + self.seconds],
+            )
+            self.apply(conn, rows)
+
+    def _fold(self, obs):
+        # Same cells as _cells, one pass over the rows in time order
+        stations = list(obs["station"])
+        times = [int(t) for t in obs["obs_time"]]
+        values = [[_num(v) for v in obs[m]] for m in ROLLUP_METRICS]
+        cells = {}
+        for i in sorted(range(len(times)), key=times.__getitem__):
+            key = (stations[i], times[i] // self.seconds * self.seconds)
+            cell = cells.get(key)
+            if cell is None:
+                cell = cells[key] = [key[0], key[1], times[i]] + [0, None, None, None, None, None] * len(ROLLUP_METRICS)
+            cell[2] = times[i]
+            for k, column in enumerate(values):
+                v = column[i]
+                if v is None:
+                    continue
+                j = 3 + 6 * k
+                if cell[j]:
+                    cell[j + 1] += v
+                    cell[j + 2] = min(cell[j + 2], v)
+                    cell[j + 3] = max(cell[j + 3], v)
+                else:
+                    cell[j + 1] = cell[j + 2] = cell[j + 3] = v
+                cell[j] += 1
+                cell[j + 4] = v
+                cell[j + 5] = times[i]
+        return [tuple(c) for c in cells.values()]
+
+    def _cells(self, obs):
+        frame = pd.DataFrame({m: pd.to_numeric(obs[m], errors="coerce").astype("float64") for m in ROLLUP_METRICS})
+        frame["station"] = np.asarray(obs["station"], dtype=object)
+        frame["obs_time"] = np.asarray(obs["obs_time"], dtype=np.int64)
+        frame["bucket"] = frame["obs_time"] // self.seconds * self.seconds
+        for m in ROLLUP_METRICS:
+            frame[f"{m}_t"] = frame["obs_time"].where(frame[m].notna())
+        frame = frame.sort_values("obs_time", kind="stable")
+        # One groupby pass for every column; "last" skips NaN, i.e. the latest reported value
+        spec = {"last_time": ("obs_time", "max")}
+        for m in ROLLUP_METRICS:
+            spec.update({f"{m}_n": (m, "count"), f"{m}_sum": (m, "sum"), f"{m}_min": (m, "min"),
+                         f"{m}_max": (m, "max"), f"{m}_last": (m, "last"), f"{m}_last_time": (f"{m}_t", "max")})
+        agg = frame.groupby(["station", "bucket"], sort=False).agg(**spec).reset_index()
+        for m in ROLLUP_METRICS:
+            # sum() of an all-NaN bucket is 0, but the stored sum must stay NULL
+            agg.loc[agg[f"{m}_n"] == 0, f"{m}_sum"] = np.nan
+        agg = agg.astype(object).where(agg.notna(), None)
+        for m in ROLLUP_METRICS:
+            agg[f"{m}_last_time"] = [None if t is None else int(t) for t in agg[f"{m}_last_time"]]
+        return agg.itertuples(index=False, name=None)
+
+
+def rollup_frame(cells):
+    """Stored rollup rows -> bucket as datetime plus ``{metric}_mean`` columns."""
+    cells = cells.copy()
+    cells["bucket"] = pd.to_datetime(cells["bucket"], unit="s")
+    cells["last_time"] = pd.to_datetime(cells["last_time"], unit="s")
+    for m in ROLLUP_METRICS:
+        cells[f"{m}_last_time"] = pd.to_datetime(cells[f"{m}_last_time"], unit="s")
+        n = cells[f"{m}_n"].astype("float64")
+        cells[f"{m}_mean"] = cells[f"{m}_sum"].astype("float64") / n.where(n > 0)
+    return cells
+
+
+def pick_resolution(span, points):
+    """Coarsest rollup that still yields at least ``points`` buckets over ``span``.
+
+    ``span`` is a Timedelta. Returns "day", "hour" or None when only raw
+    observations are fine-grained enough.
+    """
+    seconds = span.total_seconds()
+    for name in ("day", "hour"):
+        if seconds / RESOLUTIONS[name] >= points:
+            return name
+    return None
@@ -0,0 +1,85 @@
+# metarwarr - RUNWAY WIND COMPONENTS
+import numpy as np
+import pandas as pd
+
+# Runway ends per station: designator -> heading in degrees, same reference as METAR wind
+RUNWAYS = {
+    "WARR": {"10": 100, "28": 280},
+}
+
+COMPONENT_COLUMNS = ["runway", "crosswind", "headwind", "tailwind",
+                     "gust_crosswind", "gust_headwind", "gust_tailwind"]
+
+
+def wind_components(wind_dir, speed, heading, vrb=False):
+    """Crosswind, headwind and tailwind (kt) of wind against one runway heading.
+
+    Works elementwise on scalars or arrays. Variable (VRB) wind has no
+    direction, so it is counted at its worst: full speed as crosswind and
+    as tailwind. Missing direction or speed gives NaN.
+    """
+    wind_dir = np.asarray(wind_dir, dtype=np.float64)
+    speed = np.asarray(speed, dtype=np.float64)
+    vrb = np.asarray(vrb, dtype=bool)
+    angle = np.radians(wind_dir - np.asarray(heading, dtype=np.float64))
+    along = speed * np.cos(angle)
+    cross = np.abs(speed * np.sin(angle))
+    head = np.maximum(along, 0.0)
+    tail = np.maximum(-along, 0.0)
+    cross = np.where(vrb, speed, cross)
+    head = np.where(vrb, speed * 0.0, head)
+    tail = np.where(vrb, speed, tail)
+    return np.round(cross, 1), np.round(head, 1), np.round(tail, 1)
+
+
+def runway_components(station, wind_dir, speed, gust=None, vrb=False, runways=None):
+    """Components on the runway end favoured by the mean wind, for whole columns at once.
+
+    ``station`` may be one code or an array aligned with the wind columns.
+    The favoured end is the one with the most headwind; gust components
+    are taken on that same end. Stations without configured runways get NaN.
+    """
+    runways = RUNWAYS if runways is None else runways
+    speed = np.atleast_1d(np.asarray(speed, dtype=np.float64))
+    n = len(speed)
+    wind_dir = np.broadcast_to(np.asarray(wind_dir, dtype=np.float64), (n,))
+    gust = np.broadcast_to(np.asarray(np.nan if gust is None else gust, dtype=np.float64), (n,))
+    vrb = np.broadcast_to(np.asarray(vrb, dtype=bool), (n,))
+    stations = np.broadcast_to(np.asarray(station, dtype=object), (n,))
+
+    out = {c: np.full(n, np.nan) for c in COMPONENT_COLUMNS[1:]}
+    out["runway"] = np.full(n, None, dtype=object)
+    for code in pd.unique(stations):
+        ends = runways.get(code)
+        if not ends:
+            continue
+        rows = np.flatnonzero(stations == code)
+        names = list(ends)
+        headings = np.array([ends[r] for r in names], dtype=np.float64)
+        # (rows x ends) in one go, then pick the end with the most headwind
+        d, s, v = wind_dir[rows, None], speed[rows, None], vrb[rows, None]
+        cross, head, tail = wind_components(d, s, headings[None, :], v)
+        best = np.argmax(np.nan_to_num(head - tail, nan=-np.inf), axis=1)
+        pick = np.arange(len(rows)), best
+        out["runway"][rows] = np.asarray(names, dtype=object)[best]
+        out["crosswind"][rows], out["headwind"][rows], out["tailwind"][rows] = cross[pick], head[pick], tail[pick]
+        gcross, ghead, gtail = wind_components(d[:, 0], gust[rows], headings[best], v[:, 0])
+        out["gust_crosswind"][rows], out["gust_headwind"][rows], out["gust_tailwind"][rows] = gcross, ghead, gtail
+    out["runway"][np.isnan(out["crosswind"])] = None
+    return pd.DataFrame(out)[COMPONENT_COLUMNS]
+
+
+def components_from_parsed(station, parsed, runways=None):
+    # Single observation (parse_metar dict) -> {column: value}, None where unknown
+    wind_dir = parsed.get("wind_dir")
+    vrb = wind_dir == "VRB"
+    try:
+        direction = np.nan if vrb or wind_dir is None else float(wind_dir)
+    except ValueError:
+        direction = np.nan
+    speed = parsed.get("wind_speed")
+    frame = runway_components(
+        station, direction, np.nan if speed is None else speed, parsed.get("gust"), vrb, runways
+    )
+    row = frame.iloc[0].to_dict()
+    return {k: (None if isinstance(v, float) and np.isnan(v) else v) for k, v in row.items()}
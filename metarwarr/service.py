@@ -0,0 +1,105 @@
+# metarwarr - HEADLESS SERVICE (CLI / DAEMON)
+import argparse
+import logging
+import signal
+import sys
+import threading
+
+log = logging.getLogger(__name__)
+
+
+def _store(args):
+    from metarwarr.history_store import open_store
+
+    return open_store(args.db, legacy_csv=args.legacy_csv)
+
+
+def _engines(args, store):
+    from metarwarr.alerts import AlertEngine, load_rules
+    from metarwarr.detectors import StreamDetectors
+
+    rules, overrides = load_rules(args.rules) if args.rules else (None, None)
+    return AlertEngine(rules, overrides, store=store), StreamDetectors(store=store)
+
+
+def _wait(stop):
+    # Block until SIGINT/SIGTERM; Ctrl-C also lands here
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    while not stop.wait(1):
+        pass
+
+
+def cmd_parse(args):
+    import json
+
+    from metarwarr.metar import parse_metar
+
+    lines = args.metar or [line.strip() for line in sys.stdin if line.strip()]
+    for metar in lines:
+        print(json.dumps(parse_metar(metar), ensure_ascii=False))
+
+
+def cmd_run(args):
+    from metarwarr.api import make_server, serve_in_background
+    from metarwarr.ingest import IngestWorker
+
+    store = _store(args)
+    alerts, detectors = _engines(args, store)
+    worker = None
+    if not args.no_ingest:
+        stations = args.stations or ([] if args.mode == "cycle" else ["WARR"])
+        worker = IngestWorker(
+            store, stations, interval=args.interval, mode=args.mode, alerts=alerts, detectors=detectors,
+            on_new=lambda metar, parsed: log.info("new METAR %s", metar),
+            on_alert=lambda station, fired, cleared, obs_time: log.warning(
+                "%s alerts fired=%s cleared=%s", station, [r.name for r in fired], [r.name for r in cleared]),
+        ).start()
+    server = None
+    if args.port:
+        server = make_server(store, args.host, args.port, alerts=alerts, detectors=detectors)
+        serve_in_background(server)
+        log.info("API listening on http://%s:%d", args.host, server.server_address[1])
+    stop = threading.Event()
+    try:
+        _wait(stop)
+    finally:
+        if worker is not None:
+            worker.stop(5)
+        if server is not None:
+            server.shutdown()
+        store.close()
+
+
+def build_parser():
+    ap = argparse.ArgumentParser(prog="python -m metarwarr",
+                                 description="METAR ingest and query service without the dashboard")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("parse", help="decode METARs (arguments or stdin) to JSON lines")
+    p.add_argument("metar", nargs="*")
+    p.set_defaults(func=cmd_parse)
+
+    p = sub.add_parser("run", help="poll NOAA, persist history, evaluate alerts and serve the JSON API")
+    p.add_argument("--station", action="append", dest="stations", help="ICAO code, repeatable (default WARR)")
+    p.add_argument("--db", default="metar_history.db")
+    p.add_argument("--legacy-csv", default="metar_history.csv")
+    p.add_argument("--interval", type=int, default=60)
+    p.add_argument("--mode", choices=["station", "cycle"], default="station",
+                   help="per-station files or bulk hourly cycle files")
+    p.add_argument("--rules", help="alert rules JSON (default: built-in rules)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765, help="API port, 0 to disable the API")
+    p.add_argument("--no-ingest", action="store_true", help="serve the existing history only")
+    p.set_defaults(func=cmd_run)
+    return ap
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# metarwarr - HOT-PATH INSTRUMENTATION
+import functools
+import threading
+import time
+from collections import deque
+
+PREFIX = "metarwarr"
+# Recent durations kept per span for the rolling quantiles
+WINDOW = 512
+QUANTILES = (0.5, 0.99)
+
+# Prometheus HELP text for the counters recorded across the package
+HELP = {
+    "fetch_responses": "NOAA responses by HTTP status (error = request failed)",
+    "cycle_rotations": "Cycle files found shorter than the consumed offset",
+    "reports_fetched": "Reports handed to the ingest worker, before dedup",
+    "rows_ingested": "Rows offered to the history store by outcome",
+    "report_cache_hits": "Page report bundles served from the parse cache",
+    "report_cache_misses": "Page report bundles built from scratch",
+    "notify_sent": "Notifications delivered",
+    "notify_failed": "Notifications given up after the last retry",
+    "notify_retries": "Notification delivery retries",
+    "notify_duplicates": "Notifications dropped as already sent or queued",
+    "api_requests": "JSON API requests by HTTP status",
+}
+
+
+def _quantile(ordered, q):
+    # Nearest rank on an already sorted list
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    body = ",".join('%s="%s"' % (k, str(v).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+                    for k, v in pairs)
+    return "{" + body + "}"
+
+
+class SpanStats:
+    __slots__ = ("count", "total", "max", "recent")
+
+    def __init__(self, window):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+
+
+class _Span:
+    __slots__ = ("telemetry", "name", "t0")
+
+    def __init__(self, telemetry, name):
+        self.telemetry = telemetry
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.telemetry.observe(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class Stopwatch:
+    """Times consecutive sections of one script run without re-indenting them.
+
+    ``lap(name)`` records the time since the previous lap as span
+    ``prefix.name``; ``lap()`` restarts the clock without recording (after
+    a section that times itself); ``done(name)`` records the whole run.
+    """
+
+    __slots__ = ("telemetry", "prefix", "start", "last")
+
+    def __init__(self, telemetry, prefix):
+        self.telemetry = telemetry
+        self.prefix = prefix
+        self.start = self.last = time.perf_counter()
+
+    def lap(self, name=None):
+        now = time.perf_counter()
+        if name is not None:
+            self.telemetry.observe(f"{self.prefix}.{name}", now - self.last)
+        self.last = now
+
+    def done(self, name):
+        self.telemetry.observe(f"{self.prefix}.{name}", time.perf_counter() - self.start)
+
+
+class Telemetry:
+    """Process-wide timing spans and counters, cheap enough to leave on.
+
+    A span costs two ``perf_counter`` calls and one short critical section;
+    quantiles are only computed when someone reads them (``snapshot``,
+    ``prometheus_text``). Spans keep their count, sum and max since start
+    plus the last ``window`` durations for rolling p50/p99. Counters may
+    carry labels, e.g. ``count("fetch_responses", status=304)``.
+    """
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._spans = {}
+        self._counters = {}
+
+    def observe(self, name, seconds):
+        with self._lock:
+            stats = self._spans.get(name)
+            if stats is None:
+                stats = self._spans[name] = SpanStats(self.window)
+            stats.count += 1
+            stats.total += seconds
+            if seconds > stats.max:
+                stats.max = seconds
+            stats.recent.append(seconds)
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def timed(self, name):
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with _Span(self, name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def stopwatch(self, prefix):
+        return Stopwatch(self, prefix)
+
+    def count(self, name, n=1, **labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items()))) if labels else (name, ())
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+
+    # =========================
+    # READOUT
+    # =========================
+    def snapshot(self):
+        """Spans as {name: {count, total, max, p50, p99}} (seconds) and counters as {(name, labels): value}."""
+        with self._lock:
+            spans = {name: (s.count, s.total, s.max, list(s.recent)) for name, s in self._spans.items()}
+            counters = dict(self._counters)
+        out = {}
+        for name, (n, total, peak, recent) in sorted(spans.items()):
+            recent.sort()
+            row = {"count": n, "total": total, "max": peak}
+            for q in QUANTILES:
+                row[f"p{round(q * 100)}"] = _quantile(recent, q) if recent else None
+            out[name] = row
+        return out, dict(sorted(counters.items()))
+
+    def prometheus_text(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        spans, counters = self.snapshot()
+        lines = [
+            f"# HELP {PREFIX}_span_seconds Time spent in instrumented sections; quantiles over the last "
+            f"{self.window} runs of each span",
+            f"# TYPE {PREFIX}_span_seconds summary",
+        ]
+        for name, row in spans.items():
+            for q in QUANTILES:
+                value = row[f"p{round(q * 100)}"]
+                lines.append(f"{PREFIX}_span_seconds{_labels([('span', name), ('quantile', q)])} {value!r}")
+            lines.append(f"{PREFIX}_span_seconds_sum{_labels([('span', name)])} {row['total']!r}")
+            lines.append(f"{PREFIX}_span_seconds_count{_labels([('span', name)])} {row['count']}")
+        seen = set()
+        for (name, labels), value in counters.items():
+            metric = f"{PREFIX}_{name}_total"
+            if name not in seen:
+                seen.add(name)
+                if name in HELP:
+                    lines.append(f"# HELP {metric} {HELP[name]}")
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+telemetry = Telemetry()
+span = telemetry.span
+timed = telemetry.timed
+stopwatch = telemetry.stopwatch
+count = telemetry.count
@@ -0,0 +1,81 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+from metarwarr.history_store import SQLiteHistoryStore
+from metarwarr.replay import Corpus, SimClock, StandInServer
+
+TEMPLATES = [
+    "09005KT 9999 FEW020 30/24 Q1010 NOSIG",
+    "10008KT 8000 SCT018 31/24 Q1009 NOSIG",
+    "VRB03KT 6000 BKN015 29/25 Q1011 TEMPO TSRA",
+]
+START = datetime(2026, 10, 1)
+
+
+@pytest.fixture
+def standin():
+    """Factory for a NOAA stand-in on a frozen clock; servers are shut down after the test."""
+    servers = []
+
+    def start(stations=("WARR",), **options):
+        corpus = Corpus(TEMPLATES, stations, START, timedelta(hours=3))
+        # speed 0: the clock stays put, so every request sees the same latest report
+        clock = SimClock(START + timedelta(hours=2, minutes=5), speed=0)
+        server = StandInServer(corpus, clock, **options).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteHistoryStore(os.path.join(tmp_path, "history.db"))
+    yield store
+    store.close()
+
+
+class _FonnteHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with server.lock:
+            server.posts.append((time.monotonic(), self.headers.get("Authorization"), parse_qs(body.decode())))
+            status, reply = server.replies.pop(0) if server.replies else (200, {"status": True})
+        data = json.dumps(reply).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+@pytest.fixture
+def fonnte():
+    """Local stand-in for the Fonnte send API.
+
+    ``replies`` is a list of (status, json body) answered in order, then 200
+    ``{"status": true}``; ``posts`` records (monotonic time, Authorization, form).
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FonnteHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.posts, server.replies = [], []
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/send"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,74 @@
+import math
+
+import pandas as pd
+import pytest
+
+from metarwarr.batch import parse_batch
+from metarwarr.bench import synthetic_corpus
+from metarwarr.metar import decode_metar
+
+FIELDS = [
+    "station", "day", "hour", "minute", "wind_dir", "wind_vrb", "wind_speed", "gust",
+    "wind_var_from", "wind_var_to", "vis", "cavok", "weather", "ceiling", "temp", "dew", "qnh",
+]
+
+EDGE_CASES = [
+    "WARR 010000Z 09005KT 9999 FEW020 30/// Q1010",
+    "WARR 010000Z 09005KT 9999 FEW020 M05/// Q1010 NOSIG",
+    "WARR 010000Z 09005KT 9999 FEW020 30/ Q1010",
+    "WARR 010000Z 09005KT 9999 FEW020 30/M02 Q1010=",
+    "METAR COR WIII 010030Z /////KT //// // ////// ///// Q////",
+    "KJFK 010051Z 16017G P99KT M1/4SM VA VCSH BLSA FEW011 M14/M15 A2883 RMK AO2",
+    "KORD 010051Z 120105GP99KT 1 1/2SM VV001 M08/M10 A3049 RESN RMK AO2",
+    "WIII 010100Z 23033MPS 0800 PRFG // SA NSC M23/M24 Q0960 BECMG 3000 BR",
+    "KORD 010151Z 11010KT 1SM FEW006 SCT013 OVC084//",
+    "WARR 010200Z VRB02KT CAVOK 31/24 Q1008 TEMPO TSRA",
+]
+
+
+def _plain(v):
+    if v is None or v is pd.NA:
+        return None
+    if hasattr(v, "item"):
+        v = v.item()
+    if isinstance(v, float):
+        if math.isnan(v):
+            return None
+        if v == int(v):
+            return int(v)
+    return v
+
+
+def _scalar(raw):
+    obs = decode_metar(raw)
+    row = {f: getattr(obs, f) for f in FIELDS}
+    row["weather"] = " ".join(obs.weather) if obs.weather else "NIL"
+    return row
+
+
+def _mismatches(reports):
+    frame = parse_batch(reports)
+    out = []
+    for raw, (_, batch) in zip(reports, frame.iterrows()):
+        scalar = _scalar(raw)
+        for f in FIELDS:
+            if _plain(scalar[f]) != _plain(batch[f]):
+                out.append((raw, f, scalar[f], batch[f]))
+    return out
+
+
+@pytest.mark.parametrize("raw", EDGE_CASES)
+def test_batch_matches_scalar_on_edge_cases(raw):
+    assert _mismatches([raw]) == []
+
+
+def test_batch_matches_scalar_on_corpus():
+    reports = [row["metar"] for row in synthetic_corpus(5000, seed=1)]
+    assert _mismatches(reports)[:5] == []
+
+
+def test_missing_dew_point():
+    frame = parse_batch(["WARR 010000Z 09005KT 9999 FEW020 30/// Q1010"])
+    assert frame["temp"].iloc[0] == 30
+    assert math.isnan(frame["dew"].iloc[0])
+    assert frame["qnh"].iloc[0] == 1010
@@ -0,0 +1,72 @@
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from metarwarr.cycles import CycleFileReader, parse_record
+from metarwarr.history_store import is_correction
+
+CYCLE = (
+    b"2026/10/01 00:00\nWARR 010000Z 09005KT 9999 FEW020 30/24 Q1010 NOSIG=\n\n"
+    b"2026/10/01 00:05\nMETAR COR WARR 010000Z 09006KT 9999 FEW020 30/24 Q1010 NOSIG=\n\n"
+    b"2026/10/01 00:06\nSPECI AMD WIII 010005Z 18010KT 5000 RA BKN015 27/25 Q1008=\n\n"
+    b"2026/10/01 00:07\nKJFK 010000Z 16017KT 10SM FEW250 20/10 A3001\n\n"
+)
+
+
+@pytest.mark.parametrize("record, station, report", [
+    (b"2026/10/01 00:00\nWARR 010000Z 09005KT 9999 Q1010=",
+     "WARR", "WARR 010000Z 09005KT 9999 Q1010"),
+    (b"2026/10/01 00:05\nMETAR COR WARR 010000Z 09006KT 9999 Q1010=",
+     "WARR", "COR WARR 010000Z 09006KT 9999 Q1010"),
+    (b"COR WARR 010000Z 09006KT 9999 Q1010",
+     "WARR", "COR WARR 010000Z 09006KT 9999 Q1010"),
+    (b"SPECI AMD WIII 010005Z 18010KT 5000 RA",
+     "WIII", "AMD WIII 010005Z 18010KT 5000 RA"),
+])
+def test_parse_record_station(record, station, report):
+    got_station, got_report, _ = parse_record(record)
+    assert (got_station, got_report) == (station, report)
+
+
+def test_parse_record_keeps_correction_flag():
+    station, report, stamp = parse_record(b"2026/10/01 00:05\nMETAR COR WARR 010000Z 09006KT 9999 Q1010=")
+    assert stamp == datetime(2026, 10, 1, 0, 5)
+    assert is_correction(report)
+
+
+@pytest.mark.parametrize("record", [b"", b"2026/10/01 00:00\n", b"METAR COR"])
+def test_parse_record_without_station(record):
+    assert parse_record(record) is None
+
+
+class _CycleHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(CYCLE)))
+        self.end_headers()
+        self.wfile.write(CYCLE)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+@pytest.fixture
+def cycle_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CycleHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/cycles/{{hour:02d}}Z.TXT"
+    server.shutdown()
+    server.server_close()
+
+
+def test_read_tail_keeps_allowlisted_correction(cycle_url):
+    reports, offset = CycleFileReader(url_template=cycle_url).read_tail(0, 0, allow={"WARR"})
+    assert [(station, report.split()[0]) for station, report, _ in reports] == [("WARR", "WARR"), ("WARR", "COR")]
+    assert offset == len(CYCLE)
+
+
+def test_read_tail_without_allowlist_uses_real_stations(cycle_url):
+    reports, _ = CycleFileReader(url_template=cycle_url).read_tail(0, 0)
+    assert [station for station, _, _ in reports] == ["WARR", "WARR", "WIII", "KJFK"]
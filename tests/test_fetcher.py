@@ -0,0 +1,112 @@
+import socket
+import threading
+import time
+
+import pytest
+import requests
+
+from metarwarr.fetcher import MetarFetcher
+from metarwarr.replay import STATION_PATH, StandInHandler
+
+
+@pytest.fixture
+def fetcher_for():
+    fetchers = []
+
+    def make(server, **options):
+        fetcher = MetarFetcher(url_template=server.base_url + STATION_PATH, timeout=(1, 5), **options)
+        fetchers.append(fetcher)
+        return fetcher
+
+    yield make
+    for fetcher in fetchers:
+        fetcher.close()
+
+
+def test_200_returns_latest_report(standin, fetcher_for):
+    server = standin()
+    res = fetcher_for(server).fetch_one("WARR")
+    assert res.status == 200
+    assert res.metar.startswith("WARR 010200Z ")
+    assert res.changed
+    assert res.error is None
+
+
+def test_conditional_get_gets_304(standin, fetcher_for):
+    server = standin()
+    fetcher = fetcher_for(server)
+    first = fetcher.fetch_one("WARR")
+    second = fetcher.fetch_one("WARR")
+    assert second.status == 304
+    assert second.metar == first.metar
+    assert not second.changed
+    assert server.counters["not_modified"] == 1
+
+
+def test_forced_304_keeps_cached_report(standin, fetcher_for):
+    # A stale cache in front of NOAA answers 304 even though the file changed
+    server = standin(not_modified_rate=1.0)
+    fetcher = fetcher_for(server)
+    first = fetcher.fetch_one("WARR")
+    assert first.status == 200
+    res = fetcher.fetch_one("WARR")
+    assert (res.status, res.metar, res.changed) == (304, first.metar, False)
+
+
+def test_http_error_keeps_cached_report(standin, fetcher_for):
+    server = standin()
+    fetcher = fetcher_for(server)
+    first = fetcher.fetch_one("WARR")
+    server.error_rate = 1.0
+    res = fetcher.fetch_one("WARR")
+    assert res.status == 503
+    assert res.metar == first.metar
+    assert not res.changed
+    assert fetcher_for(server).fetch_one("WARR").metar is None
+
+
+def test_unknown_station_is_404(standin, fetcher_for):
+    res = fetcher_for(standin()).fetch_one("ZZZZ")
+    assert (res.status, res.metar, res.changed) == (404, None, False)
+
+
+def test_connection_failure_is_reported():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    fetcher = MetarFetcher(url_template=f"http://127.0.0.1:{port}{STATION_PATH}", timeout=(1, 1))
+    try:
+        res = fetcher.fetch_one("WARR")
+    finally:
+        fetcher.close()
+    assert res.status is None
+    assert isinstance(res.error, requests.RequestException)
+
+
+class _Tracking(StandInHandler):
+    def do_GET(self):
+        server = self.server
+        with server.track_lock:
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+        try:
+            super().do_GET()
+        finally:
+            with server.track_lock:
+                server.in_flight -= 1
+
+
+@pytest.mark.parametrize("per_host", [1, 3])
+def test_per_host_concurrency_is_capped(standin, fetcher_for, per_host):
+    stations = ["WARR"] + [f"X{i:03d}" for i in range(1, 12)]
+    server = standin(stations, latency=(0.05, 0.05))
+    server.RequestHandlerClass = _Tracking
+    server.track_lock, server.in_flight, server.peak = threading.Lock(), 0, 0
+    fetcher = fetcher_for(server, max_workers=12, per_host=per_host)
+    t0 = time.monotonic()
+    results = fetcher.fetch_many(stations)
+    elapsed = time.monotonic() - t0
+    assert sorted(results) == sorted(stations)
+    assert all(r.status == 200 for r in results.values())
+    assert server.peak == per_host
+    assert elapsed >= len(stations) / per_host * 0.05 * 0.9
@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from metarwarr.history_store import DUPLICATE, INSERTED, SUPERSEDED
+
+OBS_TIME = datetime(2026, 10, 1, 0, 0)
+ORIGINAL = "WARR 010000Z 09005KT 9999 FEW020 30/24 Q1010 NOSIG"
+CORRECTION = "WARR COR 010000Z 09012KT 9999 FEW020 30/23 Q1009 NOSIG"
+
+
+def _row(metar, obs_time=OBS_TIME):
+    return {"station": "WARR", "obs_time": obs_time, "time": "2026-10-01 00:02:00", "metar": metar}
+
+
+def test_same_report_is_stored_once(store):
+    assert store.ingest([_row(ORIGINAL)]) == [INSERTED]
+    # Framing never changes the content: prefix, spacing, trailing "="
+    again = ["METAR " + ORIGINAL, ORIGINAL.replace(" ", "  ") + "=", ORIGINAL]
+    assert store.ingest([_row(m) for m in again]) == [DUPLICATE] * 3
+    assert store.count() == 1
+
+
+def test_duplicates_within_one_batch(store):
+    assert store.ingest([_row(ORIGINAL), _row(ORIGINAL)]) == [INSERTED, DUPLICATE]
+    assert store.count() == 1
+
+
+def test_correction_supersedes_in_place(store):
+    store.append([_row(ORIGINAL)])
+    first_id = store.max_id()
+    assert store.ingest([_row(CORRECTION)]) == [SUPERSEDED]
+    assert store.count() == 1
+    latest = store.latest("WARR")
+    assert latest["metar"] == CORRECTION
+    assert latest["qnh"] == 1009
+    # A fresh id so incremental readers see the corrected row
+    assert store.max_id() > first_id
+    assert store.read_since(first_id)["metar"].tolist() == [CORRECTION]
+
+
+def test_correction_updates_rollups(store):
+    store.append([_row(ORIGINAL)])
+    store.append([_row(CORRECTION)])
+    cells = store.read_rollup("WARR", resolution="hour")
+    assert len(cells) == 1
+    assert cells["qnh_n"].iloc[0] == 1
+    assert cells["qnh_mean"].iloc[0] == 1009
+
+
+def test_late_original_does_not_undo_correction(store):
+    store.append([_row(CORRECTION)])
+    assert store.ingest([_row(ORIGINAL), _row(CORRECTION)]) == [DUPLICATE, DUPLICATE]
+    assert store.latest("WARR")["metar"] == CORRECTION
+
+
+def test_other_station_or_time_is_a_new_row(store):
+    other = ORIGINAL.replace("010000Z", "010030Z")
+    rows = [_row(ORIGINAL), _row(other, datetime(2026, 10, 1, 0, 30)),
+            dict(_row(ORIGINAL.replace("WARR", "WIII")), station="WIII")]
+    assert store.ingest(rows) == [INSERTED] * 3
+    assert store.count() == 3
+    assert store.stations() == ["WARR", "WIII"]
@@ -0,0 +1,90 @@
+import pytest
+
+from metarwarr.metar import decode_metar, parse_metar
+
+
+def test_plain_report():
+    parsed = parse_metar("WARR 010000Z 09005KT 9999 FEW020 30/24 Q1010 NOSIG=")
+    assert parsed == {
+        "station": "WARR", "day": "01", "hour": "00", "minute": "00", "wind_dir": "090", "wind_speed": 5,
+        "gust": None, "vis": 10000, "weather": "NIL", "cloud": "FEW 2000FT ", "temp": 30, "dew": 24,
+        "qnh": 1010, "trend": "NOSIG",
+    }
+
+
+@pytest.mark.parametrize("group, cloud", [
+    ("BKN///", "BKN /// "),
+    ("OVC///CB", "OVC /// CB"),
+    ("BKN012CB", "BKN 1200FT CB"),
+    ("SCT015TCU", "SCT 1500FT TCU"),
+    ("VV002", "VV 200FT "),
+])
+def test_cloud_text(group, cloud):
+    assert parse_metar(f"WARR 010000Z 09005KT 2000 {group} 30/24 Q1010")["cloud"] == cloud
+
+
+def test_missing_cloud_base_has_no_ceiling():
+    obs = decode_metar("WARR 010000Z 09005KT 9999 BKN/// 30/24 Q1010")
+    assert obs.clouds == [("BKN", None, None)]
+    assert obs.ceiling is None
+
+
+def test_variable_wind():
+    parsed = parse_metar("WARR 010000Z VRB03KT 9999 FEW020 30/24 Q1010")
+    assert (parsed["wind_dir"], parsed["wind_speed"]) == ("VRB", 3)
+    obs = decode_metar("WARR 010000Z 24012G25KT 200V280 9999 FEW020 30/24 Q1010")
+    assert (obs.wind_dir, obs.wind_speed, obs.gust, obs.wind_var_from, obs.wind_var_to) == (240, 12, 25, 200, 280)
+
+
+@pytest.mark.parametrize("group, vis", [
+    ("P6SM", 10000),
+    ("10SM", 10000),
+    ("M1/4SM", 402),
+    ("1/2SM", 805),
+    ("1 1/2SM", 2414),
+    ("0800", 800),
+    ("9999", 10000),
+])
+def test_visibility(group, vis):
+    assert parse_metar(f"KJFK 010051Z 16017KT {group} OVC004 10/09 A2992")["vis"] == vis
+
+
+def test_clear_sky_groups():
+    nsc = decode_metar("WARR 010000Z 09005KT 9999 NSC 30/24 Q1010")
+    assert (nsc.sky_clear, nsc.cavok, nsc.cloud_text()) == ("NSC", False, "NSC")
+    cavok = decode_metar("WARR 010000Z 09005KT CAVOK 30/24 Q1010 NOSIG")
+    assert (cavok.cavok, cavok.vis, cavok.cloud_text(), cavok.trend) == (True, 10000, "CAVOK", "NOSIG")
+
+
+def test_runway_visual_range():
+    obs = decode_metar("WARR 010000Z 09005KT 0600 R10/0550V0800U R28L/P2000N FG VV001 25/25 Q1010")
+    assert obs.rvr == [("10", "0550V0800", "U"), ("28L", "P2000", "N")]
+    assert (obs.vis, obs.weather, obs.vertical_vis) == (600, ["FG"], 100)
+    assert obs.unparsed == []
+
+
+@pytest.mark.parametrize("metar", [
+    "METAR COR WARR 010000Z 09005KT 9999 FEW020 30/24 Q1010",
+    "COR WARR 010000Z 09005KT 9999 FEW020 30/24 Q1010",
+    "WARR COR 010000Z 09005KT 9999 FEW020 30/24 Q1010",
+])
+def test_correction_flag(metar):
+    obs = decode_metar(metar)
+    assert (obs.station, obs.modifiers, obs.day, obs.qnh) == ("WARR", ["COR"], 1, 1010)
+
+
+def test_amended_special():
+    obs = decode_metar("SPECI AMD WIII 010005Z 18010KT 5000 -RA BKN015 27/25 Q1008")
+    assert (obs.report_type, obs.station, obs.modifiers, obs.weather) == ("SPECI", "WIII", ["AMD"], ["-RA"])
+
+
+def test_missing_groups():
+    parsed = parse_metar("WARR 010000Z /////KT //// // ////// 30/// Q1010")
+    assert "wind_dir" not in parsed and "vis" not in parsed
+    assert (parsed["weather"], parsed["temp"], parsed["qnh"]) == ("NIL", 30, 1010)
+    assert "dew" not in parsed
+
+
+def test_trend_and_remarks():
+    obs = decode_metar("WARR 010000Z 09005KT 9999 FEW020 30/24 Q1010 TEMPO TSRA RMK CB TO W=")
+    assert (obs.trend, obs.remarks) == ("TEMPO TSRA", "CB TO W")
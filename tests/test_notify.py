@@ -0,0 +1,136 @@
+import time
+
+import pytest
+
+from metarwarr.notify import FonnteSender, NotificationDispatcher, notification_key
+
+
+def _wait(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for the dispatcher")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def dispatcher_for():
+    dispatchers = []
+
+    def make(send, **options):
+        options.setdefault("coalesce_window", 0.0)
+        options.setdefault("backoff", 0.05)
+        dispatcher = NotificationDispatcher(send, **options).start()
+        dispatchers.append(dispatcher)
+        return dispatcher
+
+    yield make
+    for dispatcher in dispatchers:
+        dispatcher.stop(5)
+
+
+def _settled(dispatcher):
+    stats = dispatcher.stats()
+    return stats["queue_depth"] == 0 and stats["in_flight"] == 0 and stats["submitted"] == (
+        stats["sent"] + stats["failed"])
+
+
+def test_sends_form_with_token(fonnte, dispatcher_for):
+    notifier = dispatcher_for(FonnteSender("secret", "628123", url=fonnte.url))
+    assert notifier.submit("WARR 010000Z", "hello")
+    _wait(lambda: notifier.stats()["sent"] == 1)
+    [(_, auth, form)] = fonnte.posts
+    assert auth == "secret"
+    assert form == {"target": ["628123"], "message": ["hello"]}
+
+
+def test_5xx_is_retried_with_backoff(fonnte, dispatcher_for):
+    fonnte.replies = [(503, {}), (502, {})]
+    notifier = dispatcher_for(FonnteSender("t", "1", url=fonnte.url), backoff=0.1)
+    notifier.submit("WARR 010000Z", "hello")
+    _wait(lambda: notifier.stats()["sent"] == 1)
+    times = [t for t, _, _ in fonnte.posts]
+    assert len(times) == 3
+    # Jittered exponential backoff: at least half of 0.1 s, then half of 0.2 s
+    assert times[1] - times[0] >= 0.05
+    assert times[2] - times[1] >= 0.1
+    stats = notifier.stats()
+    assert (stats["retries"], stats["failed"]) == (2, 0)
+
+
+def test_rejected_body_is_retried(fonnte, dispatcher_for):
+    fonnte.replies = [(200, {"status": False, "reason": "device offline"})]
+    notifier = dispatcher_for(FonnteSender("t", "1", url=fonnte.url))
+    notifier.submit("WARR 010000Z", "hello")
+    _wait(lambda: notifier.stats()["sent"] == 1)
+    assert len(fonnte.posts) == 2
+    assert notifier.stats()["retries"] == 1
+
+
+def test_gives_up_after_max_attempts(fonnte, dispatcher_for):
+    fonnte.replies = [(500, {})] * 3
+    notifier = dispatcher_for(FonnteSender("t", "1", url=fonnte.url), max_attempts=3, backoff=0.01)
+    notifier.submit("WARR 010000Z", "hello")
+    _wait(lambda: _settled(notifier))
+    stats = notifier.stats()
+    assert (stats["sent"], stats["failed"], stats["retries"]) == (0, 1, 2)
+    assert len(fonnte.posts) == 3
+    # Not remembered as sent: the same key may be tried again later
+    assert notifier.submit("WARR 010000Z", "hello")
+
+
+def test_same_observation_is_sent_once(fonnte, dispatcher_for):
+    notifier = dispatcher_for(FonnteSender("t", "1", url=fonnte.url))
+    key = notification_key({"station": "WARR", "day": "01", "hour": "00", "minute": "00"})
+    assert notifier.submit(key, "first")
+    assert not notifier.submit(key, "queued copy")
+    _wait(lambda: notifier.stats()["sent"] == 1)
+    assert not notifier.submit(key, "after send")
+    assert notifier.submit("WARR 010030Z", "next report")
+    _wait(lambda: notifier.stats()["sent"] == 2)
+    assert [form["message"] for _, _, form in fonnte.posts] == [["first"], ["next report"]]
+    assert notifier.stats()["duplicates"] == 2
+
+
+def test_sent_keys_survive_restart(fonnte, dispatcher_for, store):
+    notifier = dispatcher_for(FonnteSender("t", "1", url=fonnte.url), store=store)
+    notifier.submit("WARR 010000Z", "hello")
+    _wait(lambda: notifier.stats()["sent"] == 1)
+    _wait(lambda: store.get_state("notify_sent") is not None)
+    restarted = dispatcher_for(FonnteSender("t", "1", url=fonnte.url), store=store)
+    assert not restarted.submit("WARR 010000Z", "hello again")
+    assert len(fonnte.posts) == 1
+
+
+def test_burst_is_coalesced(fonnte, dispatcher_for):
+    notifier = dispatcher_for(FonnteSender("t", "1", url=fonnte.url), coalesce_window=0.5)
+    for k in range(3):
+        notifier.submit(f"WARR 0100{k}0Z", f"alert {k}")
+    _wait(lambda: notifier.stats()["sent"] == 3)
+    [(_, _, form)] = fonnte.posts
+    assert form["message"] == ["alert 0\n\nalert 1\n\nalert 2"]
+    assert notifier.stats()["coalesced"] == 2
+
+
+def test_without_sender_drops_quietly(dispatcher_for):
+    notifier = dispatcher_for(None)
+    assert notifier.submit("WARR 010000Z", "hello")
+    _wait(lambda: notifier.stats()["queue_depth"] == 0 and notifier.stats()["in_flight"] == 0)
+    time.sleep(0.05)
+    stats = notifier.stats()
+    assert (stats["submitted"], stats["sent"], stats["failed"], stats["retries"]) == (1, 0, 0, 0)
+
+
+def test_stats_counters(fonnte, dispatcher_for):
+    fonnte.replies = [(503, {})]
+    notifier = dispatcher_for(FonnteSender("t", "1", url=fonnte.url), backoff=0.01)
+    notifier.submit("WARR 010000Z", "a")
+    notifier.submit("WARR 010000Z", "a")
+    notifier.submit("WARR 010030Z", "b")
+    _wait(lambda: _settled(notifier))
+    stats = notifier.stats()
+    assert {k: stats[k] for k in ("submitted", "sent", "failed", "retries", "duplicates", "in_flight",
+                                  "queue_depth")} == {
+        "submitted": 2, "sent": 2, "failed": 0, "retries": 1, "duplicates": 1, "in_flight": 0, "queue_depth": 0,
+    }
+    assert 0 < stats["latency_p50"] <= stats["latency_max"]
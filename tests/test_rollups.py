@@ -0,0 +1,90 @@
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from metarwarr.bench import synthetic_corpus
+from metarwarr.history_store import SQLiteHistoryStore, to_epoch
+from metarwarr.rollups import RESOLUTIONS, ROLLUP_METRICS, SMALL_BATCH
+
+
+def _row(station, obs_time, gust):
+    wind = f"27015G{gust}KT" if gust else "27015KT"
+    metar = f"{station} {obs_time:%d%H%M}Z {wind} 9999 FEW020 30/24 Q1010"
+    return {"station": station, "obs_time": obs_time, "time": str(obs_time), "metar": metar}
+
+
+def test_out_of_order_batch_keeps_newest_last(store):
+    t = datetime(2026, 10, 1, 10)
+    store.append([_row("WARR", t + timedelta(minutes=30), 30)])
+    # Newest row of the batch has no gust; the gust it carries is older than the stored one
+    store.append([_row("WARR", t + timedelta(minutes=10), 40), _row("WARR", t + timedelta(minutes=50), None)])
+    cells = store.read_rollup("WARR", resolution="hour")
+    assert cells["gust_last"].tolist() == [30]
+    assert cells["gust_last_time"].tolist() == [pd.Timestamp(t + timedelta(minutes=30))]
+    assert cells["gust_n"].tolist() == [2]
+    assert cells["gust_max"].tolist() == [40]
+    assert cells["last_time"].tolist() == [pd.Timestamp(t + timedelta(minutes=50))]
+
+
+def _brute_force(rows, seconds):
+    rows = rows.copy()
+    rows["bucket"] = rows["obs_time"].map(to_epoch) // seconds * seconds
+    rows = rows.sort_values("obs_time", kind="stable")
+    out = {}
+    for (station, bucket), g in rows.groupby(["station", "bucket"]):
+        cell = {"last_time": g["obs_time"].max()}
+        for m in ROLLUP_METRICS:
+            v = g[m].astype("float64").dropna()
+            cell[f"{m}_n"] = len(v)
+            cell[f"{m}_min"], cell[f"{m}_max"], cell[f"{m}_mean"] = v.min(), v.max(), v.mean()
+            cell[f"{m}_last"] = v.iloc[-1] if len(v) else np.nan
+        out[(station, bucket)] = cell
+    return out
+
+
+@pytest.mark.parametrize("resolution", list(RESOLUTIONS))
+def test_rollups_match_raw_rows(store, resolution):
+    rows = synthetic_corpus(1500, stations=["WARR", "WIII", "KJFK"], seed=3, step=timedelta(minutes=20),
+                            end=datetime(2026, 10, 10))
+    # Shuffled and split into live-sized and bulk-sized batches: both merge paths, any order
+    random.Random(3).shuffle(rows)
+    sizes = [1, 2, SMALL_BATCH + 40, 5, 300]
+    i = k = 0
+    while i < len(rows):
+        n = sizes[k % len(sizes)]
+        store.append(rows[i:i + n])
+        i, k = i + n, k + 1
+
+    expected = _brute_force(store.read_range(), RESOLUTIONS[resolution])
+    cells = store.read_rollup(resolution=resolution)
+    assert len(cells) == len(expected)
+    for cell in cells.itertuples(index=False):
+        want = expected[(cell.station, to_epoch(cell.bucket))]
+        assert cell.last_time == want["last_time"]
+        for m in ROLLUP_METRICS:
+            assert getattr(cell, f"{m}_n") == want[f"{m}_n"], m
+            for stat in ("min", "max", "mean", "last"):
+                got, exp = getattr(cell, f"{m}_{stat}"), want[f"{m}_{stat}"]
+                assert (np.isnan(got) and np.isnan(exp)) or got == pytest.approx(exp), (m, stat)
+
+
+def test_old_rollup_layout_is_rebuilt(tmp_path):
+    path = str(tmp_path / "history.db")
+    store = SQLiteHistoryStore(path)
+    store.append([_row("WARR", datetime(2026, 10, 1, 10, 30), 30)])
+    store.close()
+    # A database written before the per-metric last_time columns existed
+    conn = sqlite3.connect(path)
+    conn.execute("ALTER TABLE rollup_hour DROP COLUMN gust_last_time")
+    conn.close()
+    store = SQLiteHistoryStore(path)
+    try:
+        cells = store.read_rollup("WARR", resolution="hour")
+        assert cells["gust_last"].tolist() == [30]
+        assert cells["gust_last_time"].notna().all()
+    finally:
+        store.close()